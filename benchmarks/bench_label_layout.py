@@ -0,0 +1,90 @@
+"""
+Benchmark PDF layout time of the FDA label section against label size.
+
+Picks the largest labels from an openFDA drug label dump (the
+drug-label-*.json files from https://open.fda.gov/apis/downloadable-data/)
+and renders each one at 25%, 50% and 100% of its text, reporting the
+milliseconds spent per kilobyte. Roughly constant ms/KB across the
+fractions means layout scales linearly with label length.
+
+Without --labels, the label embedded in the sample report is used and
+scaled up by repeating its text.
+
+Usage:
+    python benchmarks/bench_label_layout.py [--labels drug-label-0001-of-0013.json] [--top 5]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from generators.pdf_generator import PDFGenerator
+
+SKIP_FIELDS = ["openfda", "spl_product_data_elements", "spl_id", "id", "set_id"]
+
+def label_size(label):
+    """Total characters of renderable text in a label."""
+    return sum(len(str(item)) for key, value in label.items() if key not in SKIP_FIELDS
+               for item in (value if isinstance(value, list) else [value]))
+
+def scale_label(label, factor):
+    """Return a copy of the label with every text entry cut (factor < 1) or repeated (factor > 1)."""
+    scaled = {}
+    for key, value in label.items():
+        if key in SKIP_FIELDS or not isinstance(value, list):
+            scaled[key] = value
+        elif factor < 1:
+            scaled[key] = [str(item)[:int(len(str(item)) * factor)] for item in value]
+        else:
+            scaled[key] = [" ".join([str(item)] * int(factor)) for item in value]
+    return scaled
+
+def render_label(label):
+    """Render a report containing only the label section and return elapsed seconds."""
+    report = {"meta": {}, "drug_information": {}, "manufacturer_information": {},
+              "clinical_information": {}, "market_information": {}, "ai_insights": {},
+              "label_information": label}
+    start = time.perf_counter()
+    PDFGenerator(report).generate_pdf(io.BytesIO())
+    return time.perf_counter() - start
+
+def load_labels(path, top):
+    """Load the `top` largest labels from an openFDA label dump file."""
+    with open(path, 'r') as f:
+        results = json.load(f)['results']
+    results.sort(key=label_size, reverse=True)
+    return results[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--labels', help='openFDA drug label dump (JSON)')
+    parser.add_argument('--top', type=int, default=5, help='number of largest labels to render')
+    args = parser.parse_args()
+
+    if args.labels:
+        labels = load_labels(args.labels, args.top)
+        factors = [0.25, 0.5, 1]
+    else:
+        with open(os.path.join(ROOT, 'reports', '76162-777_drug_report.json'), 'r') as f:
+            labels = [json.load(f)['label_information']]
+        factors = [1, 2, 4, 8]
+
+    # Warm up fonts and the shared template
+    render_label({"description": ["warm up"]})
+
+    print(f"{'label':<40} {'factor':>6} {'KB':>8} {'seconds':>8} {'ms/KB':>8}")
+    for label in labels:
+        name = (label.get('openfda', {}).get('brand_name') or [label.get('set_id', 'label')])[0]
+        for factor in factors:
+            scaled = scale_label(label, factor)
+            kilobytes = label_size(scaled) / 1024
+            elapsed = render_label(scaled)
+            print(f"{name[:40]:<40} {factor:>6} {kilobytes:>8.1f} {elapsed:>8.2f} {elapsed * 1000 / kilobytes:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark the market analytics group-bys over the columnar catalog.
+
+Compares three ways of answering the market analytics section:
+
+    per_request  loop over the NDC records for every request (no precompute)
+    counter      precompute dicts keyed by group: Counter over zipped code
+                 columns and per-set lists of expiration dates
+    array        MarketAnalytics as shipped: group-bys into arrays indexed
+                 by group code, expiration dates kept CSR-style
+
+For the precomputed variants it reports the one-off precompute time and
+the per-request lookup time; for per_request only the latter.
+
+Usage:
+    python benchmarks/bench_market_analytics.py --catalog benchmarks/data/drug-ndc-100000-seed42.json [--queries 200] [--runs 3]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from bisect import bisect_right
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from analytics.market_analytics import APPLICATION_TYPES, MarketAnalytics
+from models.drug_model import application_type
+from models.drug_table import DrugTable, StringColumn
+
+def per_request_section(results, ndc_code):
+    """Compute the counts of the market section with one pass over the raw records."""
+    drug = next(record for record in results if record.get('product_ndc') == ndc_code)
+    ingredients = sorted({ingredient.get('name', 'Unknown') for ingredient in drug.get('active_ingredients', [])})
+    generic = drug.get('generic_name', 'Unknown')
+    products = packages = 0
+    labelers, generic_labelers = set(), set()
+    types = Counter()
+    for record in results:
+        if record.get('generic_name', 'Unknown') == generic:
+            generic_labelers.add(record.get('labeler_name', 'Unknown'))
+        if sorted({ingredient.get('name', 'Unknown') for ingredient in record.get('active_ingredients', [])}) == ingredients:
+            products += 1
+            packages += len(record.get('packaging', []))
+            labelers.add(record.get('labeler_name', 'Unknown'))
+            types[application_type(record.get('application_number', 'Unknown'))] += 1
+    return products - 1, len(labelers), len(generic_labelers), types, packages
+
+class CounterAnalytics:
+    """The MarketAnalytics aggregations as Counters and dicts keyed by group code."""
+
+    def __init__(self, table):
+        self.ingredient_set = StringColumn()
+        names = table.ingredient_name.codes
+        offsets = table.ingredient_offsets
+        for row in range(len(table)):
+            self.ingredient_set.append(tuple(sorted(set(names[offsets[row]:offsets[row + 1]]))))
+        set_codes = self.ingredient_set.codes
+        type_of_value = [APPLICATION_TYPES.index(application_type(value)) for value in table.application_number.values]
+        type_codes = [type_of_value[code] for code in table.application_number.codes]
+        package_counts = [end - start for start, end in zip(table.package_offsets, table.package_offsets[1:])]
+
+        self.products = Counter(set_codes)
+        self.labelers_by_generic = Counter(generic for generic, _ in set(zip(table.generic_name.codes, table.labeler_name.codes)))
+        self.labelers_by_set = Counter(ingredients for ingredients, _ in set(zip(set_codes, table.labeler_name.codes)))
+        self.types = Counter(zip(set_codes, type_codes))
+        self.packages = Counter()
+        for ingredients, count in zip(set_codes, package_counts):
+            self.packages[ingredients] += count
+        expirations = defaultdict(list)
+        for ingredients, ordinal in zip(set_codes, table.listing_expiration_date):
+            if ordinal:
+                expirations[ingredients].append(ordinal)
+        self.expirations = {key: sorted(values) for key, values in expirations.items()}
+
+    def section(self, table, ndc_code, days, today):
+        row = table.index_of(ndc_code)
+        code = self.ingredient_set.codes[row]
+        start = today.toordinal()
+        ordinals = self.expirations.get(code, [])
+        return (self.products[code] - 1, self.labelers_by_set[code],
+                self.labelers_by_generic[table.generic_name.codes[row]],
+                [self.types[(code, type_code)] for type_code in range(len(APPLICATION_TYPES))], self.packages[code],
+                bisect_right(ordinals, start + days) - bisect_right(ordinals, start))
+
+def timed(func, runs=1):
+    """Run func `runs` times; return (last result, mean milliseconds per run)."""
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func()
+    return result, (time.perf_counter() - start) * 1000 / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--catalog', required=True, help="drug-ndc.json (see benchmarks/synthetic.py)")
+    parser.add_argument('--queries', type=int, default=200, help="Lookups per precomputed variant")
+    parser.add_argument('--per-request-queries', type=int, default=5, help="Lookups for the per_request variant")
+    parser.add_argument('--runs', type=int, default=3, help="Precompute runs to average")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with open(args.catalog, 'r') as f:
+        results = json.load(f)['results']
+    table = DrugTable.from_results(results)
+    ndcs = random.Random(args.seed).sample(table.product_ndc, args.queries)
+
+    today = datetime.date.today()
+    counter, counter_build = timed(lambda: CounterAnalytics(table), args.runs)
+    analytics, array_build = timed(lambda: MarketAnalytics(table), args.runs)
+    _, counter_query = timed(lambda: [counter.section(table, ndc, 90, today) for ndc in ndcs])
+    _, array_query = timed(lambda: [analytics.market_section(ndc, 90, today) for ndc in ndcs])
+    sample = ndcs[:args.per_request_queries]
+    _, loop_query = timed(lambda: [per_request_section(results, ndc) for ndc in sample])
+
+    print(f"Products: {len(table)}  ingredient sets: {len(analytics.ingredient_set.values)}")
+    print(f"{'variant':<12} {'precompute ms':>14} {'ms/request':>12}")
+    print(f"{'per_request':<12} {'-':>14} {loop_query / len(sample):12.4f}")
+    print(f"{'counter':<12} {counter_build:14.1f} {counter_query / len(ndcs):12.4f}")
+    print(f"{'array':<12} {array_build:14.1f} {array_query / len(ndcs):12.4f}")
+
+if __name__ == "__main__":
+    main()
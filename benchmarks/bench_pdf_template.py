@@ -0,0 +1,55 @@
+"""
+Benchmark the per-PDF saving of the shared PDFTemplate.
+
+Compares rendering with a fresh template per document (the previous
+behaviour, where every PDFGenerator rebuilt its stylesheet) against the
+process-wide template returned by get_default_template().
+
+Usage:
+    python benchmarks/bench_pdf_template.py [--report reports/<ndc>_drug_report.json] [--runs 20]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from generators.pdf_generator import PDFGenerator
+from generators.pdf_template import PDFTemplate, get_default_template
+
+def time_runs(func, runs):
+    """Run func `runs` times and return the mean duration in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) * 1000 / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--report', default=os.path.join(ROOT, 'reports', '76162-777_drug_report.json'))
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.report, 'r') as f:
+        report = json.load(f)
+
+    # Warm up reportlab's own module-level caches (fonts, parsers) once
+    get_default_template()
+    PDFGenerator(report, io.BytesIO()).generate_pdf()
+
+    setup_fresh = time_runs(PDFTemplate, args.runs)
+    setup_shared = time_runs(get_default_template, args.runs)
+    render_fresh = time_runs(lambda: PDFGenerator(report, io.BytesIO(), template=PDFTemplate()).generate_pdf(), args.runs)
+    render_shared = time_runs(lambda: PDFGenerator(report, io.BytesIO()).generate_pdf(), args.runs)
+
+    print(f"Runs per measurement: {args.runs}")
+    print(f"Template setup   fresh: {setup_fresh:8.3f} ms   shared: {setup_shared:8.3f} ms")
+    print(f"Full PDF render  fresh: {render_fresh:8.3f} ms   shared: {render_shared:8.3f} ms")
+    print(f"Per-PDF saving: {render_fresh - render_shared:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Startup benchmark for the command-line entry points.
+
+Each scenario runs in fresh interpreters (median of --runs) and reports
+wall-clock time to import the entry point and do its minimal work, plus
+which heavy dependencies got loaded along the way:
+
+    import_main         import main
+    import_regenerate   import regenerate
+    import_render_pdf   import render_pdf (loads reportlab by design)
+    lookup_only         import main, build a ReportPipeline and look up one NDC
+                        in a small synthetic catalog
+
+main, regenerate and lookup_only must not load the Gemini SDK, reportlab or
+requests; the benchmark exits with status 1 if they do, or, with
+--baseline, if a scenario got slower than --fail-above times the baseline.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 15] [--baseline benchmarks/results/startup-<old>.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_suite import ROOT, git_revision
+from synthetic import write_catalog
+
+HEAVY_MODULES = ("google.generativeai", "grpc", "reportlab", "requests")
+
+# name -> (code run in the fresh interpreter, heavy modules it may load)
+SCENARIOS = {
+    "import_main": ("import main", ()),
+    "import_regenerate": ("import regenerate", ()),
+    "import_render_pdf": ("import render_pdf", ("reportlab",)),
+    "lookup_only": ("import main\n"
+                    "from pipeline.report_pipeline import ReportPipeline\n"
+                    "pipeline = ReportPipeline({'data_file': CATALOG, 'render_cache': {'enabled': False}})\n"
+                    "assert pipeline.lookup(NDC)", ()),
+}
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+CATALOG, NDC = sys.argv[1], sys.argv[2]
+{code}
+elapsed = time.perf_counter() - start
+print(repr((elapsed, sorted(m for m in {heavy!r} if m in sys.modules))))
+"""
+
+def run_scenario(code, catalog, ndc, runs):
+    """
+    Run a scenario in fresh interpreters.
+
+    Returns:
+        dict: Median in-process and process wall time (ms) and the heavy modules loaded
+    """
+    inner, outer, loaded = [], [], set()
+    script = PROBE.format(code=code, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', script, catalog, ndc], cwd=os.path.join(ROOT, 'src'),
+                                capture_output=True, text=True, env=env)
+        outer.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+        elapsed, modules = eval(result.stdout.strip().splitlines()[-1])
+        inner.append(elapsed)
+        loaded.update(modules)
+    return {"import_ms": round(statistics.median(inner) * 1000, 1),
+            "process_ms": round(statistics.median(outer) * 1000, 1),
+            "heavy_modules": sorted(loaded)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/startup-<commit>.json)")
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--fail-above', type=float, default=1.25, help="Allowed slowdown against --baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        catalog = os.path.join(workdir, 'drug-ndc.json')
+        write_catalog(catalog, 1000, seed=42, sample_size=1)
+        with open(f"{catalog}.ndcs.json") as f:
+            ndc = json.load(f)[0][0]
+        # One untimed run so the OS file cache is warm for every scenario alike
+        run_scenario("import main", catalog, ndc, 1)
+        results = {name: run_scenario(SCENARIOS[name][0], catalog, ndc, args.runs) for name in args.scenarios}
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    failures = []
+    print(f"{'scenario':<20}{'import ms':>11}{'process ms':>12}  heavy modules")
+    for name, result in results.items():
+        unexpected = sorted(set(result["heavy_modules"]) - set(SCENARIOS[name][1]))
+        if unexpected:
+            failures.append(f"{name} loaded {', '.join(unexpected)}")
+        flag = ""
+        before = baseline.get(name, {}).get("import_ms")
+        if before:
+            ratio = result["import_ms"] / before
+            flag = f"  {ratio:.2f}x"
+            if ratio > args.fail_above:
+                failures.append(f"{name} {ratio:.2f}x slower than baseline")
+        print(f"{name:<20}{result['import_ms']:>11.1f}{result['process_ms']:>12.1f}  "
+              f"{', '.join(result['heavy_modules']) or '-'}{flag}")
+
+    commit, dirty = git_revision()
+    output = args.output or os.path.join(BENCH_DIR, 'results',
+                                         f"startup-{(commit or 'unknown')[:12]}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({"commit": commit, "dirty": dirty, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "python": sys.version.split()[0], "runs": args.runs, "results": results}, f, indent=2)
+    print(f"Results saved: {output}")
+
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark suite over synthetic catalogs at several scales.
+
+For each catalog size a seeded drug-ndc.json is generated (and reused on
+later runs), then a fresh worker process measures:
+
+    import_s          importing the report modules
+    cold_lookup_s     first FDAClient.get_drug_info (loads and indexes the catalog)
+    peak_rss_mb       peak resident memory of the worker after loading
+    lookup_us         FDAClient.get_drug_info for sampled NDCs (p50/p99)
+    lookup_miss_us    FDAClient.get_drug_info for unknown NDCs (p50/p99)
+    format_ndc_us     format_ndc on mixed 10/11-digit and dashed inputs (p50/p99)
+    compile_ms        ReportGenerator.compile_report with a synthetic label (p50/p99)
+    pdf_ms            PDFGenerator.render_bytes without the render cache (p50/p99)
+
+Results are written as JSON tagged with the git commit, so runs can be
+compared with benchmarks/compare.py.
+
+Usage:
+    python benchmarks/bench_suite.py [--scales 10000 100000 1000000] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import generate_label, write_catalog
+
+PLACEHOLDER_INSIGHTS = {
+    "drug_summary": "This is a summary of the drug.",
+    "mechanism_of_action": "This is the mechanism of action.",
+    "side_effects": "These are the side effects.",
+    "market_trends": "These are the market trends.",
+    "patient_journey": "This is the patient journey."
+}
+
+def percentiles(samples, scale=1.0):
+    """Return p50/p99/mean of a list of durations in seconds, multiplied by scale."""
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale
+    return {"p50": round(pick(0.5), 3), "p99": round(pick(0.99), 3),
+            "mean": round(sum(ordered) / len(ordered) * scale, 3), "n": len(ordered)}
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def run_worker(catalog_path, seed, lookups, compiles, renders, label_kb):
+    """Measure one catalog in this (fresh) process and return the metrics."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    from api.fda_client import FDAClient
+    from generators.pdf_generator import PDFGenerator
+    from generators.report_generator import ReportGenerator
+    from utils.helpers import format_ndc
+    results = {"import_s": round(time.perf_counter() - start, 3)}
+
+    with open(f"{catalog_path}.ndcs.json") as f:
+        sample = json.load(f)
+    client = FDAClient(catalog_path)
+    results["cold_lookup_s"] = round(timed(client.get_drug_info, sample[0][0]), 3)
+    results["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    ndcs = [rng.choice(sample)[0] for _ in range(lookups)]
+    results["lookup_us"] = percentiles([timed(client.get_drug_info, ndc) for ndc in ndcs], 1e6)
+    misses = [f"{rng.randint(0, 9999):04d}-{rng.randint(0, 9999):04d}x" for _ in range(lookups)]
+    results["lookup_miss_us"] = percentiles([timed(client.get_drug_info, ndc) for ndc in misses], 1e6)
+
+    raw_inputs = []
+    for ndc, _ in sample:
+        digits = ndc.replace('-', '')
+        raw_inputs.extend([ndc, digits, digits.zfill(11), f"{ndc}-01"])
+    results["format_ndc_us"] = percentiles([timed(format_ndc, value) for value in raw_inputs], 1e6)
+
+    reports, compile_times = [], []
+    for ndc, set_id in rng.sample(sample, min(compiles, len(sample))):
+        drug_info = client.get_drug_info(ndc)
+        label = generate_label(set_id, seed, label_kb, [ndc])
+        generator = ReportGenerator(drug_info, PLACEHOLDER_INSIGHTS, label)
+        start = time.perf_counter()
+        reports.append(generator.compile_report(ndc))
+        compile_times.append(time.perf_counter() - start)
+    results["compile_ms"] = percentiles(compile_times, 1e3)
+
+    # One warm-up render so reportlab's module-level caches are not counted
+    PDFGenerator(reports[0]).render_bytes()
+    results["pdf_ms"] = percentiles([timed(PDFGenerator(report).render_bytes) for report in reports[:renders]], 1e3)
+    return results
+
+def git_revision():
+    """Return (commit, dirty) for the repository, or (None, None) outside git."""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True,
+                                         stderr=subprocess.DEVNULL).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             cwd=ROOT, text=True).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, 'data'),
+                        help="Where generated catalogs are kept between runs")
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--compiles', type=int, default=200)
+    parser.add_argument('--renders', type=int, default=10)
+    parser.add_argument('--label-kb', type=int, default=40, help="Approximate size of each synthetic label")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        json.dump(run_worker(args.worker, args.seed, args.lookups, args.compiles, args.renders, args.label_kb),
+                  sys.stdout)
+        return
+
+    commit, dirty = git_revision()
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = {}
+    for scale in args.scales:
+        catalog = os.path.join(args.data_dir, f"drug-ndc-{scale}-seed{args.seed}.json")
+        if not os.path.exists(catalog) or not os.path.exists(f"{catalog}.ndcs.json"):
+            print(f"Generating {scale} products: {catalog}", file=sys.stderr)
+            write_catalog(catalog, scale, args.seed)
+
+        print(f"Measuring {scale} products...", file=sys.stderr)
+        worker = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', catalog, '--seed', str(args.seed),
+             '--lookups', str(args.lookups), '--compiles', str(args.compiles), '--renders', str(args.renders),
+             '--label-kb', str(args.label_kb)],
+            capture_output=True, text=True, cwd=ROOT)
+        if worker.returncode != 0:
+            print(worker.stderr, file=sys.stderr)
+            results[str(scale)] = {"error": f"worker exited with {worker.returncode}"}
+            continue
+        results[str(scale)] = json.loads(worker.stdout)
+        results[str(scale)]["catalog_mb"] = round(os.path.getsize(catalog) / 2 ** 20, 1)
+        print(json.dumps(results[str(scale)]), file=sys.stderr)
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"{(commit or 'unknown')[:12]}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "settings": {"lookups": args.lookups, "compiles": args.compiles, "renders": args.renders,
+                         "label_kb": args.label_kb},
+            "results": results,
+        }, f, indent=2)
+    print(f"Results saved: {output}")
+
+if __name__ == "__main__":
+    main()
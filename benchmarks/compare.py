@@ -0,0 +1,60 @@
+"""
+Compare two bench_suite.py result files.
+
+Prints every metric side by side with the new/old ratio. Latency metrics
+use p50 (and p99 with --p99). With --fail-above, exits with status 1 when
+any metric got slower or bigger by more than that factor, for use in CI.
+
+Usage:
+    python benchmarks/compare.py benchmarks/results/<old>.json benchmarks/results/<new>.json [--fail-above 1.2]
+"""
+import argparse
+import json
+import sys
+
+def flatten(scale_results, include_p99):
+    """Map metric name -> number for one scale, taking p50 (and optionally p99) of percentile metrics."""
+    values = {}
+    for name, value in scale_results.items():
+        if isinstance(value, dict):
+            values[f"{name}.p50"] = value["p50"]
+            if include_p99:
+                values[f"{name}.p99"] = value["p99"]
+        elif isinstance(value, (int, float)):
+            values[name] = value
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--p99', action='store_true', help="Also compare p99 latencies")
+    parser.add_argument('--fail-above', type=float, help="Exit 1 if any new/old ratio exceeds this")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"old: {(old.get('commit') or 'unknown')[:12]}  new: {(new.get('commit') or 'unknown')[:12]}")
+
+    regressions = []
+    for scale in sorted(set(old["results"]) & set(new["results"]), key=int):
+        old_values = flatten(old["results"][scale], args.p99)
+        new_values = flatten(new["results"][scale], args.p99)
+        print(f"\n{int(scale):,} products")
+        for name in sorted(set(old_values) & set(new_values)):
+            before, after = old_values[name], new_values[name]
+            ratio = after / before if before else float('inf') if after else 1.0
+            flag = ""
+            if args.fail_above and ratio > args.fail_above:
+                flag = "  <-- regression"
+                regressions.append(f"{scale}:{name}")
+            print(f"  {name:<22} {before:>12,.3f} {after:>12,.3f} {ratio:>7.2f}x{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) above {args.fail_above}x: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
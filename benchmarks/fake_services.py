@@ -0,0 +1,353 @@
+"""
+Local stand-ins for the openFDA drug API, the Gemini REST API and the
+ClinicalTrials.gov registry.
+
+FakeOpenFDA serves /drug/label.json and /drug/drugsfda.json searches the
+way FDAClient issues them, answering with synthetic labels (see
+synthetic.generate_label). FakeGemini serves
+/v1beta/models/<model>:generateContent, which the google.generativeai SDK
+calls when GeminiClient is given an api_endpoint. FakeClinicalTrials
+serves the /api/v2/studies search with cursor paging.
+
+Each service takes a FaultProfile: log-normal response latency, injected
+429 and 5xx rates, and a request quota per time window answered with 429
+and Retry-After once exhausted. Responses are counted by status code.
+
+Usage (standalone, then point config openfda.base_url, ai_insights.api_endpoint and
+clinical_trials.base_url at them):
+    python benchmarks/fake_services.py --fda-latency-ms 150 --gemini-error-429 0.02
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import uuid
+
+from synthetic import generate_label
+
+class FaultProfile:
+    """Latency distribution, error injection and quota of a fake service."""
+
+    def __init__(self, latency_ms=100.0, latency_sigma=0.5, error_429=0.0, error_5xx=0.0,
+                 quota=None, quota_window=60.0, seed=None):
+        """
+        Initialize the profile.
+
+        Args:
+            latency_ms (float): Median response latency in milliseconds
+            latency_sigma (float): Log-normal shape; 0 gives a constant latency, 1 a heavy tail
+            error_429 (float): Fraction of requests answered with 429 Too Many Requests
+            error_5xx (float): Fraction of requests answered with 500 or 503
+            quota (int, optional): Requests allowed per quota window; further ones get 429
+            quota_window (float): Quota window in seconds
+            seed (int, optional): Random seed for reproducible fault sequences
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self.quota = quota
+        self.quota_window = quota_window
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def delay(self):
+        """Draw a response latency in seconds."""
+        with self._lock:
+            factor = self._rng.lognormvariate(0, self.latency_sigma) if self.latency_sigma else 1.0
+        return self.latency_ms * factor / 1000
+
+    def fault(self):
+        """
+        Decide whether a request fails.
+
+        Returns:
+            tuple: (status, retry_after seconds or None), or None to serve the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.quota_window:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            if self.quota is not None and self._window_count > self.quota:
+                return 429, math.ceil(self.quota_window - (now - self._window_start))
+            draw = self._rng.random()
+        if draw < self.error_429:
+            return 429, 1
+        if draw < self.error_429 + self.error_5xx:
+            return (503 if draw < self.error_429 + self.error_5xx / 2 else 500), None
+        return None
+
+class FakeService:
+    """Threaded HTTP server applying a FaultProfile before each response."""
+
+    name = "service"
+
+    def __init__(self, port=0, profile=None, host='127.0.0.1'):
+        """
+        Initialize the service.
+
+        Args:
+            port (int): Port to listen on; 0 picks a free port
+            profile (FaultProfile, optional): Faults to inject; defaults to 100 ms without errors
+            host (str): Interface to bind
+        """
+        self.profile = profile or FaultProfile()
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                service._handle(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                service._handle(self, self.rfile.read(length) if length else b'')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+
+    @property
+    def url(self):
+        """Base URL of the service."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Serve from a background thread and return self."""
+        threading.Thread(target=self.server.serve_forever, name=f"fake-{self.name}", daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handle(self, handler, body):
+        time.sleep(self.profile.delay())
+        fault = self.profile.fault()
+        if fault is not None:
+            status, retry_after = fault
+            self._respond(handler, status, self.error_body(status), retry_after)
+            return
+        status, payload = self.respond(urlparse(handler.path), body)
+        self._respond(handler, status, payload)
+
+    def _respond(self, handler, status, payload, retry_after=None):
+        data = json.dumps(payload).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        if retry_after is not None:
+            handler.send_header('Retry-After', str(retry_after))
+        handler.end_headers()
+        handler.wfile.write(data)
+        with self._stats_lock:
+            self.stats[status] += 1
+
+    def respond(self, url, body):
+        """Build the (status, JSON payload) for a successful request."""
+        raise NotImplementedError
+
+    def error_body(self, status):
+        """JSON payload of an injected error."""
+        return {"error": {"code": status, "message": "Injected fault"}}
+
+class FakeOpenFDA(FakeService):
+    """Stand-in for the openFDA label.json and drugsfda.json endpoints."""
+
+    name = "openfda"
+
+    def __init__(self, port=0, profile=None, seed=42, label_kb=40, host='127.0.0.1'):
+        """
+        Initialize the service.
+
+        Args:
+            port (int): Port to listen on; 0 picks a free port
+            profile (FaultProfile, optional): Faults to inject
+            seed (int): Seed for the synthetic labels
+            label_kb (int): Approximate size of each label
+            host (str): Interface to bind
+        """
+        super().__init__(port, profile, host)
+        self.seed = seed
+        self.label_kb = label_kb
+
+    @property
+    def url(self):
+        """Value for config openfda.base_url."""
+        return f"http://{self.host}:{self.port}/drug"
+
+    def respond(self, url, body):
+        search = parse_qs(url.query).get('search', [''])[0]
+        field, _, value = search.partition(':')
+        if not value:
+            return 400, {"error": {"code": "BAD_REQUEST", "message": "Missing search"}}
+
+        if url.path.endswith('/label.json'):
+            if field == 'set_id':
+                set_id, ndcs = value, []
+            else:
+                # Products found by NDC get a stable set_id of their own
+                set_id, ndcs = str(uuid.uuid5(uuid.NAMESPACE_URL, value)), [value]
+            return 200, {"meta": {"results": {"total": 1}},
+                         "results": [generate_label(set_id, self.seed, self.label_kb, ndcs)]}
+        if url.path.endswith('/drugsfda.json'):
+            return 200, {"meta": {"results": {"total": 1}}, "results": [{
+                "application_number": f"ANDA{abs(hash(value)) % 200000:06d}",
+                "sponsor_name": "SYNTHETIC PHARMA",
+                "submissions": [{"submission_type": "ORIG", "submission_status": "AP",
+                                 "submission_status_date": "20200101"}],
+                "openfda": {"product_ndc": [value]},
+            }]}
+        return 404, {"error": {"code": "NOT_FOUND", "message": "No matches found!"}}
+
+    def error_body(self, status):
+        return {"error": {"code": "OVER_RATE_LIMIT" if status == 429 else "SERVER_ERROR",
+                          "message": "Injected fault"}}
+
+class FakeGemini(FakeService):
+    """Stand-in for the Gemini generateContent REST endpoint."""
+
+    name = "gemini"
+
+    def __init__(self, port=0, profile=None, response_chars=1500, host='127.0.0.1'):
+        """
+        Initialize the service.
+
+        Args:
+            port (int): Port to listen on; 0 picks a free port
+            profile (FaultProfile, optional): Faults to inject
+            response_chars (int): Length of each generated text
+            host (str): Interface to bind
+        """
+        super().__init__(port, profile, host)
+        self.response_chars = response_chars
+
+    def respond(self, url, body):
+        if not url.path.endswith(':generateContent'):
+            return 404, self.error_body(404)
+        prompt = json.loads(body or b'{}').get('contents', [{}])[0].get('parts', [{}])[0].get('text', '')
+        text = ("Synthetic insight. " + " ".join(prompt.split()[:40]) + " ") * 50
+        return 200, {
+            "candidates": [{"content": {"parts": [{"text": text[:self.response_chars]}], "role": "model"},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": self.response_chars // 4},
+        }
+
+    def error_body(self, status):
+        reason = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE"}.get(status, "NOT_FOUND")
+        return {"error": {"code": status, "message": "Injected fault", "status": reason}}
+
+class FakeClinicalTrials(FakeService):
+    """Stand-in for the ClinicalTrials.gov API v2 study search, with cursor paging."""
+
+    name = "clinicaltrials"
+    STATUSES = ["RECRUITING", "COMPLETED", "ACTIVE_NOT_RECRUITING", "TERMINATED", "NOT_YET_RECRUITING"]
+    PHASES = [["PHASE1"], ["PHASE2"], ["PHASE3"], ["PHASE4"], ["PHASE1", "PHASE2"], []]
+
+    def __init__(self, port=0, profile=None, seed=42, max_per_term=300, host='127.0.0.1'):
+        """
+        Initialize the service.
+
+        Args:
+            port (int): Port to listen on; 0 picks a free port
+            profile (FaultProfile, optional): Faults to inject
+            seed (int): Seed for the synthetic studies
+            max_per_term (int): Upper bound on the studies matching one search term
+            host (str): Interface to bind
+        """
+        super().__init__(port, profile, host)
+        self.seed = seed
+        self.max_per_term = max_per_term
+
+    @property
+    def url(self):
+        """Value for config clinical_trials.base_url."""
+        return f"http://{self.host}:{self.port}/api/v2"
+
+    def respond(self, url, body):
+        if not url.path.endswith('/studies'):
+            return 404, self.error_body(404)
+        query = parse_qs(url.query)
+        term = query.get('query.intr', [''])[0].lower()
+        page_size = int(query.get('pageSize', ['10'])[0])
+        offset = int(query.get('pageToken', ['0'])[0])
+        # Each term matches a stable, skewed number of studies
+        rng = random.Random(f"{self.seed}:{term}")
+        total = int(self.max_per_term * rng.random() ** 3)
+        payload = {"studies": [self._study(term, index) for index in range(offset, min(offset + page_size, total))]}
+        if query.get('countTotal', ['false'])[0] == 'true':
+            payload["totalCount"] = total
+        if offset + page_size < total:
+            payload["nextPageToken"] = str(offset + page_size)
+        return 200, payload
+
+    def _study(self, term, index):
+        rng = random.Random(f"{self.seed}:{term}:{index}")
+        number = int(uuid.uuid5(uuid.NAMESPACE_URL, f"{term}:{index}").int % 10 ** 8)
+        return {"protocolSection": {
+            "identificationModule": {"nctId": f"NCT{number:08d}",
+                                     "briefTitle": f"Study of {term.title()} in Condition {rng.randint(1, 500)}"},
+            "statusModule": {"overallStatus": rng.choice(self.STATUSES),
+                             "startDateStruct": {"date": f"{rng.randint(2000, 2025)}-{rng.randint(1, 12):02d}"}},
+            "designModule": {"phases": rng.choice(self.PHASES)},
+            "conditionsModule": {"conditions": [f"Condition {rng.randint(1, 500)}"]},
+            "armsInterventionsModule": {"interventions": [{"name": term.title()}, {"name": "Placebo"}]},
+            "sponsorCollaboratorsModule": {"leadSponsor": {"name": f"Sponsor {rng.randint(1, 80)}"}},
+        }}
+
+def add_fault_arguments(parser, prefix=''):
+    """Add the FaultProfile options (optionally prefixed, e.g. "gemini-") to an argument parser."""
+    parser.add_argument(f'--{prefix}latency-ms', type=float, default=100.0, help="Median latency")
+    parser.add_argument(f'--{prefix}latency-sigma', type=float, default=0.5, help="Log-normal shape of the latency")
+    parser.add_argument(f'--{prefix}error-429', type=float, default=0.0, help="Fraction answered with 429")
+    parser.add_argument(f'--{prefix}error-5xx', type=float, default=0.0, help="Fraction answered with 500/503")
+    parser.add_argument(f'--{prefix}quota', type=int, help="Requests allowed per quota window")
+    parser.add_argument(f'--{prefix}quota-window', type=float, default=60.0, help="Quota window in seconds")
+
+def fault_profile(args, prefix='', seed=None):
+    """Build a FaultProfile from options added by add_fault_arguments."""
+    option = lambda name: getattr(args, f"{prefix}{name}".replace('-', '_'))
+    return FaultProfile(option('latency-ms'), option('latency-sigma'), option('error-429'), option('error-5xx'),
+                        option('quota'), option('quota-window'), seed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fda-port', type=int, default=8401)
+    parser.add_argument('--gemini-port', type=int, default=8402)
+    parser.add_argument('--trials-port', type=int, default=8403)
+    add_fault_arguments(parser, 'fda-')
+    add_fault_arguments(parser, 'gemini-')
+    add_fault_arguments(parser, 'trials-')
+    args = parser.parse_args()
+
+    fda = FakeOpenFDA(args.fda_port, fault_profile(args, 'fda-')).start()
+    gemini = FakeGemini(args.gemini_port, fault_profile(args, 'gemini-')).start()
+    trials = FakeClinicalTrials(args.trials_port, fault_profile(args, 'trials-')).start()
+    print(f"openfda.base_url: {fda.url}\nai_insights.api_endpoint: {gemini.url}\n"
+          f"clinical_trials.base_url: {trials.url}\nCtrl-C to stop", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(10)
+            print(f"openfda {dict(fda.stats)}  gemini {dict(gemini.stats)}  clinicaltrials {dict(trials.stats)}",
+                  file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+End-to-end load test of the report pipeline against local openFDA and Gemini stand-ins.
+
+Starts FakeOpenFDA, FakeGemini and FakeClinicalTrials (see
+fake_services.py) with the given latency distributions, error rates and
+quotas, points a ReportPipeline at them (Gemini insights, labels over
+HTTP, clinical trials with --trials, outputs in a temporary directory)
+and drives ReportPipeline.generate for NDCs sampled from a synthetic
+catalog. Two load models:
+
+    closed loop   --concurrency N workers, each starting its next report as
+                  soon as the previous one finishes
+    open loop     --rate R reports/s with Poisson arrivals; latency is
+                  measured from the scheduled arrival, so queueing delay
+                  behind a saturated pipeline is included
+
+With --bulk N, N batch-priority reports are queued on the pipeline's
+"reports" pool in the background while the measured (interactive) load
+runs; add --scheduling to enable the priority pools and compare.
+
+Reports throughput, latency percentiles, failures by exception type, the
+status codes each stand-in returned, and the per-stage summary of the
+tracer (including time queued per pool and priority class).
+
+Usage:
+    python benchmarks/load_test.py --catalog benchmarks/data/drug-ndc-10000-seed42.json --requests 500 \\
+        --concurrency 8 --gemini-latency-ms 800 --gemini-error-429 0.05 --fda-quota 240
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_services import FakeClinicalTrials, FakeGemini, FakeOpenFDA, add_fault_arguments, fault_profile
+from synthetic import write_catalog
+
+def percentiles(samples):
+    """Return p50/p90/p99/max/mean of durations in seconds, in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 1),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 1)}
+
+# Priority pools used with --scheduling (as in config.yaml)
+SCHEDULING = {
+    "enabled": True,
+    "classes": ["interactive", "batch"],
+    "pools": {
+        "reports": {"workers": 4, "reserved": {"interactive": 1}, "max_queue": {"interactive": 50, "batch": 1000}},
+        "http": {"workers": 8, "reserved": {"interactive": 2}, "max_queue": {"batch": 200}},
+        "llm": {"workers": 4, "reserved": {"interactive": 2}, "max_queue": {"batch": 100}},
+        "render": {"workers": 2, "reserved": {"interactive": 1}, "max_queue": {"batch": 50}},
+    },
+}
+
+def pipeline_config(catalog, output_dir, fda_url, gemini_url, trials_url=None, cache_dir=None, pdf=False,
+                    scheduling=False):
+    """
+    Build a pipeline configuration pointing at the stand-ins.
+
+    Args:
+        catalog (str): Synthetic drug-ndc.json
+        output_dir (str): Where reports are written
+        fda_url (str): openFDA stand-in base URL
+        gemini_url (str): Gemini stand-in endpoint
+        trials_url (str, optional): Clinical trials stand-in base URL; trials are left out when None
+        cache_dir (str, optional): Directory for the label, trials and insights disk caches; disabled when None
+        pdf (bool): Render PDFs (otherwise only JSON and the preview are written)
+        scheduling (bool): Enable the priority pools
+
+    Returns:
+        dict: Configuration for ReportPipeline
+    """
+    return {
+        "google_api_key": "load-test",
+        "data_file": catalog,
+        "output_dir": output_dir,
+        "report": {
+            "include_ai_insights": True,
+            "include_market_analytics": False,
+            "include_equivalents": False,
+            "preview_format": "html",
+            "pdf_on_demand": not pdf,
+            "include_clinical_trials": trials_url is not None,
+        },
+        "render_cache": {"enabled": False},
+        "openfda": {"base_url": fda_url},
+        "label_cache": {"dir": cache_dir and os.path.join(cache_dir, 'labels')},
+        "clinical_trials": {"base_url": trials_url, "cache": {"dir": cache_dir and os.path.join(cache_dir, 'trials')}},
+        "ai_insights": {"provider": "gemini", "api_endpoint": gemini_url,
+                        "cache": {"dir": cache_dir and os.path.join(cache_dir, 'insights')}},
+        "artifact_store": {"enabled": False},
+        "scheduling": SCHEDULING if scheduling else {"enabled": False},
+    }
+
+class LoadGenerator:
+    """Drives ReportPipeline.generate and records the outcome of every report."""
+
+    def __init__(self, pipeline, ndc_codes, seed=42):
+        """
+        Initialize the generator.
+
+        Args:
+            pipeline (ReportPipeline): Pipeline under test
+            ndc_codes (list): NDCs to sample reports from
+            seed (int): Seed for NDC sampling and arrival times
+        """
+        self.pipeline = pipeline
+        self.ndc_codes = ndc_codes
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.outcomes = Counter()
+        self._lock = threading.Lock()
+
+    def _run(self, ndc_code, scheduled):
+        try:
+            outputs = self.pipeline.generate(ndc_code)
+            outcome = "ok" if outputs else "not_found"
+        except Exception as e:
+            outcome = type(e).__name__
+        latency = time.perf_counter() - scheduled
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if outcome == "ok":
+                self.latencies.append(latency)
+
+    def closed_loop(self, requests, concurrency):
+        """Run requests reports with concurrency workers back to back; return the elapsed seconds."""
+        ndcs = [self.rng.choice(self.ndc_codes) for _ in range(requests)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for ndc_code in ndcs:
+                executor.submit(lambda ndc: self._run(ndc, time.perf_counter()), ndc_code)
+        return time.perf_counter() - start
+
+    def open_loop(self, requests, rate, max_workers):
+        """Start reports at Poisson arrivals of rate per second; return the elapsed seconds."""
+        start = time.perf_counter()
+        scheduled = start
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _ in range(requests):
+                scheduled += self.rng.expovariate(rate)
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._run, self.rng.choice(self.ndc_codes), scheduled)
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--catalog', help="Synthetic drug-ndc.json (generated with --products if missing)")
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4, help="Closed-loop workers")
+    parser.add_argument('--rate', type=float, help="Open-loop arrival rate (reports/s); overrides closed loop")
+    parser.add_argument('--max-workers', type=int, default=64, help="Open-loop worker limit")
+    parser.add_argument('--pdf', action='store_true', help="Render PDFs too")
+    parser.add_argument('--trials', action='store_true', help="Add the clinical trials section")
+    parser.add_argument('--caches', action='store_true',
+                        help="Enable the label, trials and insights disk caches (in a temporary directory)")
+    parser.add_argument('--bulk', type=int, default=0, help="Batch reports queued in the background")
+    parser.add_argument('--scheduling', action='store_true', help="Enable the priority pools")
+    parser.add_argument('--label-kb', type=int, default=40, help="Approximate size of each served label")
+    add_fault_arguments(parser, 'fda-')
+    add_fault_arguments(parser, 'gemini-')
+    add_fault_arguments(parser, 'trials-')
+    parser.add_argument('--output', help="Write the results as JSON")
+    args = parser.parse_args()
+
+    import logging
+    logging.basicConfig(level=logging.CRITICAL)
+    from pipeline.report_pipeline import ReportPipeline
+    from utils.tracing import get_tracer
+
+    workdir = tempfile.mkdtemp(prefix='drugdeck-load-')
+    catalog = args.catalog or os.path.join(workdir, 'drug-ndc.json')
+    if not os.path.exists(f"{catalog}.ndcs.json"):
+        print(f"Generating {args.products} products: {catalog}", file=sys.stderr)
+        write_catalog(catalog, args.products, args.seed)
+    with open(f"{catalog}.ndcs.json") as f:
+        ndc_codes = [ndc for ndc, _ in json.load(f)]
+
+    fda = FakeOpenFDA(profile=fault_profile(args, 'fda-', args.seed), seed=args.seed, label_kb=args.label_kb).start()
+    gemini = FakeGemini(profile=fault_profile(args, 'gemini-', args.seed + 1)).start()
+    trials = FakeClinicalTrials(profile=fault_profile(args, 'trials-', args.seed + 2), seed=args.seed).start()
+    try:
+        config = pipeline_config(catalog, os.path.join(workdir, 'reports'), fda.url, gemini.url,
+                                 trials.url if args.trials else None,
+                                 os.path.join(workdir, 'cache') if args.caches else None, args.pdf,
+                                 args.scheduling)
+        pipeline = ReportPipeline(config)
+        # Load the catalog before the clock starts; it is a one-off cost, not load
+        pipeline.lookup(ndc_codes[0])
+        get_tracer().reset()
+
+        bulk = []
+        if args.bulk:
+            rng = random.Random(args.seed + 3)
+            bulk_ndcs = [rng.choice(ndc_codes) for _ in range(args.bulk)]
+            # Blocking submits let the batch queue limit throttle the producer
+            threading.Thread(target=lambda: bulk.extend(pipeline.submit(ndc, priority="batch", block=True)
+                                                        for ndc in bulk_ndcs), daemon=True).start()
+            time.sleep(0.5)
+
+        load = LoadGenerator(pipeline, ndc_codes, args.seed)
+        if args.rate:
+            mode = f"open loop, {args.rate:g}/s"
+            elapsed = load.open_loop(args.requests, args.rate, args.max_workers)
+        else:
+            mode = f"closed loop, {args.concurrency} workers"
+            elapsed = load.closed_loop(args.requests, args.concurrency)
+    finally:
+        fda.stop()
+        gemini.stop()
+        trials.stop()
+
+    results = {
+        "mode": mode,
+        "requests": args.requests,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(load.outcomes["ok"] / elapsed, 2),
+        "latency_ms": percentiles(load.latencies),
+        "outcomes": dict(load.outcomes),
+        "bulk_completed": sum(1 for future in list(bulk) if future.done()),
+        "upstream_status": {"openfda": dict(fda.stats), "gemini": dict(gemini.stats),
+                            "clinicaltrials": dict(trials.stats)},
+        "stages": get_tracer().stage_summary(),
+    }
+
+    print(f"{mode}: {args.requests} reports in {results['elapsed_s']} s, "
+          f"{results['throughput_rps']} ok/s")
+    print("latency ms: " + "  ".join(f"{k} {v}" for k, v in results["latency_ms"].items()))
+    print("outcomes: " + "  ".join(f"{k} {v}" for k, v in sorted(load.outcomes.items())))
+    if args.bulk:
+        print(f"bulk: {results['bulk_completed']} of {args.bulk} batch reports completed meanwhile")
+    for service, statuses in results["upstream_status"].items():
+        print(f"{service}: " + "  ".join(f"{k}: {v}" for k, v in sorted(statuses.items())))
+    print(f"\n{'stage':<24}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, stage in results["stages"].items():
+        p50, p99 = (f"{stage[q] * 1000:.1f}" if stage[q] is not None else "-" for q in ("p50", "p99"))
+        print(f"{name:<24}{stage['count']:>8}{p50:>10}{p99:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Seeded generator of synthetic openFDA data for benchmarks and load tests.
+
+Produces drug-ndc.json catalogs and drug label documents shaped like the
+openFDA downloads: 4-4, 5-3 and 5-4 product NDCs, labelers and
+ingredients with skewed (Zipf-like) popularity, several products per SPL
+set_id, one to three packages per product, and labels with long prose
+sections plus HTML tables. The same seed always produces the same data.
+
+Usage:
+    python benchmarks/synthetic.py --products 100000 --output data/synthetic-ndc.json
+"""
+import argparse
+import json
+import os
+import random
+import uuid
+
+DOSAGE_FORMS = ["TABLET", "TABLET, FILM COATED", "CAPSULE", "INJECTION, SOLUTION", "SOLUTION",
+                "CREAM", "OINTMENT", "SUSPENSION", "TABLET, EXTENDED RELEASE", "POWDER, FOR SOLUTION"]
+ROUTES = {"TABLET": "ORAL", "CAPSULE": "ORAL", "SOLUTION": "ORAL", "SUSPENSION": "ORAL", "CREAM": "TOPICAL",
+          "OINTMENT": "TOPICAL", "INJECTION": "INTRAVENOUS", "POWDER": "INTRAMUSCULAR"}
+# (marketing category, application prefix, weight)
+CATEGORIES = [("ANDA", "ANDA", 45), ("NDA", "NDA", 12), ("OTC MONOGRAPH DRUG", "M", 20), ("BLA", "BLA", 4),
+              ("NDA AUTHORIZED GENERIC", "NDA", 3), ("UNAPPROVED DRUG OTHER", None, 6),
+              ("OTC MONOGRAPH NOT FINAL", "part", 10)]
+STRENGTHS = ["1 mg/1", "2.5 mg/1", "5 mg/1", "10 mg/1", "20 mg/1", "25 mg/1", "40 mg/1", "50 mg/1",
+             "100 mg/1", "200 mg/1", "250 mg/5mL", "500 mg/1", "1 g/10mL", "0.1 mg/mL", "10 mg/g"]
+PACKAGES = ["BOTTLE", "BLISTER PACK", "CARTON", "VIAL, SINGLE-DOSE", "TUBE", "BOX"]
+LABEL_SECTIONS = ["indications_and_usage", "dosage_and_administration", "dosage_forms_and_strengths",
+                  "contraindications", "warnings_and_cautions", "adverse_reactions", "drug_interactions",
+                  "use_in_specific_populations", "overdosage", "description", "clinical_pharmacology",
+                  "mechanism_of_action", "pharmacokinetics", "clinical_studies", "how_supplied",
+                  "storage_and_handling", "information_for_patients"]
+TABLE_SECTIONS = ["adverse_reactions_table", "clinical_studies_table", "pharmacokinetics_table"]
+WORDS = ("patients treatment dose daily tablets administered clinical studies adverse reactions reported "
+         "increased risk hepatic renal impairment plasma concentration half-life mg placebo trial weeks "
+         "observed incidence should be monitored therapy discontinue pediatric geriatric pregnancy "
+         "exposure metabolism CYP3A4 inhibitors concomitant use contraindicated hypersensitivity").split()
+
+def _zipf_choice(rng, items, skew=1.1):
+    """Pick an item with probability roughly proportional to 1/rank**skew."""
+    index = int(len(items) * rng.random() ** (skew * 2.5))
+    return items[min(index, len(items) - 1)]
+
+class CatalogGenerator:
+    """Deterministic generator of drug-ndc.json product records."""
+
+    def __init__(self, products, seed=42):
+        """
+        Initialize the generator.
+
+        Args:
+            products (int): Number of product records
+            seed (int): Random seed
+        """
+        self.products = products
+        self.seed = seed
+        rng = random.Random(seed)
+        self.ingredients = [f"{rng.choice(['AMLO', 'LOSA', 'METO', 'ATORVA', 'SERTRA', 'IBU', 'ACETA', 'CEPHA', 'PREDNI', 'OMEPRA'])}"
+                            f"{rng.choice(['DIPINE', 'RTAN', 'PROLOL', 'STATIN', 'LINE', 'PROFEN', 'MINOPHEN', 'LEXIN', 'SONE', 'ZOLE'])}"
+                            f" {rng.choice(['', 'HYDROCHLORIDE', 'SODIUM', 'CALCIUM', 'BESYLATE', 'TARTRATE'])}".strip()
+                            + f" {i}" for i in range(max(200, products // 250))]
+        labeler_count = max(50, products // 40)
+        codes = rng.sample(range(1000, 100000), labeler_count)
+        # (labeler code, name, product code width); 4-digit labelers use 4-digit product codes
+        self.labelers = [(f"{code:04d}" if code < 10000 else f"{code:05d}",
+                          f"{rng.choice(['Acme', 'Zenith', 'Nova', 'Apex', 'Cardinal', 'Aurora', 'Summit'])} "
+                          f"{rng.choice(['Pharmaceuticals', 'Health', 'Labs', 'Rx', 'Medical'])} {i} "
+                          f"{rng.choice(['Inc.', 'LLC', 'Corp.', 'Ltd.'])}",
+                          4 if code < 10000 else rng.choice([3, 4]))
+                         for i, code in enumerate(codes)]
+
+    def __iter__(self):
+        """Yield the product records in order."""
+        rng = random.Random(self.seed + 1)
+        issued = {}
+        set_id, set_remaining = None, 0
+        for i in range(self.products):
+            labeler = _zipf_choice(rng, self.labelers)
+            while issued.get(labeler[0], 0) >= 10 ** labeler[2]:
+                # Popular labeler ran out of product codes
+                labeler = rng.choice(self.labelers)
+            product_ndc = self._product_ndc(labeler, issued)
+            if set_remaining <= 0:
+                set_id = str(uuid.UUID(int=rng.getrandbits(128)))
+                set_remaining = rng.choice([1, 1, 2, 3, 4])
+            set_remaining -= 1
+            yield self._record(rng, i, product_ndc, labeler[1], set_id)
+
+    def _product_ndc(self, labeler, issued):
+        code, _, width = labeler
+        count = issued.get(code, 0)
+        issued[code] = count + 1
+        # A stride coprime with 10**width visits every product code once, in scattered order
+        return f"{code}-{count * 7919 % 10 ** width:0{width}d}"
+
+    def _record(self, rng, i, product_ndc, labeler_name, set_id):
+        ingredients = sorted({_zipf_choice(rng, self.ingredients) for _ in range(rng.choice([1, 1, 1, 2, 3]))})
+        active = [{"name": name, "strength": rng.choice(STRENGTHS)} for name in ingredients]
+        dosage_form = rng.choice(DOSAGE_FORMS)
+        category, prefix = rng.choices([(c, p) for c, p, _ in CATEGORIES], [w for _, _, w in CATEGORIES])[0]
+        application = f"{prefix}{rng.randint(10000, 219999):06d}" if prefix not in (None, "M", "part") else (
+            f"M{rng.randint(1, 20):03d}" if prefix == "M" else (f"part{rng.randint(300, 360)}" if prefix else None))
+        start_year = rng.randint(1985, 2024)
+        brand = ingredients[0].split()[0].title() if rng.random() < 0.6 else f"{labeler_name.split()[0]}-{i % 997}"
+        packaging = []
+        digits = 10 - len(product_ndc.replace('-', ''))
+        for package in range(rng.choice([1, 1, 2, 3])):
+            package_ndc = f"{product_ndc}-{package + 1:0{digits}d}"
+            count = rng.choice([10, 30, 60, 90, 100, 500, 1000])
+            packaging.append({
+                "package_ndc": package_ndc,
+                "description": f"{count} {dosage_form.split(',')[0]} in 1 {rng.choice(PACKAGES)} ({package_ndc})",
+                "marketing_start_date": f"{start_year}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+                "sample": False,
+            })
+        record = {
+            "product_ndc": product_ndc,
+            "generic_name": " and ".join(ingredients).upper(),
+            "labeler_name": labeler_name,
+            "brand_name": brand,
+            "active_ingredients": active,
+            "finished": True,
+            "packaging": packaging,
+            "listing_expiration_date": f"{rng.choice([2025, 2026, 2026, 2027])}1231",
+            "openfda": {
+                "manufacturer_name": [labeler_name],
+                "spl_set_id": [set_id],
+                "is_original_packager": [rng.random() < 0.85],
+                "rxcui": [str(rng.randint(100000, 2000000))],
+                "unii": [uuid.UUID(int=rng.getrandbits(128)).hex[:10].upper()],
+            },
+            "marketing_category": category,
+            "dosage_form": dosage_form,
+            "spl_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "product_type": "HUMAN OTC DRUG" if category.startswith("OTC") else "HUMAN PRESCRIPTION DRUG",
+            "route": [next((route for key, route in ROUTES.items() if dosage_form.startswith(key)), "ORAL")],
+            "marketing_start_date": f"{start_year}0101",
+            "product_id": f"{product_ndc}_{uuid.UUID(int=rng.getrandbits(128))}",
+            "brand_name_base": brand,
+        }
+        if application:
+            record["application_number"] = application
+        if rng.random() < 0.5:
+            record["pharm_class"] = [f"{ingredients[0].split()[0].title()} Class [EPC]"]
+        return record
+
+def write_catalog(path, products, seed=42, sample_size=1000):
+    """
+    Write a synthetic drug-ndc.json, streaming so large catalogs never sit in memory.
+
+    A sidecar <path>.ndcs.json receives a seeded sample of the product NDCs
+    for lookup benchmarks.
+
+    Args:
+        path (str): Output file
+        products (int): Number of product records
+        seed (int): Random seed
+        sample_size (int): Number of NDCs in the sidecar sample
+
+    Returns:
+        list: The sampled product NDCs
+    """
+    rng = random.Random(seed + 2)
+    sample = []
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write('{"meta":{"disclaimer":"Synthetic data for benchmarks","results":{"total":%d}},"results":[' % products)
+        for i, record in enumerate(CatalogGenerator(products, seed)):
+            if i:
+                f.write(',')
+            f.write(json.dumps(record, separators=(',', ':')))
+            # Reservoir sampling keeps the sample uniform over the whole catalog
+            if len(sample) < sample_size:
+                sample.append((record["product_ndc"], record["openfda"]["spl_set_id"][0]))
+            else:
+                j = rng.randint(0, i)
+                if j < sample_size:
+                    sample[j] = (record["product_ndc"], record["openfda"]["spl_set_id"][0])
+        f.write(']}')
+    os.replace(tmp_path, path)
+    with open(f"{path}.ndcs.json", 'w') as f:
+        json.dump(sample, f)
+    return sample
+
+def generate_label(set_id, seed=42, size_kb=40, product_ndcs=None):
+    """
+    Generate a drug label document for an SPL set_id.
+
+    Args:
+        set_id (str): SPL set_id
+        seed (int): Random seed; combined with the set_id so each label differs
+        size_kb (int): Approximate size of the label text in kilobytes
+        product_ndcs (list, optional): Product NDCs listed under openfda
+
+    Returns:
+        dict: Label shaped like an openFDA label.json result
+    """
+    rng = random.Random(f"{seed}:{set_id}")
+    budget = size_kb * 1024
+    per_section = budget // (len(LABEL_SECTIONS) + len(TABLE_SECTIONS))
+    label = {"set_id": set_id, "id": str(uuid.UUID(int=rng.getrandbits(128))),
+             "version": str(rng.randint(1, 30)), "effective_time": f"{rng.randint(2015, 2025)}{rng.randint(1, 12):02d}01"}
+    for number, section in enumerate(LABEL_SECTIONS, 1):
+        label[section] = [f"{number} {section.replace('_', ' ').upper()} " + _prose(rng, per_section)]
+    for section in TABLE_SECTIONS:
+        label[section] = [_table(rng, per_section)]
+    label["openfda"] = {"spl_set_id": [set_id], "product_ndc": list(product_ndcs or [])}
+    return label
+
+def _prose(rng, chars):
+    sentences, length = [], 0
+    while length < chars:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 30))]
+        sentence = " ".join(words).capitalize() + "."
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+def _table(rng, chars):
+    rows, length = [], 0
+    while length < chars:
+        row = "<tr>" + "".join(f"<td>{rng.choice(WORDS)} {rng.randint(0, 99)}%</td>" for _ in range(4)) + "</tr>"
+        rows.append(row)
+        length += len(row)
+    return "<table><tbody>" + "".join(rows) + "</tbody></table>"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', required=True, help="drug-ndc.json path to write")
+    args = parser.parse_args()
+    write_catalog(args.output, args.products, args.seed)
+    print(f"Wrote {args.products} products to {args.output}")
+
+if __name__ == "__main__":
+    main()
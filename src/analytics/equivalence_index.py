@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import re
+from models.drug_table import DrugTable
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Fields stored per product in the index, in order
+ENTRY_FIELDS = ("product_ndc", "brand_name", "labeler_name", "dosage_form", "marketing_category")
+
+def ingredient_signature(active_ingredients):
+    """
+    Normalize a product's active ingredients into an order-independent signature.
+
+    Names are upper-cased and strengths lower-cased with whitespace removed, so
+    "Docusate Sodium 100 mg/1" and "DOCUSATE SODIUM 100mg/1" match.
+
+    Args:
+        active_ingredients (list): Pairs of (name, strength), or dicts with name/strength keys
+
+    Returns:
+        str: Signature, empty when there are no active ingredients
+    """
+    parts = set()
+    for ingredient in active_ingredients:
+        if isinstance(ingredient, dict):
+            name, strength = ingredient.get('name', ''), ingredient.get('strength', '')
+        else:
+            name, strength = ingredient
+        name = _WHITESPACE_RE.sub(' ', name or '').strip().upper()
+        strength = _WHITESPACE_RE.sub('', strength or '').lower()
+        parts.add(f"{name}|{strength}")
+    return ";".join(sorted(parts))
+
+class EquivalenceIndex:
+    """Precomputed index from (ingredient, strength) signature to the products sharing it."""
+
+    def __init__(self, entries_by_signature=None, source_fingerprint=None):
+        """
+        Initialize the index.
+
+        Args:
+            entries_by_signature (dict, optional): Signature -> list of product entries (see ENTRY_FIELDS)
+            source_fingerprint (list, optional): Size and mtime of the NDC file the index was built from
+        """
+        self.entries_by_signature = entries_by_signature or {}
+        self.source_fingerprint = source_fingerprint
+        self.logger = logging.getLogger('drugdeck.equivalence_index')
+
+    @classmethod
+    def build(cls, table, source_fingerprint=None):
+        """
+        Build the index from a columnar catalog.
+
+        Args:
+            table (DrugTable): Columnar NDC catalog
+            source_fingerprint (list, optional): Fingerprint of the source file
+
+        Returns:
+            EquivalenceIndex: Populated index
+        """
+        entries = {}
+        names, strengths, offsets = table.ingredient_name, table.ingredient_strength, table.ingredient_offsets
+        for row in range(len(table)):
+            signature = ingredient_signature((names[i], strengths[i]) for i in range(offsets[row], offsets[row + 1]))
+            if not signature:
+                continue
+            entries.setdefault(signature, []).append([
+                table.product_ndc[row],
+                table.brand_name[row],
+                table.labeler_name[row],
+                table.dosage_form[row],
+                table.marketing_category[row],
+            ])
+        return cls(entries, source_fingerprint)
+
+    @classmethod
+    def for_data_file(cls, data_path, index_path=None, load_table=None):
+        """
+        Load the index built alongside an NDC data file, rebuilding it if the data changed.
+
+        Args:
+            data_path (str): Path to drug-ndc.json
+            index_path (str, optional): Index file; defaults to <data file>.equivalents.json
+            load_table (callable, optional): Returns the DrugTable of the data file, e.g. one
+                already loaded by the caller; only called when the index has to be rebuilt.
+                Defaults to reading the data file.
+
+        Returns:
+            EquivalenceIndex: Index matching the current data file
+        """
+        index_path = index_path or f"{os.path.splitext(data_path)[0]}.equivalents.json"
+        fingerprint = _file_fingerprint(data_path)
+        logger = logging.getLogger('drugdeck.equivalence_index')
+
+        if os.path.exists(index_path):
+            try:
+                index = cls.load(index_path)
+                if index.source_fingerprint == fingerprint:
+                    logger.info("Equivalence index loaded: %s", index_path)
+                    return index
+                logger.info("NDC data changed since the equivalence index was built")
+            except Exception as e:
+                logger.warning("Could not load equivalence index %s: %s", index_path, e)
+
+        logger.info("Building equivalence index from %s", data_path)
+        table = load_table() if load_table is not None else DrugTable.load(data_path)
+        index = cls.build(table, fingerprint)
+        index.save(index_path)
+        return index
+
+    @classmethod
+    def load(cls, index_path):
+        """Load an index saved with save()."""
+        with open(index_path, 'r') as f:
+            data = json.load(f)
+        return cls(data['signatures'], data.get('source_fingerprint'))
+
+    def save(self, index_path):
+        """
+        Save the index next to the data it was built from.
+
+        Args:
+            index_path (str): Output file path
+        """
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"source_fingerprint": self.source_fingerprint, "signatures": self.entries_by_signature},
+                      f, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+        self.logger.info("Equivalence index saved: %s (%d signatures)", index_path, len(self.entries_by_signature))
+
+    def equivalents(self, drug_info, limit=None):
+        """
+        Get the other products with the same active ingredients and strengths.
+
+        Args:
+            drug_info (dict): NDC product dictionary
+            limit (int, optional): Maximum number of products to return
+
+        Returns:
+            dict: {"total": count, "products": [product dicts]}
+        """
+        signature = ingredient_signature(drug_info.get('active_ingredients', []))
+        ndc_code = drug_info.get('product_ndc')
+        entries = [entry for entry in self.entries_by_signature.get(signature, []) if entry[0] != ndc_code]
+        products = entries[:limit] if limit else entries
+        return {
+            "total": len(entries),
+            "products": [dict(zip(ENTRY_FIELDS, entry)) for entry in products],
+        }
+
+def _file_fingerprint(path):
+    stat = os.stat(path)
+    return [stat.st_size, int(stat.st_mtime)]
@@ -0,0 +1,166 @@
+import datetime
+import logging
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate, chain, repeat
+from operator import add, floordiv, mod, mul
+from models.drug_model import application_type
+from models.drug_table import StringColumn
+
+APPLICATION_TYPES = ("NDA", "ANDA", "BLA", "Other", "Unknown")
+
+# Dates are proleptic Gregorian ordinals; (group, ordinal) pairs are packed into one sortable int
+_ORDINAL_SPAN = datetime.date.max.toordinal() + 1
+
+def group_count(codes, groups):
+    """
+    Group-by count over an integer code column (a bincount).
+
+    Args:
+        codes (iterable): Group code per row
+        groups (int): Number of groups
+
+    Returns:
+        array: Row count indexed by group code
+    """
+    counts = array('I', bytes(4 * groups))
+    for code, count in Counter(codes).items():
+        counts[code] = count
+    return counts
+
+def pair_codes(codes, other_codes, others):
+    """Combine two code columns into one code per row (code * others + other code)."""
+    return map(add, map(mul, codes, repeat(others)), other_codes)
+
+class MarketAnalytics:
+    """Catalog-level market aggregations precomputed over a DrugTable."""
+
+    def __init__(self, table):
+        """
+        Precompute the group-bys used by the market analytics section.
+
+        Every aggregation is a group-by over the table's integer code columns
+        into an array indexed by group code, so answering a per-report query
+        is a handful of array lookups. Expiration dates are kept CSR-style,
+        sorted within each ingredient set, for bisecting.
+
+        Args:
+            table (DrugTable): Columnar NDC catalog
+        """
+        self.logger = logging.getLogger('drugdeck.market_analytics')
+        self.table = table
+
+        # Ingredient set per row: sorted tuple of ingredient name codes
+        self.ingredient_set = StringColumn()
+        names = table.ingredient_name.codes
+        offsets = table.ingredient_offsets
+        for start, end in zip(offsets, offsets[1:]):
+            self.ingredient_set.append((names[start],) if end - start == 1 else tuple(sorted(set(names[start:end]))))
+        set_codes = self.ingredient_set.codes
+        sets = len(self.ingredient_set.values)
+        labelers = len(table.labeler_name.values)
+
+        # Application type is derived once per distinct application number, then mapped over the codes
+        type_of_value = [APPLICATION_TYPES.index(application_type(value)) for value in table.application_number.values]
+        self.application_type_codes = array('B', [type_of_value[code] for code in table.application_number.codes])
+        types = len(APPLICATION_TYPES)
+
+        package_counts = [end - start for start, end in zip(table.package_offsets, table.package_offsets[1:])]
+
+        self.products_by_ingredient_set = group_count(set_codes, sets)
+        # Distinct labelers: count each (group, labeler) pair once
+        generic_labelers = set(pair_codes(table.generic_name.codes, table.labeler_name.codes, labelers))
+        self.labelers_by_generic = group_count(map(floordiv, generic_labelers, repeat(labelers)),
+                                               len(table.generic_name.values))
+        set_labelers = set(pair_codes(set_codes, table.labeler_name.codes, labelers))
+        self.labelers_by_ingredient_set = group_count(map(floordiv, set_labelers, repeat(labelers)), sets)
+        # Row-major (ingredient set, application type) counts
+        self.application_types_by_ingredient_set = group_count(
+            pair_codes(set_codes, self.application_type_codes, types), sets * types)
+        self.application_type_totals = group_count(self.application_type_codes, types)
+        # One set code per package row
+        self.packages_by_ingredient_set = group_count(chain.from_iterable(map(repeat, set_codes, package_counts)), sets)
+
+        # Ingredient set i owns expirations_by_ingredient_set[expiration_offsets[i]:expiration_offsets[i + 1]],
+        # sorted; missing dates (0) sort first and never fall inside a window
+        dated = sorted(pair_codes(set_codes, table.listing_expiration_date, _ORDINAL_SPAN))
+        self.expirations_by_ingredient_set = array('i', map(mod, dated, repeat(_ORDINAL_SPAN)))
+        self.expiration_offsets = array('I', [0])
+        self.expiration_offsets.extend(accumulate(self.products_by_ingredient_set))
+        self.expirations = array('i', sorted(table.listing_expiration_date))
+        self.catalog_application_type_share = self.application_type_share()
+
+        self.logger.info("Market analytics precomputed for %d products (%d ingredient sets)", len(table), sets)
+
+    def expiring_within(self, days, ingredient_set=None, today=None):
+        """
+        Count listings whose expiration date falls in the next `days` days.
+
+        Args:
+            days (int): Size of the window in days
+            ingredient_set (int, optional): Restrict to one ingredient set code
+            today (datetime.date, optional): Start of the window; defaults to today
+
+        Returns:
+            int: Number of listings expiring within the window
+        """
+        start = (today or datetime.date.today()).toordinal()
+        if ingredient_set is None:
+            ordinals, lo, hi = self.expirations, 0, len(self.expirations)
+        else:
+            ordinals = self.expirations_by_ingredient_set
+            lo, hi = self.expiration_offsets[ingredient_set], self.expiration_offsets[ingredient_set + 1]
+        return bisect_right(ordinals, start + days, lo, hi) - bisect_right(ordinals, start, lo, hi)
+
+    def application_type_share(self, ingredient_set=None):
+        """
+        Share of products per application type (NDA, ANDA, BLA, ...).
+
+        Args:
+            ingredient_set (int, optional): Restrict to one ingredient set code
+
+        Returns:
+            dict: Application type -> fraction of products, rounded to 4 places
+        """
+        if ingredient_set is None:
+            totals = self.application_type_totals
+        else:
+            start = ingredient_set * len(APPLICATION_TYPES)
+            totals = self.application_types_by_ingredient_set[start:start + len(APPLICATION_TYPES)]
+        counts = dict(zip(APPLICATION_TYPES, totals))
+        total = sum(counts.values())
+        return {key: round(count / total, 4) for key, count in counts.items() if count} if total else {}
+
+    def market_section(self, ndc_code, expiring_days=90, today=None):
+        """
+        Build the market analytics report section for a product.
+
+        Args:
+            ndc_code (str): Product NDC code
+            expiring_days (int): Window for the expiring listings counts
+            today (datetime.date, optional): Start of the expiration window
+
+        Returns:
+            dict: Market analytics section, or None if the NDC is not in the catalog
+        """
+        row = self.table.index_of(ndc_code)
+        if row is None:
+            self.logger.warning("NDC %s not in catalog, skipping market analytics", ndc_code)
+            return None
+
+        ingredients = self.ingredient_set.codes[row]
+        generic = self.table.generic_name.codes[row]
+        return {
+            "competing_products": self.products_by_ingredient_set[ingredients] - 1,
+            "labelers_with_same_ingredients": self.labelers_by_ingredient_set[ingredients],
+            "labelers_for_generic": self.labelers_by_generic[generic],
+            "application_type_share": self.application_type_share(ingredients),
+            "catalog_application_type_share": self.catalog_application_type_share,
+            "packages_with_same_ingredients": self.packages_by_ingredient_set[ingredients],
+            "expiring_listings": {
+                "days": expiring_days,
+                "same_ingredients": self.expiring_within(expiring_days, ingredients, today),
+                "catalog": self.expiring_within(expiring_days, today=today),
+            },
+        }
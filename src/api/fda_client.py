@@ -1,16 +1,28 @@
 import json
-import requests
 import logging
-import time
 from urllib.parse import quote
+from api.label_normalizer import extract_company_contact
+from models.drug_table import DrugTable
+from utils.tracing import span
+
+DEFAULT_BASE_URL = "https://api.fda.gov/drug"
 
 class FDAClient:
     """Client for fetching drug information from FDA data sources."""
     
-    def __init__(self, local_data_path):
-        """Initialize the FDA client with the path to local drug-ndc.json file."""
+    def __init__(self, local_data_path, base_url=None):
+        """
+        Initialize the FDA client with the path to local drug-ndc.json file.
+        
+        Args:
+            local_data_path (str): Path to drug-ndc.json
+            base_url (str, optional): openFDA drug API root; defaults to the public API
+        """
         self.local_data_path = local_data_path
-        self.base_url = "https://api.fda.gov/drug"
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self._results = None
+        self._products = None
+        self._drug_table = None
         self.logger = logging.getLogger('drugdeck.fda_client')
         self.logger.info("FDA client initialized")
     
@@ -24,27 +36,56 @@ class FDAClient:
         Returns:
             dict: Drug information or None if not found
         """
-        self.logger.info(f"Searching for drug with NDC: {ndc_code} in local data")
+        self.logger.info("Searching for drug with NDC: %s in local data", ndc_code)
         try:
-            start_time = time.time()
-            with open(self.local_data_path, 'r') as file:
-                self.logger.info(f"Local data file opened: {self.local_data_path}")
-                data = json.load(file)
-                self.logger.info(f"Local data loaded in {time.time() - start_time:.2f} seconds")
-                
-            # Search for the drug with the matching NDC in the local data
-            for drug in data['results']:
-                if drug['product_ndc'] == ndc_code:
-                    self.logger.info(f"Drug found with NDC: {ndc_code}")
-                    self.logger.debug(f"Found drug details: {drug['brand_name']} ({drug['generic_name']})")
-                    return drug
+            products = self._load_products()
+            drug = products.get(ndc_code)
+            if drug:
+                self.logger.info("Drug found with NDC: %s", ndc_code)
+                self.logger.debug("Found drug details: %s (%s)", drug['brand_name'], drug['generic_name'])
+                return drug
             
-            self.logger.warning(f"No drug found with NDC: {ndc_code} in local data")
+            self.logger.warning("No drug found with NDC: %s in local data", ndc_code)
             return None
         except Exception as e:
-            self.logger.error(f"Error loading drug data: {e}")
+            self.logger.error("Error loading drug data: %s", e)
             return None
     
+    def _load_products(self):
+        """Load the local data once and index it by product NDC."""
+        if self._products is None:
+            with span("load.ndc_data") as load_span:
+                with open(self.local_data_path, 'r') as file:
+                    self.logger.info("Local data file opened: %s", self.local_data_path)
+                    data = json.load(file)
+                # First record wins, matching the previous linear search
+                products = {}
+                for drug in data['results']:
+                    products.setdefault(drug['product_ndc'], drug)
+            # The records stay referenced (by the index too) so get_drug_table() need not re-read the file
+            self._results = data['results']
+            self._products = products
+            self.logger.info("Local data loaded in %.2f seconds", load_span['duration'])
+        return self._products
+
+    def get_drug_table(self):
+        """
+        Get the local NDC data as a columnar table, built once from the records loaded for lookups.
+
+        Returns:
+            DrugTable: Every product record of the local data, duplicates included
+        """
+        if self._drug_table is None:
+            self._load_products()
+            self._drug_table = DrugTable.from_results(self._results)
+        return self._drug_table
+
+    def _get(self, url):
+        """Issue a GET request to the openFDA API."""
+        # requests is only loaded once a run actually talks to openFDA
+        import requests
+        return requests.get(url)
+
     def get_drug_label(self, ndc_code):
         """
         Fetch drug label information from FDA API.
@@ -55,29 +96,54 @@ class FDAClient:
         Returns:
             dict: Drug label information
         """
-        self.logger.info(f"Fetching drug label for NDC: {ndc_code} from FDA API")
+        return self._search_label('openfda.product_ndc', ndc_code)
+    
+    def get_drug_label_by_set_id(self, set_id):
+        """
+        Fetch the current version of a drug label by its SPL set_id.
+        
+        Args:
+            set_id (str): SPL set_id of the label
+            
+        Returns:
+            dict: Drug label information
+        """
+        return self._search_label('set_id', set_id)
+    
+    def _search_label(self, field, value):
+        """
+        Fetch the first label whose field matches value from the FDA API.
+        
+        Args:
+            field (str): openFDA label search field, e.g. set_id
+            value (str): Value to search for
+            
+        Returns:
+            dict: Drug label information or None if none was found or the request failed
+        """
+        self.logger.info("Fetching drug label for %s: %s from FDA API", field, value)
         try:
-            url = f"{self.base_url}/label.json?search=openfda.product_ndc:{quote(ndc_code)}&limit=1"
-            self.logger.debug(f"FDA API request: {url}")
+            url = f"{self.base_url}/label.json?search={field}:{quote(value)}&limit=1"
+            self.logger.debug("FDA API request: %s", url)
             
-            start_time = time.time()
-            response = requests.get(url)
-            request_time = time.time() - start_time
-            self.logger.info(f"FDA API response received in {request_time:.2f} seconds (status: {response.status_code})")
+            with span("http.openfda.label") as request_span:
+                response = self._get(url)
+                request_span["attributes"]["status"] = response.status_code
+            self.logger.info("FDA API response received in %.2f seconds (status: %s)", request_span['duration'], response.status_code)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get('results') and len(data['results']) > 0:
-                    self.logger.info(f"Drug label found for NDC: {ndc_code}")
+                    self.logger.info("Drug label found for %s: %s", field, value)
                     return data['results'][0]
                 else:
-                    self.logger.warning(f"No label results found for NDC: {ndc_code}")
+                    self.logger.warning("No label results found for %s: %s", field, value)
             else:
-                self.logger.error(f"FDA API error: {response.status_code} - {response.text}")
+                self.logger.error("FDA API error: %s - %s", response.status_code, response.text)
             
             return None
         except Exception as e:
-            self.logger.error(f"Error fetching drug label: {e}")
+            self.logger.error("Error fetching drug label: %s", e)
             return None
     
     def get_drug_approval_info(self, ndc_code):
@@ -90,70 +156,47 @@ class FDAClient:
         Returns:
             dict: Drug approval information
         """
-        self.logger.info(f"Fetching drug approval info for NDC: {ndc_code} from FDA API")
+        self.logger.info("Fetching drug approval info for NDC: %s from FDA API", ndc_code)
         try:
             url = f"{self.base_url}/drugsfda.json?search=openfda.product_ndc:{quote(ndc_code)}&limit=1"
-            self.logger.debug(f"FDA API request: {url}")
+            self.logger.debug("FDA API request: %s", url)
             
-            start_time = time.time()
-            response = requests.get(url)
-            request_time = time.time() - start_time
-            self.logger.info(f"FDA API response received in {request_time:.2f} seconds (status: {response.status_code})")
+            with span("http.openfda.drugsfda") as request_span:
+                response = self._get(url)
+                request_span["attributes"]["status"] = response.status_code
+            self.logger.info("FDA API response received in %.2f seconds (status: %s)", request_span['duration'], response.status_code)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get('results') and len(data['results']) > 0:
-                    self.logger.info(f"Drug approval info found for NDC: {ndc_code}")
+                    self.logger.info("Drug approval info found for NDC: %s", ndc_code)
                     return data['results'][0]
                 else:
-                    self.logger.warning(f"No approval info found for NDC: {ndc_code}")
+                    self.logger.warning("No approval info found for NDC: %s", ndc_code)
             else:
-                self.logger.error(f"FDA API error: {response.status_code} - {response.text}")
+                self.logger.error("FDA API error: %s - %s", response.status_code, response.text)
             
             return None
         except Exception as e:
-            self.logger.error(f"Error fetching drug approval info: {e}")
+            self.logger.error("Error fetching drug approval info: %s", e)
             return None
     
-    def extract_clinical_trials(self, approval_info):
-        """
-        Extract clinical trial NCT IDs from approval information.
-        
-        Args:
-            approval_info (dict): Drug approval information
-            
-        Returns:
-            list: List of NCT IDs
-        """
-        self.logger.info("Attempting to extract clinical trial information")
-        # This is a placeholder - in a real implementation, 
-        # you would need to parse the medical review document
-        # This is complex and might require additional APIs or web scraping
-        return []
-    
     def get_company_name(self, drug_info, label_info):
         """
         Extract the actual company name from FDA label.
         
         Args:
             drug_info (dict): Basic drug information
-            label_info (dict): Drug label information
+            label_info (dict): Drug label information, or its prepared form (see label_normalizer)
             
         Returns:
             str: Company name
         """
-        self.logger.info("Extracting company name from drug information")
         company_name = drug_info.get('openfda', {}).get('manufacturer_name', [None])[0]
-        self.logger.debug(f"Initial company name from drug info: {company_name}")
-        
-        # Try to extract a more accurate company name from the label
-        if label_info and 'adverse_reactions' in label_info:
-            self.logger.debug("Attempting to extract company name from adverse reactions text")
-            adverse_text = label_info['adverse_reactions'][0]
-            if 'SUSPECTED ADVERSE REACTIONS, contact ' in adverse_text:
-                parts = adverse_text.split('SUSPECTED ADVERSE REACTIONS, contact ')[1].split(' at ')[0]
-                if parts:
-                    company_name = parts.strip()
-                    self.logger.info(f"Company name extracted from label: {company_name}")
-        
-        return company_name
\ No newline at end of file
+        if label_info:
+            # The adverse reactions contact is extracted once when the label is normalized
+            contact = label_info['company_contact'] if 'company_contact' in label_info else extract_company_contact(label_info)
+            if contact:
+                company_name = contact
+                self.logger.debug("Company name from label: %s", company_name)
+        return company_name
@@ -1,46 +1,78 @@
-import google.generativeai as genai
+import hashlib
 import json
+from utils.tracing import span
+
+MODEL_NAME = 'gemini-1.5-pro'
+# Bump when the prompts change so cached insights are regenerated
+PROMPT_VERSION = 1
+# Drug fields the prompts are built from
+PROMPT_FIELDS = ('brand_name', 'generic_name', 'active_ingredients', 'dosage_form', 'route', 'labeler_name')
+
+def insights_cache_key(drug_info, model_name=MODEL_NAME):
+    """
+    Build the cache key identifying the AI insights for a drug.
+    
+    The key covers the model, the prompt version and exactly the drug fields
+    the prompts use, so it only changes when regenerated insights could differ.
+    
+    Args:
+        drug_info (dict): Drug information
+        model_name (str): Model (or provider) producing the insights
+        
+    Returns:
+        str: Cache key
+    """
+    inputs = {field: drug_info.get(field) for field in PROMPT_FIELDS}
+    encoded = json.dumps([model_name, PROMPT_VERSION, inputs], sort_keys=True, separators=(',', ':'))
+    return f"{model_name}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
 
 class GeminiClient:
     """Client for interacting with Google's Gemini API for AI-generated insights."""
     
-    def __init__(self, api_key):
-        """Initialize the Gemini client with API key."""
+    def __init__(self, api_key, api_endpoint=None):
+        """
+        Initialize the Gemini client with API key.
+        
+        Args:
+            api_key (str): Google API key
+            api_endpoint (str, optional): Alternative API host (e.g. a local stand-in for load tests),
+                reached over the REST transport
+        """
+        # Imported here: the SDK and its gRPC/protobuf stack take about a second to load,
+        # which placeholder-insight and lookup-only runs should not pay
+        import google.generativeai as genai
+
         self.api_key = api_key
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
+        if api_endpoint:
+            genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': api_endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(MODEL_NAME)
     
-    def get_ai_insights(self, drug_info):
+    def get_ai_insights(self, drug_info, run=None):
         """
         Generate AI insights about the drug using Gemini.
         
         Args:
             drug_info (dict): Drug information
+            run (callable, optional): Called as run(generate, drug_info) for each section, e.g. to
+                schedule the requests on a worker pool; defaults to calling generate directly
             
         Returns:
             dict: AI-generated insights
         """
-        insights = {}
-        
-        # Basic drug summary
-        drug_summary = self._generate_drug_summary(drug_info)
-        insights['drug_summary'] = drug_summary
-        
-        # Mechanism of action
-        moa = self._generate_mechanism_of_action(drug_info)
-        insights['mechanism_of_action'] = moa
+        sections = [
+            ('drug_summary', self._generate_drug_summary),
+            ('mechanism_of_action', self._generate_mechanism_of_action),
+            ('side_effects', self._generate_side_effects_analysis),
+            ('market_trends', self._generate_market_trends),
+            ('patient_journey', self._generate_patient_journey),
+        ]
         
-        # Side effects analysis
-        side_effects = self._generate_side_effects_analysis(drug_info)
-        insights['side_effects'] = side_effects
-        
-        # Market trends
-        market_trends = self._generate_market_trends(drug_info)
-        insights['market_trends'] = market_trends
-        
-        # Patient journey summary
-        patient_journey = self._generate_patient_journey(drug_info)
-        insights['patient_journey'] = patient_journey
+        insights = {}
+        for section, generate in sections:
+            with span(f"gemini.{section}"):
+                insights[section] = run(generate, drug_info) if run else generate(drug_info)
         
         return insights
     
@@ -0,0 +1,144 @@
+"""
+Ingest-time normalization of FDA labels into render-ready data.
+
+A label is normalized once per version, when the label store fetches or
+loads it, instead of on every compile and render:
+
+    clinical          first entry of each clinical label field, keyed by the
+                      report's clinical_information names
+    company_contact   company named in the "SUSPECTED ADVERSE REACTIONS,
+                      contact ..." sentence of adverse_reactions
+    sections          one entry per rendered label field with its heading and
+                      its text stripped of markup, chunked into paragraphs of
+                      at most MAX_PARAGRAPH_CHARS and escaped for reportlab
+
+Bump NORMALIZER_VERSION when the output changes, so cached prepared labels
+are normalized again.
+"""
+from utils.helpers import chunk_text, escape_markup, strip_markup
+
+NORMALIZER_VERSION = 1
+
+# Upper bound on the text held by a single Paragraph flowable
+MAX_PARAGRAPH_CHARS = 1500
+
+# Report clinical_information name -> label field
+CLINICAL_SECTIONS = {
+    "indications": "indications_and_usage",
+    "contraindications": "contraindications",
+    "warnings": "warnings",
+    "adverse_reactions": "adverse_reactions",
+    "drug_interactions": "drug_interactions",
+}
+
+# Label fields that are identifiers or covered elsewhere in the report
+SKIP_FIELDS = ("openfda", "spl_product_data_elements", "spl_id", "id", "set_id")
+
+_CONTACT_PREFIX = 'SUSPECTED ADVERSE REACTIONS, contact '
+
+def normalize_label(label):
+    """
+    Prepare a label for compiling and rendering.
+
+    Args:
+        label (dict): Drug label as returned by openFDA
+
+    Returns:
+        dict: Prepared label (normalizer, set_id, version, clinical, company_contact, sections)
+    """
+    return {
+        "normalizer": NORMALIZER_VERSION,
+        "set_id": label.get("set_id"),
+        "version": label.get("version"),
+        "clinical": {name: first_entry(label.get(field)) for name, field in CLINICAL_SECTIONS.items()},
+        "company_contact": extract_company_contact(label),
+        "sections": label_sections(label),
+    }
+
+def is_current(prepared, label):
+    """
+    Check whether a prepared label was built from this label version by this normalizer.
+
+    Args:
+        prepared (dict): Prepared label, possibly loaded from a cache
+        label (dict): Drug label
+
+    Returns:
+        bool: True if the prepared label can be used as is
+    """
+    return (prepared is not None and prepared.get("normalizer") == NORMALIZER_VERSION
+            and prepared.get("version") == label.get("version"))
+
+def first_entry(value):
+    """
+    Get the text of a label field (its first entry for list fields).
+
+    Args:
+        value: Label field value
+
+    Returns:
+        str: Text, or None if the field is empty
+    """
+    if not value:
+        return None
+    if isinstance(value, list):
+        return str(value[0])
+    return str(value)
+
+def extract_company_contact(label):
+    """
+    Extract the company to contact about suspected adverse reactions.
+
+    Args:
+        label (dict): Drug label
+
+    Returns:
+        str: Company name, or None if the label does not name one
+    """
+    text = first_entry(label.get("adverse_reactions"))
+    if not text or _CONTACT_PREFIX not in text:
+        return None
+    company = text.split(_CONTACT_PREFIX, 1)[1].split(' at ')[0].strip()
+    return company or None
+
+def label_sections(label):
+    """
+    Build the render-ready label sections.
+
+    Args:
+        label (dict): Drug label
+
+    Returns:
+        list: {"field", "heading", "paragraphs", "lead"} per non-empty field, in label order;
+            "lead" is the number of paragraphs that come from the field's first entry
+    """
+    sections = []
+    for field, value in label.items():
+        if field in SKIP_FIELDS or not value:
+            continue
+        entries = value if isinstance(value, list) else [value]
+        paragraphs = []
+        lead = None
+        for entry in entries:
+            paragraphs.extend(text_paragraphs(entry))
+            if lead is None:
+                lead = len(paragraphs)
+        sections.append({"field": field, "heading": field.replace("_", " ").title(),
+                         "paragraphs": paragraphs, "lead": lead})
+    return sections
+
+def text_paragraphs(text):
+    """
+    Turn free text into escaped paragraphs of bounded size.
+
+    Keeping every Paragraph short makes reportlab's wrap/split cost per
+    flowable constant, so layout time grows linearly with the text length.
+
+    Args:
+        text: Text (or value convertible to text), possibly containing markup
+
+    Returns:
+        list: Paragraph texts, safe to pass to reportlab as markup
+    """
+    plain = strip_markup(str(text))
+    return [escape_markup(chunk) for chunk in chunk_text(plain, MAX_PARAGRAPH_CHARS)]
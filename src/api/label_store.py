@@ -0,0 +1,217 @@
+import logging
+import threading
+from api.label_normalizer import is_current, normalize_label
+from utils.tracing import get_tracer, span
+
+def _version_key(label):
+    """Order label versions by SPL version number, then effective time."""
+    version = str(label.get('version') or '')
+    return (int(version) if version.isdigit() else -1, str(label.get('effective_time') or ''))
+
+def _is_newer(label, existing):
+    return _version_key(label) > _version_key(existing)
+
+class LabelStore:
+    """
+    Deduplicating label layer shared by every NDC that maps to the same SPL set_id.
+
+    Many product NDCs (repackagers, package variants) point at the same label.
+    The store resolves each NDC to its set_id once, preferably from the local
+    NDC record's openfda.spl_set_id so no request is needed, and keeps a
+    single copy of each label per set_id, in memory and in the optional disk
+    cache. Each label version is normalized once as it enters the store (see
+    label_normalizer), and the prepared form is cached next to the label.
+    """
+
+    def __init__(self, fda_client, cache=None):
+        """
+        Initialize the label store.
+
+        Args:
+            fda_client (FDAClient): Client used to fetch labels from openFDA
+            cache (DiskCache, optional): Persistent cache for labels and NDC -> set_id mappings
+        """
+        self.fda_client = fda_client
+        self.cache = cache
+        self.logger = logging.getLogger('drugdeck.label_store')
+        self._set_ids = {}
+        self._labels = {}
+        self._prepared = {}
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        # set_ids whose label this store fetched from openFDA (rather than loaded from the disk cache)
+        self._fetched = set()
+        self.stats = {"hits": 0, "misses": 0, "fetches": 0}
+
+    def get_label(self, ndc_code, drug_info=None, refresh=False, offline=False):
+        """
+        Get the label for a product NDC.
+
+        Args:
+            ndc_code (str): Product NDC code
+            drug_info (dict, optional): Local NDC record, used to resolve the set_id without a request
+            refresh (bool): Revalidate against openFDA: ignore copies loaded from the disk cache and
+                fetch each label once per process
+            offline (bool): Only return labels already in memory or in the disk cache; never
+                fetch and never write the cache
+
+        Returns:
+            dict: Drug label information (shared between NDCs with the same set_id) or None
+        """
+        set_id = self.resolve_set_id(ndc_code, drug_info, allow_expired=offline)
+        if offline:
+            return self._cached_label(set_id) if set_id else None
+        if set_id:
+            label = self._get_by_set_id(set_id, refresh)
+            if label is not None:
+                return label
+            # The product may have moved to another SPL since its set_id was recorded
+            self.logger.info("No label for set_id %s; searching by NDC %s", set_id, ndc_code)
+
+        # Unknown or stale set_id: search by NDC, then remember the mapping for next time
+        self._count("fetches")
+        label = self.fda_client.get_drug_label(ndc_code)
+        if not label:
+            return None
+        set_id = label.get('set_id')
+        if not set_id:
+            return label
+        self._remember_set_id(ndc_code, set_id, persist=True)
+        with self._lock:
+            self._fetched.add(set_id)
+        return self._store(set_id, label)
+
+    def prepared(self, label):
+        """
+        Get the normalized, render-ready form of a label, e.g. one returned by get_label or
+        embedded in a saved report.
+
+        Args:
+            label (dict): Drug label
+
+        Returns:
+            dict: Prepared label (see label_normalizer.normalize_label)
+        """
+        set_id = label.get('set_id')
+        with self._lock:
+            prepared = self._prepared.get(set_id) if set_id else None
+        if is_current(prepared, label):
+            return prepared
+        # Not held in memory (another version, no set_id, or a label from a saved report)
+        return self._prepare(set_id, label, load=True, persist=False)
+
+    def resolve_set_id(self, ndc_code, drug_info=None, allow_expired=False):
+        """
+        Resolve a product NDC to its SPL set_id without fetching the label.
+
+        Args:
+            ndc_code (str): Product NDC code
+            drug_info (dict, optional): Local NDC record
+            allow_expired (bool): Also use a mapping older than the disk cache's TTL
+
+        Returns:
+            str: set_id or None if it is not known yet
+        """
+        set_id = self._set_ids.get(ndc_code)
+        if set_id:
+            return set_id
+
+        set_ids = (drug_info or {}).get('openfda', {}).get('spl_set_id')
+        if set_ids:
+            set_id = set_ids[0]
+        elif self.cache is not None:
+            set_id = self.cache.get(f"ndc:{ndc_code}", allow_expired=allow_expired)
+
+        if set_id:
+            self._remember_set_id(ndc_code, set_id)
+        return set_id
+
+    def _cached_label(self, set_id):
+        """Return the label for a set_id from memory or the disk cache without storing or fetching it."""
+        with self._lock:
+            label = self._labels.get(set_id)
+        if label is None and self.cache is not None:
+            # Offline checks judge the last known label, however old
+            label = self.cache.get(f"label:{set_id}", allow_expired=True)
+        return label
+
+    def _get_by_set_id(self, set_id, refresh=False):
+        """Return the shared label for a set_id, fetching it at most once concurrently."""
+        while True:
+            with self._lock:
+                label = self._labels.get(set_id)
+                if label is not None and (not refresh or set_id in self._fetched):
+                    self.stats["hits"] += 1
+                    get_tracer().cache_result("label_memory", True)
+                    return label
+                event = self._in_flight.get(set_id)
+                if event is None:
+                    event = threading.Event()
+                    self._in_flight[set_id] = event
+                    break
+            # Another thread is already loading this label; wait and re-check
+            event.wait()
+
+        try:
+            if not refresh:
+                label = self.cache.get(f"label:{set_id}") if self.cache is not None else None
+                get_tracer().cache_result("label_disk", label is not None)
+                if label is not None:
+                    self._count("hits")
+                    return self._store(set_id, label, persist=False)
+
+            self._count("misses", "fetches")
+            label = self.fda_client.get_drug_label_by_set_id(set_id)
+            if not label:
+                return None
+            with self._lock:
+                self._fetched.add(set_id)
+            return self._store(set_id, label)
+        finally:
+            with self._lock:
+                self._in_flight.pop(set_id, None)
+            event.set()
+
+    def _store(self, set_id, label, persist=True):
+        """Keep one copy per set_id, normalized once; only a newer version replaces the one held."""
+        with self._lock:
+            existing = self._labels.get(set_id)
+        if existing is not None and not _is_newer(label, existing):
+            # E.g. an older copy from the disk cache must not replace a label fetched since
+            return existing
+        # Labels loaded from the disk cache usually have their prepared form cached too
+        prepared = self._prepare(set_id, label, load=not persist)
+        with self._lock:
+            existing = self._labels.get(set_id)
+            if existing is not None and not _is_newer(label, existing):
+                return existing
+            self._labels[set_id] = label
+            self._prepared[set_id] = prepared
+
+        if persist and self.cache is not None:
+            self.cache.set(f"label:{set_id}", label)
+        self.logger.info("Label stored for set_id %s (version %s)", set_id, label.get('version', 'unknown'))
+        return label
+
+    def _prepare(self, set_id, label, load=False, persist=True):
+        """Normalize a label version, or load its cached prepared form."""
+        prepared = None
+        if load and set_id and self.cache is not None:
+            prepared = self.cache.get(f"prepared:{set_id}")
+            get_tracer().cache_result("label_prepared_disk", is_current(prepared, label))
+        if not is_current(prepared, label):
+            with span("label.normalize", set_id=set_id):
+                prepared = normalize_label(label)
+            if persist and set_id and self.cache is not None:
+                self.cache.set(f"prepared:{set_id}", prepared)
+        return prepared
+
+    def _count(self, *names):
+        with self._lock:
+            for name in names:
+                self.stats[name] += 1
+
+    def _remember_set_id(self, ndc_code, set_id, persist=False):
+        self._set_ids[ndc_code] = set_id
+        if persist and self.cache is not None:
+            self.cache.set(f"ndc:{ndc_code}", set_id)
@@ -0,0 +1,98 @@
+import logging
+from utils.tracing import span
+
+DEFAULT_BASE_URL = "https://clinicaltrials.gov/api/v2"
+# Only the modules the report shows are requested
+STUDY_FIELDS = ("NCTId", "BriefTitle", "OverallStatus", "Phase", "Condition", "InterventionName",
+                "LeadSponsorName", "StartDate")
+
+class ClinicalTrialsClient:
+    """Client for searching studies in the ClinicalTrials.gov registry (API v2)."""
+
+    def __init__(self, base_url=None, page_size=100, max_studies=100):
+        """
+        Initialize the client.
+
+        Args:
+            base_url (str, optional): Registry API root; defaults to ClinicalTrials.gov
+            page_size (int): Studies requested per page
+            max_studies (int): Stop paging once this many studies were read for a term
+        """
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.page_size = page_size
+        self.max_studies = max_studies
+        self.logger = logging.getLogger('drugdeck.trials_client')
+
+    def _get(self, url, params):
+        """Issue a GET request to the registry."""
+        # requests is only loaded once a run actually talks to the registry
+        import requests
+        return requests.get(url, params=params, timeout=30)
+
+    def search_intervention(self, term):
+        """
+        Find the studies testing an intervention, following the result pages.
+
+        Args:
+            term (str): Intervention to search for (generic name or active ingredient)
+
+        Returns:
+            dict: {"term", "total", "studies"} with studies in registry order, or None if the search failed
+        """
+        self.logger.info("Searching clinical trials for intervention: %s", term)
+        params = {
+            "query.intr": term,
+            "fields": ",".join(STUDY_FIELDS),
+            "pageSize": min(self.page_size, self.max_studies),
+            "countTotal": "true",
+        }
+        studies, total = [], 0
+        try:
+            # Pages are cursor-based, so each term's pages are fetched in sequence
+            while True:
+                with span("http.clinicaltrials", term=term) as request_span:
+                    response = self._get(f"{self.base_url}/studies", params)
+                    request_span["attributes"]["status"] = response.status_code
+                if response.status_code != 200:
+                    self.logger.error("Clinical trials API error: %s - %s", response.status_code, response.text[:200])
+                    return None
+
+                data = response.json()
+                total = data.get("totalCount", total)
+                studies.extend(parse_study(study) for study in data.get("studies", []))
+                next_page = data.get("nextPageToken")
+                if not next_page or len(studies) >= self.max_studies:
+                    break
+                params["pageToken"] = next_page
+        except Exception as e:
+            self.logger.error("Error searching clinical trials for %s: %s", term, e)
+            return None
+
+        self.logger.info("Found %s clinical trials for %s (%s read)", total, term, len(studies))
+        return {"term": term, "total": max(total, len(studies)), "studies": studies[:self.max_studies]}
+
+def parse_study(study):
+    """
+    Flatten a registry study record into the fields shown in reports.
+
+    Args:
+        study (dict): Study as returned by the API ({"protocolSection": {...}})
+
+    Returns:
+        dict: nct_id, title, status, phases, conditions, interventions, sponsor and start_date
+    """
+    protocol = study.get("protocolSection", {})
+    identification = protocol.get("identificationModule", {})
+    status = protocol.get("statusModule", {})
+    return {
+        "nct_id": identification.get("nctId"),
+        "title": identification.get("briefTitle", "Unknown"),
+        "status": status.get("overallStatus", "UNKNOWN"),
+        "phases": protocol.get("designModule", {}).get("phases", []),
+        "conditions": protocol.get("conditionsModule", {}).get("conditions", []),
+        "interventions": [intervention.get("name") for intervention in
+                          protocol.get("armsInterventionsModule", {}).get("interventions", [])
+                          if intervention.get("name")],
+        "sponsor": protocol.get("sponsorCollaboratorsModule", {}).get("leadSponsor", {}).get("name", "Unknown"),
+        "start_date": status.get("startDateStruct", {}).get("date"),
+    }
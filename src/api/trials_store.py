@@ -0,0 +1,159 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.tracing import get_tracer
+
+_SPACE_RE = re.compile(r'\s+')
+
+def search_terms(drug_info):
+    """
+    Get the registry search terms for a drug: its generic name and each active ingredient.
+
+    Terms are normalized (lower case, single spaces) so every NDC of the same
+    drug or ingredient shares them.
+
+    Args:
+        drug_info (dict): NDC record
+
+    Returns:
+        list: Distinct search terms, generic name first
+    """
+    names = [drug_info.get('generic_name')]
+    names.extend(ingredient.get('name') for ingredient in drug_info.get('active_ingredients', []))
+    terms = []
+    for name in names:
+        term = _SPACE_RE.sub(' ', name or '').strip().lower()
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+class TrialsStore:
+    """
+    Deduplicating clinical-trials layer keyed by search term.
+
+    Each generic name or active ingredient is searched once: results are kept
+    in memory and in the optional disk cache, both for at most the TTL, and
+    concurrent requests for the same term wait for a single fetch. The terms
+    of one drug are fetched in parallel.
+    """
+
+    def __init__(self, client, cache=None, max_workers=4, max_studies=25, ttl=None):
+        """
+        Initialize the trials store.
+
+        Args:
+            client (ClinicalTrialsClient): Registry client
+            cache (DiskCache, optional): Persistent cache of search results per term
+            max_workers (int): Terms fetched concurrently
+            max_studies (int): Studies listed per report
+            ttl (float, optional): Seconds a search result is reused; None keeps results for the process
+        """
+        self.client = client
+        self.cache = cache
+        self.max_studies = max_studies
+        self.ttl = ttl
+        self.logger = logging.getLogger('drugdeck.trials_store')
+        # term -> (time the result was fetched, result)
+        self._results = {}
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='trials')
+        self.stats = {"hits": 0, "misses": 0, "fetches": 0}
+
+    def get_trials(self, drug_info, offline=False, complete=False):
+        """
+        Get the clinical trials section for a drug.
+
+        Args:
+            drug_info (dict): NDC record
+            offline (bool): Only use results already in memory or in the disk cache (no requests)
+            complete (bool): Return None unless every term could be searched, rather than a
+                section built from the terms that could
+
+        Returns:
+            dict: {"search_terms", "total", "studies"} with studies merged across terms (most recent
+                start first), or None if no term could be searched
+        """
+        terms = search_terms(drug_info)
+        if not terms:
+            return None
+        if offline:
+            results = [self._cached_term(term) for term in terms]
+        elif len(terms) == 1:
+            results = [self.get_term(terms[0])]
+        else:
+            results = list(self._executor.map(self.get_term, terms))
+
+        found = [result for result in results if result is not None]
+        if not found or (complete and len(found) < len(terms)):
+            return None
+        studies = {}
+        for term_index, result in enumerate(found):
+            for position, study in enumerate(result["studies"]):
+                # Studies without an NCT ID cannot be matched across terms; keep each one
+                studies.setdefault(study.get("nct_id") or (term_index, position), study)
+        ordered = sorted(studies.values(), key=lambda study: study.get("start_date") or "", reverse=True)
+        return {
+            "search_terms": terms,
+            "total": max(len(studies), max(result["total"] for result in found)),
+            "studies": ordered[:self.max_studies],
+        }
+
+    def _cached_term(self, term):
+        """Return the search result for a term from memory or the disk cache without fetching it."""
+        with self._lock:
+            result = self._results.get(term, (None, None))[1]
+        if result is None and self.cache is not None:
+            # Offline checks judge the last known result, however old
+            result = self.cache.get(f"trials:{term}", allow_expired=True)
+        return result
+
+    def get_term(self, term):
+        """Return the search result for a term, fetching it at most once concurrently."""
+        while True:
+            with self._lock:
+                fetched, result = self._results.get(term, (None, None))
+                if result is not None and not self._expired(fetched):
+                    self.stats["hits"] += 1
+                    get_tracer().cache_result("trials_memory", True)
+                    return result
+                event = self._in_flight.get(term)
+                if event is None:
+                    event = threading.Event()
+                    self._in_flight[term] = event
+                    break
+            # Another thread is already searching this term; wait and re-check
+            event.wait()
+
+        try:
+            result = self.cache.get(f"trials:{term}") if self.cache is not None else None
+            get_tracer().cache_result("trials_disk", result is not None)
+            if result is None:
+                self._count("misses", "fetches")
+                fetched = time.time()
+                result = self.client.search_intervention(term)
+                if result is None:
+                    return None
+                if self.cache is not None:
+                    self.cache.set(f"trials:{term}", result)
+            else:
+                self._count("hits")
+                # Expire the in-memory copy with the disk entry it was loaded from
+                fetched = self.cache.mtime(f"trials:{term}") or time.time()
+            with self._lock:
+                self._results[term] = (fetched, result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(term, None)
+            event.set()
+
+    def _expired(self, fetched):
+        return self.ttl is not None and time.time() - fetched > self.ttl
+
+    def _count(self, *names):
+        with self._lock:
+            for name in names:
+                self.stats[name] += 1
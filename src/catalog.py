@@ -0,0 +1,41 @@
+import argparse
+import logging
+import os
+from generators.catalog_generator import CatalogGenerator
+from utils.helpers import load_json
+
+def main():
+    """Build a multi-drug catalog PDF from saved report JSON files."""
+    parser = argparse.ArgumentParser(description="Build a DrugDeck catalog PDF from saved report JSON files.")
+    parser.add_argument('reports', nargs='+', help="Report JSON files (<ndc>_drug_report.json), in catalog order")
+    parser.add_argument('-o', '--output', default='reports/catalog.pdf', help="Output PDF path")
+    parser.add_argument('--title', default='DrugDeck Formulary', help="Catalog title")
+    parser.add_argument('--drugs-per-volume', type=int,
+                        help="Split the catalog into volumes of at most this many drugs (<output>-1.pdf, ...); "
+                             "reportlab holds a document's pages until it is saved, so this bounds memory")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    def report_source(paths):
+        def reports():
+            # Reports are re-read on every layout pass instead of being kept in memory
+            for path in paths:
+                report = load_json(path)
+                if report:
+                    yield report
+        return reports
+    
+    size = args.drugs_per_volume or len(args.reports)
+    volumes = [args.reports[start:start + size] for start in range(0, len(args.reports), size)]
+    root, extension = os.path.splitext(args.output)
+    for number, paths in enumerate(volumes, 1):
+        output, title = args.output, args.title
+        if len(volumes) > 1:
+            output = f"{root}-{number}{extension}"
+            title = f"{args.title} (volume {number} of {len(volumes)})"
+        count = CatalogGenerator(report_source(paths), output, title=title).generate_pdf()
+        print(f"Catalog with {count} drugs saved: {output}")
+
+if __name__ == "__main__":
+    main()
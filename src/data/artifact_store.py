@@ -0,0 +1,309 @@
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# Report sections stored as separate blobs so identical content is shared between reports
+SHARED_SECTIONS = ("label_information", "ai_insights")
+
+# Manifest entry fields that hold blob digests
+BLOB_FIELDS = ("report", "pdf", "preview")
+
+class ArtifactStore:
+    """Compressed, content-addressed store for report outputs with an NDC manifest."""
+
+    def __init__(self, root_dir, sweep_grace_hours=1):
+        """
+        Initialize the artifact store.
+
+        Layout:
+            blobs/<2 hex>/<sha256>[.gz]  content-addressed blobs (gzip for JSON/text)
+            manifest.jsonl               append-only NDC -> latest artifacts log
+
+        Args:
+            root_dir (str): Store directory
+            sweep_grace_hours (float): Age below which compact_manifest keeps unreferenced blobs
+        """
+        self.root_dir = root_dir
+        self.sweep_grace = sweep_grace_hours * 3600
+        self.blob_dir = os.path.join(root_dir, 'blobs')
+        self.manifest_path = os.path.join(root_dir, 'manifest.jsonl')
+        self.logger = logging.getLogger('drugdeck.artifact_store')
+        self._lock = threading.Lock()
+        self._manifest = None
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create an artifact store from the application configuration.
+
+        Args:
+            config (dict): Application configuration
+
+        Returns:
+            ArtifactStore: Configured store, or None when disabled
+        """
+        store_config = config.get('artifact_store', {})
+        if not store_config.get('enabled', False):
+            return None
+        return cls(store_config.get('dir', 'reports/store'), store_config.get('sweep_grace_hours', 1))
+
+    def put_bytes(self, data, compress=True):
+        """
+        Store a blob, skipping the write if identical content is already stored.
+
+        Args:
+            data (bytes): Blob content
+            compress (bool): Gzip the blob on disk (disable for already compressed data such as PDFs)
+
+        Returns:
+            str: SHA-256 hex digest of the content
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest, compress)
+        if os.path.exists(path):
+            try:
+                # A fresh mtime keeps the blob through a concurrent sweep (see compact_manifest)
+                os.utime(path)
+                return digest
+            except FileNotFoundError:
+                pass
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=6) if compress else data)
+        os.replace(tmp_path, path)
+        return digest
+
+    def get_bytes(self, digest):
+        """
+        Read a blob by its digest.
+
+        Args:
+            digest (str): SHA-256 hex digest
+
+        Returns:
+            bytes: Blob content or None if not stored
+        """
+        compressed_path = self._blob_path(digest, True)
+        if os.path.exists(compressed_path):
+            with open(compressed_path, 'rb') as f:
+                return gzip.decompress(f.read())
+        path = self._blob_path(digest, False)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        return None
+
+    def put_json(self, value):
+        """Store a JSON value in canonical form and return its digest."""
+        return self.put_bytes(json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+
+    def get_json(self, digest):
+        """Read a JSON value stored with put_json."""
+        data = self.get_bytes(digest)
+        return json.loads(data) if data is not None else None
+
+    def put_report(self, ndc_code, report, pdf=None, preview=None, preview_format='html'):
+        """
+        Store a report and its rendered outputs, and point the manifest at them.
+
+        Label and AI insight sections are stored as their own blobs and
+        referenced from the report by digest, so reports sharing a label or
+        insights store that content once.
+
+        Args:
+            ndc_code (str): Product NDC code
+            report (dict): Compiled report
+            pdf (bytes, optional): Rendered PDF
+            preview (str, optional): Rendered HTML/Markdown preview
+            preview_format (str): Format of the preview
+
+        Returns:
+            dict: Manifest entry with the digests of the stored artifacts
+        """
+        skeleton = dict(report)
+        for section in SHARED_SECTIONS:
+            if section in skeleton:
+                skeleton[section] = {"$blob": self.put_json(skeleton[section])}
+
+        entry = {"ndc_code": ndc_code, "report": self.put_json(skeleton), "updated": time.time()}
+        # Kept in the manifest so staleness checks need not load the report
+        versions = report.get("meta", {}).get("input_versions")
+        if versions is not None:
+            entry["input_versions"] = versions
+        if pdf is not None:
+            entry["pdf"] = self.put_bytes(pdf, compress=False)
+        if preview is not None:
+            entry["preview"] = self.put_bytes(preview.encode('utf-8'))
+            entry["preview_format"] = preview_format
+
+        self._append_manifest(entry)
+        self.logger.info("Artifacts stored for NDC %s: report %s", ndc_code, entry['report'][:12])
+        return entry
+
+    def attach_pdf(self, ndc_code, pdf):
+        """
+        Add a rendered PDF to the latest artifacts of an NDC.
+
+        The new manifest entry keeps the report, preview and input versions
+        of the current one, so rendering on demand does not drop them.
+
+        Args:
+            ndc_code (str): Product NDC code
+            pdf (bytes): Rendered PDF
+
+        Returns:
+            dict: Manifest entry, or None if the NDC has no stored report
+        """
+        current = self.get_entry(ndc_code)
+        if not current:
+            return None
+        entry = dict(current, pdf=self.put_bytes(pdf, compress=False), updated=time.time())
+        self._append_manifest(entry)
+        self.logger.info("PDF stored for NDC %s: %s", ndc_code, entry['pdf'][:12])
+        return entry
+
+    def get_entry(self, ndc_code):
+        """
+        Get the latest manifest entry for an NDC.
+
+        Args:
+            ndc_code (str): Product NDC code
+
+        Returns:
+            dict: Manifest entry or None
+        """
+        return self._load_manifest().get(ndc_code)
+
+    def load_report(self, ndc_code):
+        """
+        Load the latest report for an NDC with its shared sections resolved.
+
+        Args:
+            ndc_code (str): Product NDC code
+
+        Returns:
+            dict: Compiled report or None
+        """
+        entry = self.get_entry(ndc_code)
+        if not entry:
+            return None
+        report = self.get_json(entry["report"])
+        for section in SHARED_SECTIONS:
+            value = report.get(section)
+            if isinstance(value, dict) and "$blob" in value:
+                report[section] = self.get_json(value["$blob"])
+        return report
+
+    def load_pdf(self, ndc_code):
+        """
+        Load the latest rendered PDF for an NDC.
+
+        Args:
+            ndc_code (str): Product NDC code
+
+        Returns:
+            bytes: PDF or None if none was stored
+        """
+        entry = self.get_entry(ndc_code)
+        if not entry or "pdf" not in entry:
+            return None
+        return self.get_bytes(entry["pdf"])
+
+    def ndc_codes(self):
+        """List the NDCs present in the manifest."""
+        return list(self._load_manifest().keys())
+
+    def compact_manifest(self):
+        """
+        Rewrite the manifest log keeping only the latest entry per NDC, then delete the
+        blobs no remaining entry references (superseded reports, PDFs, previews, sections).
+
+        Blobs written in the last sweep_grace_hours are kept, since another process
+        may have stored them and not yet appended the entry that references them.
+
+        Returns:
+            int: Number of blobs deleted
+        """
+        with self._lock:
+            manifest = self._read_manifest()
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                for entry in manifest.values():
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest = manifest
+
+        referenced = set()
+        for entry in manifest.values():
+            referenced.update(entry[field] for field in BLOB_FIELDS if entry.get(field))
+            skeleton = self.get_json(entry["report"]) or {}
+            for section in SHARED_SECTIONS:
+                value = skeleton.get(section)
+                if isinstance(value, dict) and "$blob" in value:
+                    referenced.add(value["$blob"])
+
+        cutoff = time.time() - self.sweep_grace
+        deleted = 0
+        for path in glob.glob(os.path.join(self.blob_dir, '*', '*')):
+            name = os.path.basename(path)
+            # Leftover .tmp files from interrupted writes are swept too
+            if name.split('.', 1)[0] in referenced and not name.endswith('.tmp'):
+                continue
+            try:
+                if os.path.getmtime(path) > cutoff:
+                    continue
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+        self.logger.info("Manifest compacted to %d entries, %d unreferenced blobs deleted", len(manifest), deleted)
+        return deleted
+
+    def _append_manifest(self, entry):
+        # Appending one line keeps manifest writes O(1) per report
+        with self._lock:
+            with open(self.manifest_path, 'ab+') as f:
+                line = json.dumps(entry) + "\n"
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        # Start a fresh line after a line torn by a crash mid-append
+                        line = "\n" + line
+                f.write(line.encode('utf-8'))
+            if self._manifest is not None:
+                self._manifest[entry["ndc_code"]] = entry
+
+    def _load_manifest(self):
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = self._read_manifest()
+            return self._manifest
+
+    def _read_manifest(self):
+        manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn or garbled line, e.g. from a crash mid-append
+                        self.logger.warning("Skipping unreadable line in %s", self.manifest_path)
+                        continue
+                    manifest[entry["ndc_code"]] = entry
+        return manifest
+
+    def _blob_path(self, digest, compressed):
+        name = f"{digest}.gz" if compressed else digest
+        return os.path.join(self.blob_dir, digest[:2], name)
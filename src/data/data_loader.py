@@ -1,5 +1,6 @@
 import json
 import os
+from models.drug_table import DrugTable
 
 class DataLoader:
     """Utility for loading and managing drug data from local sources."""
@@ -27,6 +28,19 @@ class DataLoader:
             print(f"Error loading drug NDC data: {e}")
             return None
     
+    def load_drug_table(self):
+        """
+        Load the drug NDC data into a compact column-oriented table.
+        
+        Returns:
+            DrugTable: The catalog as columns, or None if loading failed
+        """
+        try:
+            return DrugTable.load(os.path.join(self.data_path, 'drug-ndc.json'))
+        except Exception as e:
+            print(f"Error loading drug NDC table: {e}")
+            return None
+    
     def find_drug_by_ndc(self, ndc_code):
         """
         Find a drug by its NDC code.
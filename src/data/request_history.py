@@ -0,0 +1,124 @@
+import glob
+import logging
+import os
+import re
+import time
+from collections import Counter
+
+# "Processing NDC: <ndc> (original input: ...)" as logged by main.py
+_LOG_REQUEST_RE = re.compile(r'Processing NDC: (\S+) \(original input')
+
+class RequestHistory:
+    """
+    Append-only record of report requests, one "<unix time>\\t<ndc>" line per request.
+
+    Appends of a single short line are atomic, so concurrent CLI runs and
+    workers can share the file without locking. The prewarm job counts it to
+    find the most requested NDCs.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the request history.
+
+        Args:
+            path (str): History file
+        """
+        self.path = path
+        self.logger = logging.getLogger('drugdeck.request_history')
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create the request history from the `request_history` configuration block.
+
+        Args:
+            config (dict): Application configuration
+
+        Returns:
+            RequestHistory: History, or None when disabled
+        """
+        history_config = config.get('request_history', {})
+        if not history_config.get('enabled', False):
+            return None
+        return cls(history_config.get('file', 'logs/requests.tsv'))
+
+    def record(self, ndc_code):
+        """
+        Record one request for an NDC.
+
+        Args:
+            ndc_code (str): Requested product NDC code
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(f"{time.time():.0f}\t{ndc_code}\n")
+        except OSError as e:
+            # Popularity tracking must never fail a request
+            self.logger.warning("Could not record request for %s: %s", ndc_code, e)
+
+    def counts(self, since=None):
+        """
+        Count the recorded requests per NDC.
+
+        Args:
+            since (float, optional): Only count requests at or after this Unix time
+
+        Returns:
+            Counter: NDC code -> number of requests
+        """
+        counts = Counter()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    timestamp, _, ndc_code = line.rstrip('\n').partition('\t')
+                    try:
+                        timestamp = float(timestamp)
+                    except ValueError:
+                        # Torn or garbled line, e.g. from a crash mid-append
+                        continue
+                    if not ndc_code or (since is not None and timestamp < since):
+                        continue
+                    counts[ndc_code] += 1
+        except FileNotFoundError:
+            pass
+        return counts
+
+def counts_from_logs(log_pattern, since=None):
+    """
+    Count report requests per NDC from application logs (text or JSON format).
+
+    Used for the history that predates the request history file.
+
+    Args:
+        log_pattern (str): Glob of log files, e.g. "logs/drugdeck*.log*"
+        since (float, optional): Skip log files last modified before this Unix time
+
+    Returns:
+        Counter: NDC code -> number of requests
+    """
+    counts = Counter()
+    for path in glob.glob(log_pattern):
+        if since is not None and os.path.getmtime(path) < since:
+            continue
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                match = _LOG_REQUEST_RE.search(line)
+                if match:
+                    # JSON-formatted logs escape nothing in an NDC, so the same pattern applies
+                    counts[match.group(1)] += 1
+    return counts
+
+def top_ndcs(counts, limit):
+    """
+    Pick the most requested NDCs.
+
+    Args:
+        counts (Counter): NDC code -> number of requests
+        limit (int): Number of NDCs to return
+
+    Returns:
+        list: (ndc_code, count) pairs, most requested first (ties by NDC)
+    """
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
@@ -0,0 +1,153 @@
+from reportlab.platypus import Flowable, Paragraph, Spacer, PageBreak
+from reportlab.platypus.doctemplate import SimpleDocTemplate
+from reportlab.platypus.tableofcontents import TableOfContents
+from reportlab.lib.units import inch
+import logging
+import os
+import time
+from generators.pdf_generator import PDFGenerator
+from generators.pdf_template import get_default_template
+from utils.helpers import escape_markup
+
+class CatalogGenerator:
+    """Generator for multi-drug catalog PDFs (formulary books) with a table of contents."""
+
+    def __init__(self, report_source, output_file, title="DrugDeck Formulary", template=None, max_passes=5):
+        """
+        Initialize the catalog generator.
+
+        Args:
+            report_source (callable): Zero-argument callable returning an iterator of compiled
+                reports. It is called once per layout pass (two passes are needed to resolve
+                table of contents page numbers), so it should re-read reports lazily, e.g.
+                from JSON files, rather than hold them all in memory.
+            output_file: Path to the output PDF file or a binary file-like object
+            title (str): Title printed above the table of contents
+            template (PDFTemplate, optional): Layout resources; defaults to the shared process-wide template
+            max_passes (int): Maximum number of layout passes
+        """
+        self.report_source = report_source
+        self.output_file = output_file
+        self.title = title
+        self.template = template or get_default_template()
+        self.max_passes = max_passes
+        self.styles = self.template.styles
+        self.logger = logging.getLogger('drugdeck.catalog_generator')
+
+    def generate_pdf(self):
+        """
+        Generate the catalog PDF.
+
+        Each layout pass is a plain SimpleDocTemplate.build: the table of
+        contents starts from the entries (and page numbers) recorded in the
+        previous pass, and passes repeat until they no longer change. A pass
+        that already has entries to lay out usually is the last one, so for
+        an output path it writes straight to the file; other passes (and all
+        passes but a final one for stream outputs) go to os.devnull.
+
+        The story handed to build() is the front matter followed by a marker
+        that the document template's filterFlowables hook replaces with the
+        next drug's flowables (and the marker again) when it reaches the head
+        of the list. Only the flowables of the drug being laid out are held in
+        memory. reportlab still keeps every finished page in the canvas until
+        the document is saved, a few KB per page; catalog.py --drugs-per-volume
+        splits very large catalogs into several documents to bound that.
+
+        Returns:
+            int: Number of drugs in the catalog
+        """
+        self.logger.info("Generating catalog PDF: %s", self.output_file)
+        start_time = time.time()
+
+        # A path can be overwritten by a later pass, a stream cannot
+        to_path = not hasattr(self.output_file, 'write')
+        entries = []
+        for passes in range(1, self.max_passes + 1):
+            toc = TableOfContents()
+            toc.levelStyles = [self.styles["DrugDeckNormal"]]
+            # The table of contents lays out the previous pass's entries
+            toc.addEntries(entries)
+            toc.beforeBuild()
+            written = to_path and bool(entries)
+            recorded = self._build(toc, self.output_file if written else os.devnull)
+            if recorded == entries:
+                break
+            entries = recorded
+            self.logger.debug("Catalog layout pass %d done, table of contents changed", passes)
+        else:
+            raise RuntimeError(f"Table of contents not resolved after {self.max_passes} passes")
+
+        if not written:
+            # Same entries as the last pass, so the layout (and every page number) is unchanged
+            self._build(toc, self.output_file)
+            passes += 1
+        self.logger.info("Catalog PDF with %d drugs generated in %.2f seconds (%d passes)",
+                         self._drug_count, time.time() - start_time, passes)
+        return self._drug_count
+
+    def _build(self, toc, output):
+        """Lay out the whole catalog once into output; returns the table of contents entries it produced."""
+        self._drug_count = 0
+        doc = _CatalogDocTemplate(output, self._drug_stories(), pagesize=self.template.page_size,
+                                  **self.template.margins)
+        story = list(self._front_matter(toc))
+        story.append(_NextDrug())
+        doc.build(story, onFirstPage=self.template.add_footer, onLaterPages=self.template.add_footer)
+        return doc.toc_entries
+
+    def _front_matter(self, toc):
+        """Yield the title page and table of contents."""
+        yield Paragraph(self.title, self.styles["DrugDeckTitle"])
+        yield Spacer(1, 0.25*inch)
+        yield Paragraph("Contents", self.styles["DrugDeckHeading2"])
+        yield toc
+
+    def _drug_stories(self):
+        """Yield the flowables of each drug as one list, one report at a time."""
+        for report in self.report_source():
+            story = PDFGenerator(report, template=self.template).build_story()
+            drug_info = report.get("drug_information", {})
+            ndc_code = report.get("meta", {}).get("ndc_code", "Unknown")
+            self._drug_count += 1
+            story[0].toc_text = escape_markup(f"{drug_info.get('brand_name', 'Unknown Drug')} ({ndc_code})")
+            story[0].toc_key = f"drug-{self._drug_count}"
+            # Break before rather than after each drug, so no blank page follows the last one
+            yield [PageBreak()] + story
+
+class _NextDrug(Flowable):
+    """Story placeholder for the drugs not laid out yet (see _CatalogDocTemplate.filterFlowables)."""
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        pass
+
+class _CatalogDocTemplate(SimpleDocTemplate):
+    """
+    Document template that pulls drug stories in as the layout reaches them, and records drug
+    titles for the table of contents and the outline.
+    """
+
+    def __init__(self, filename, drug_stories, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.toc_entries = []
+        self._drug_stories = drug_stories
+
+    def filterFlowables(self, flowables):
+        # Called with the flowable about to be laid out at the head of the list
+        while isinstance(flowables[0], _NextDrug):
+            story = next(self._drug_stories, None)
+            if story is None:
+                # Discarded by reportlab, which ends the build once the list is empty
+                flowables[0] = None
+                return
+            flowables[0:1] = story + [flowables[0]]
+
+    def afterFlowable(self, flowable):
+        text = getattr(flowable, 'toc_text', None)
+        if text:
+            key = flowable.toc_key
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(text, key, level=0)
+            self.toc_entries.append((0, text, self.page, key))
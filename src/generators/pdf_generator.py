@@ -1,107 +1,120 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import Paragraph, Spacer, Table
 from reportlab.lib.units import inch
-import json
-import os
+import io
 import logging
-import time
-from datetime import datetime
+from api.label_normalizer import CLINICAL_SECTIONS, is_current, normalize_label, text_paragraphs
+from generators.pdf_template import get_default_template
+from utils.helpers import escape_markup, format_share
+from utils.tracing import get_tracer, span
 
 class PDFGenerator:
     """Generator for creating PDF reports from drug information."""
     
-    def __init__(self, report_data, output_file):
+    def __init__(self, report_data, output_file=None, template=None, render_cache=None, prepared_label=None):
         """
         Initialize the PDF generator.
         
         Args:
             report_data (dict): Compiled report data
-            output_file (str): Path to the output PDF file
+            output_file (str, optional): Path to the output PDF file; may be omitted when
+                rendering only to a stream
+            template (PDFTemplate, optional): Layout resources; defaults to the shared process-wide template
+            render_cache (RenderCache, optional): Cache of rendered PDFs keyed by report content
+            prepared_label (dict, optional): Normalized label_information (see label_normalizer),
+                e.g. from the label store; normalized on first use when not given
         """
         self.report_data = report_data
         self.output_file = output_file
-        self.styles = getSampleStyleSheet()
+        self.template = template or get_default_template()
+        self.render_cache = render_cache
+        self.prepared_label = prepared_label
+        self.styles = self.template.styles
         self.logger = logging.getLogger('drugdeck.pdf_generator')
         self.logger.info("PDF Generator initialized")
-        self._define_styles()
-        
-    def _define_styles(self):
-        """Define custom styles for the PDF."""
-        self.logger.debug("Defining custom PDF styles")
-        self.styles.add(ParagraphStyle(
-            name='DrugDeckTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=12,
-            textColor=colors.darkblue
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='DrugDeckHeading2',
-            parent=self.styles['Heading2'],
-            fontSize=18,
-            spaceAfter=6,
-            textColor=colors.darkblue
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='DrugDeckHeading3',
-            parent=self.styles['Heading3'],
-            fontSize=14,
-            spaceAfter=6,
-            textColor=colors.darkblue
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='DrugDeckNormal',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=6
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='DrugDeckFooter',
-            parent=self.styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='DrugDeckBullet',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            leftIndent=20,
-            bulletIndent=10,
-            spaceAfter=3
-        ))
     
-    def generate_pdf(self):
-        """Generate the PDF report."""
-        self.logger.info(f"Generating PDF report: {self.output_file}")
-        start_time = time.time()
-        
-        # Create PDF document with custom footer
-        doc = SimpleDocTemplate(
-            self.output_file, 
-            pagesize=letter,
-            rightMargin=0.5*inch, 
-            leftMargin=0.5*inch,
-            topMargin=0.5*inch, 
-            bottomMargin=0.75*inch  # Increased to accommodate footer
-        )
-        
-        # Define a footer function to add timestamps
-        def add_footer(canvas, doc):
-            canvas.saveState()
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            footer_text = f"Generated on: {timestamp} | DrugDeck Report"
-            canvas.setFont('Helvetica', 8)
-            canvas.setFillColor(colors.grey)
-            canvas.drawString(0.5*inch, 0.5*inch, footer_text)
-            canvas.restoreState()
+    def generate_pdf(self, stream=None):
+        """
+        Generate the PDF report.
+        
+        When a render cache is configured and the report content (ignoring the
+        report id) was rendered before by this renderer version, the cached PDF
+        is written out instead of laying the document out again.
+        
+        Args:
+            stream (file-like, optional): Binary stream to render into (BytesIO, socket file,
+                HTTP response body). When output_file is also set, an on-disk copy is written
+                from the same bytes.
+            
+        Returns:
+            The stream or output file path the PDF was written to
+        """
+        destination = stream if stream is not None else self.output_file
+        self.logger.info("Generating PDF report: %s", destination)
+        with span("render.pdf") as render_span:
+            if self.render_cache is not None:
+                key = self.render_cache.content_hash(self.report_data)
+                data = self.render_cache.get(key)
+                get_tracer().cache_result("render", data is not None)
+                if data is None:
+                    self.logger.info("Render cache miss: %s", key)
+                    buffer = io.BytesIO()
+                    self._render(buffer)
+                    data = buffer.getvalue()
+                    self.render_cache.put(key, data)
+                else:
+                    self.logger.info("Render cache hit: %s", key)
+                self._write(data, stream)
+            else:
+                self._render(stream)
+        
+        self.logger.info("PDF report generated in %.2f seconds: %s", render_span['duration'], destination)
+        return destination
+    
+    def _render(self, stream=None):
+        """Lay out the report into the stream and/or output file."""
+        if stream is not None and self.output_file:
+            target = _TeeWriter(stream, self.output_file)
+        else:
+            target = stream if stream is not None else self.output_file
+        
+        try:
+            # Create PDF document; styles and footer come from the shared template
+            doc = self.template.create_document(target)
+            
+            # Build the PDF with custom footer
+            self.logger.debug("Building PDF document")
+            with span("render.layout"):
+                self.template.build(doc, self.build_story())
+        finally:
+            if isinstance(target, _TeeWriter):
+                target.close()
+    
+    def _write(self, data, stream=None):
+        """Write already rendered PDF bytes to the stream and/or output file."""
+        if stream is not None:
+            stream.write(data)
+        if self.output_file:
+            with open(self.output_file, 'wb') as f:
+                f.write(data)
+    
+    def render_bytes(self):
+        """
+        Render the PDF report in memory.
+        
+        Returns:
+            bytes: PDF document
+        """
+        buffer = io.BytesIO()
+        self.generate_pdf(buffer)
+        return buffer.getvalue()
+    
+    def build_story(self):
+        """
+        Build the list of flowables making up the report.
         
+        Returns:
+            list: Flowables for the report
+        """
         story = []
         
         # Add title
@@ -151,16 +164,34 @@ class PDFGenerator:
             story.append(item)
         story.append(Spacer(1, 0.25*inch))
         
+        # Add catalog market analytics if available
+        if self.report_data.get("market_analytics"):
+            story.append(Paragraph("Market Analytics", self.styles["DrugDeckHeading2"]))
+            story.append(self._create_market_analytics_table())
+            story.append(Spacer(1, 0.25*inch))
+        
+        # Add equivalent products if available
+        equivalents = self.report_data.get("equivalent_products")
+        if equivalents and equivalents.get("products"):
+            story.append(Paragraph("Equivalent Products", self.styles["DrugDeckHeading2"]))
+            for item in self._create_equivalents_section():
+                story.append(item)
+            story.append(Spacer(1, 0.25*inch))
+        
+        # Add clinical trials if available
+        trials = self.report_data.get("clinical_trials")
+        if trials and trials.get("studies"):
+            story.append(Paragraph("Clinical Trials", self.styles["DrugDeckHeading2"]))
+            for item in self._create_clinical_trials_section():
+                story.append(item)
+            story.append(Spacer(1, 0.25*inch))
+        
         # Add AI insights
         story.append(Paragraph("AI-Generated Insights", self.styles["DrugDeckHeading2"]))
         for item in self._create_ai_insights_section():
             story.append(item)
         
-        # Build the PDF with custom footer
-        self.logger.debug("Building PDF document")
-        doc.build(story, onFirstPage=add_footer, onLaterPages=add_footer)
-        
-        self.logger.info(f"PDF report generated in {time.time() - start_time:.2f} seconds: {self.output_file}")
+        return story
 
     # All other methods remain the same
     def _create_drug_info_table(self):
@@ -180,15 +211,7 @@ class PDFGenerator:
         
         # Create the table
         table = Table(data, colWidths=[2*inch, 4*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
+        table.setStyle(self.template.info_table_style)
         
         result = [table]
         
@@ -214,61 +237,64 @@ class PDFGenerator:
             ["Manufacturer Name", manufacturer_info.get("manufacturer_name", "Unknown")],
             ["Original Packager", "Yes" if manufacturer_info.get("is_original_packager", False) else "No"]
         ]
+        if manufacturer_info.get("company_contact"):
+            data.append(["Adverse Reactions Contact", manufacturer_info["company_contact"]])
         
         # Create the table
         table = Table(data, colWidths=[2*inch, 4*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
+        table.setStyle(self.template.info_table_style)
         
         return table
     
     def _create_label_info_section(self):
-        """Create the FDA label information section."""
-        label_info = self.report_data.get("label_information", {})
-        
+        """Create the FDA label information section from the prepared label sections."""
         result = []
         
-        # Skip these sections as they might be covered elsewhere
-        skip_sections = ["openfda", "spl_product_data_elements", "spl_id", "id", "set_id"]
-        
-        for key, value in label_info.items():
-            if key in skip_sections:
-                continue
-                
-            if value:
-                heading = key.replace("_", " ").title()
-                result.append(Paragraph(heading, self.styles["DrugDeckHeading3"]))  # Updated style name
-                
-                # Handle list or string values
-                if isinstance(value, list):
-                    if len(value) > 0:
-                        # Join multiple items with line breaks
-                        text = "<br/>".join(str(item) for item in value)
-                        result.append(Paragraph(text, self.styles["DrugDeckNormal"]))  # Updated style name
-                else:
-                    result.append(Paragraph(str(value), self.styles["DrugDeckNormal"]))  # Updated style name
-                    
-                result.append(Spacer(1, 0.1*inch))
+        for section in self._label_sections():
+            result.append(Paragraph(section["heading"], self.styles["DrugDeckHeading3"]))  # Updated style name
+            result.extend(Paragraph(text, self.styles["DrugDeckNormal"]) for text in section["paragraphs"])
+            result.append(Spacer(1, 0.1*inch))
         
         return result
     
+    def _label_sections(self):
+        """Escaped, chunked sections of the report's label, normalizing it only if it was not prepared."""
+        label_info = self.report_data.get("label_information")
+        if not label_info:
+            return []
+        if not is_current(self.prepared_label, label_info):
+            self.prepared_label = normalize_label(label_info)
+        return self.prepared_label["sections"]
+    
+    def _create_text_paragraphs(self, text):
+        """
+        Turn free text into escaped paragraphs of bounded size.
+        
+        Args:
+            text: Text (or value convertible to text), possibly containing markup
+            
+        Returns:
+            list: Paragraph flowables
+        """
+        return [Paragraph(chunk, self.styles["DrugDeckNormal"]) for chunk in text_paragraphs(text)]
+    
     def _create_clinical_info_section(self):
         """Create the clinical information section."""
         clinical_info = self.report_data.get("clinical_information", {})
+        # Clinical texts are the first entries of label fields, already chunked in the label sections
+        prepared = {section["field"]: section for section in self._label_sections()}
         
         result = []
         
         for key, value in clinical_info.items():
             heading = key.replace("_", " ").title()
             result.append(Paragraph(heading, self.styles["DrugDeckHeading3"]))  # Updated style name
-            result.append(Paragraph(value, self.styles["DrugDeckNormal"]))  # Updated style name
+            section = prepared.get(CLINICAL_SECTIONS.get(key))
+            if section and section.get("lead"):
+                result.extend(Paragraph(text, self.styles["DrugDeckNormal"])
+                              for text in section["paragraphs"][:section["lead"]])
+            else:
+                result.extend(self._create_text_paragraphs(value))
             result.append(Spacer(1, 0.1*inch))
         
         return result
@@ -286,15 +312,7 @@ class PDFGenerator:
         
         # Create the table
         table = Table(data, colWidths=[2*inch, 4*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
+        table.setStyle(self.template.info_table_style)
         
         result = [table]
         
@@ -314,6 +332,81 @@ class PDFGenerator:
         
         return result
     
+    def _create_market_analytics_table(self):
+        """Create a table with catalog-level market analytics."""
+        analytics = self.report_data.get("market_analytics", {})
+        expiring = analytics.get("expiring_listings", {})
+        
+        # Prepare data for the table
+        data = [
+            ["Competing Products", analytics.get("competing_products", "Unknown")],
+            ["Labelers (Same Ingredients)", analytics.get("labelers_with_same_ingredients", "Unknown")],
+            ["Labelers (Same Generic)", analytics.get("labelers_for_generic", "Unknown")],
+            ["Application Types", format_share(analytics.get("application_type_share", {}))],
+            ["Catalog Application Types", format_share(analytics.get("catalog_application_type_share", {}))],
+            ["Packages (Same Ingredients)", analytics.get("packages_with_same_ingredients", "Unknown")],
+            [f"Expiring in {expiring.get('days', '?')} Days",
+             f"{expiring.get('same_ingredients', 0)} same ingredients / {expiring.get('catalog', 0)} catalog"]
+        ]
+        
+        # Create the table
+        table = Table(data, colWidths=[2*inch, 4*inch])
+        table.setStyle(self.template.info_table_style)
+        
+        return table
+    
+    def _create_equivalents_section(self):
+        """Create the table of products with the same active ingredients and strengths."""
+        equivalents = self.report_data.get("equivalent_products", {})
+        products = equivalents.get("products", [])
+        cell_style = self.styles["DrugDeckFooter"]
+        
+        # Prepare data for the table; Paragraph cells wrap long names
+        data = [["NDC", "Brand Name", "Labeler", "Dosage Form", "Category"]]
+        for product in products:
+            data.append([Paragraph(escape_markup(str(product.get(field, "Unknown"))), cell_style)
+                         for field in ("product_ndc", "brand_name", "labeler_name", "dosage_form", "marketing_category")])
+        
+        # Create the table
+        table = Table(data, colWidths=[0.9*inch, 1.6*inch, 1.9*inch, 1.4*inch, 1.2*inch], repeatRows=1)
+        table.setStyle(self.template.grid_table_style)
+        
+        result = [table]
+        if equivalents.get("total", 0) > len(products):
+            result.append(Spacer(1, 0.05*inch))
+            result.append(Paragraph(f"Showing {len(products)} of {equivalents['total']} equivalent products.",
+                                    self.styles["DrugDeckNormal"]))
+        
+        return result
+    
+    def _create_clinical_trials_section(self):
+        """Create the table of registry studies for the drug's generic name and ingredients."""
+        trials = self.report_data.get("clinical_trials", {})
+        studies = trials.get("studies", [])
+        cell_style = self.styles["DrugDeckFooter"]
+        
+        # Prepare data for the table; Paragraph cells wrap long titles
+        data = [["NCT ID", "Title", "Status", "Phase", "Sponsor", "Start"]]
+        for study in studies:
+            values = [study.get("nct_id") or "Unknown", study.get("title", "Unknown"),
+                      study.get("status", "Unknown").replace("_", " ").title(),
+                      ", ".join(study.get("phases", [])) or "N/A", study.get("sponsor", "Unknown"),
+                      study.get("start_date") or "Unknown"]
+            data.append([Paragraph(escape_markup(str(value)), cell_style) for value in values])
+        
+        # Create the table
+        table = Table(data, colWidths=[0.9*inch, 2.4*inch, 0.9*inch, 0.7*inch, 1.3*inch, 0.8*inch], repeatRows=1)
+        table.setStyle(self.template.grid_table_style)
+        
+        result = [table]
+        if trials.get("total", 0) > len(studies):
+            result.append(Spacer(1, 0.05*inch))
+            result.append(Paragraph(f"Showing {len(studies)} of {trials['total']} studies "
+                                    f"for {escape_markup(', '.join(trials.get('search_terms', [])))}.",
+                                    self.styles["DrugDeckNormal"]))
+        
+        return result
+    
     def _create_ai_insights_section(self):
         """Create the AI insights section."""
         insights = self.report_data.get("ai_insights", {})
@@ -327,4 +420,19 @@ class PDFGenerator:
                 result.append(Paragraph(value, self.styles["DrugDeckNormal"]))  # Updated style name
                 result.append(Spacer(1, 0.1*inch))
         
-        return result
\ No newline at end of file
+        return result
+
+class _TeeWriter:
+    """Binary writer that forwards every write to a stream and to an on-disk copy."""
+    
+    def __init__(self, stream, output_file):
+        self.stream = stream
+        self.file = open(output_file, 'wb')
+    
+    def write(self, data):
+        self.stream.write(data)
+        self.file.write(data)
+        return len(data)
+    
+    def close(self):
+        self.file.close()
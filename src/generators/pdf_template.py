@@ -0,0 +1,150 @@
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, TableStyle
+from reportlab.lib.units import inch
+import logging
+import threading
+from datetime import datetime
+
+class PDFTemplate:
+    """Reusable layout resources (styles, table styles, page callbacks) for PDF reports."""
+
+    def __init__(self):
+        """Build the stylesheet and table styles shared by every rendered report."""
+        self.logger = logging.getLogger('drugdeck.pdf_template')
+        self.page_size = letter
+        self.margins = {
+            "rightMargin": 0.5*inch,
+            "leftMargin": 0.5*inch,
+            "topMargin": 0.5*inch,
+            "bottomMargin": 0.75*inch  # Increased to accommodate footer
+        }
+        self.styles = getSampleStyleSheet()
+        self._define_styles()
+        self.info_table_style = self._define_info_table_style()
+        self.grid_table_style = self._define_grid_table_style()
+        self.logger.info("PDF template initialized")
+
+    def _define_styles(self):
+        """Define custom styles for the PDF."""
+        self.logger.debug("Defining custom PDF styles")
+        self.styles.add(ParagraphStyle(
+            name='DrugDeckTitle',
+            parent=self.styles['Heading1'],
+            fontSize=24,
+            spaceAfter=12,
+            textColor=colors.darkblue
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='DrugDeckHeading2',
+            parent=self.styles['Heading2'],
+            fontSize=18,
+            spaceAfter=6,
+            textColor=colors.darkblue
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='DrugDeckHeading3',
+            parent=self.styles['Heading3'],
+            fontSize=14,
+            spaceAfter=6,
+            textColor=colors.darkblue
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='DrugDeckNormal',
+            parent=self.styles['Normal'],
+            fontSize=11,
+            spaceAfter=6
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='DrugDeckFooter',
+            parent=self.styles['Normal'],
+            fontSize=8,
+            textColor=colors.grey
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='DrugDeckBullet',
+            parent=self.styles['Normal'],
+            fontSize=11,
+            leftIndent=20,
+            bulletIndent=10,
+            spaceAfter=3
+        ))
+
+    def _define_info_table_style(self):
+        """Define the style used by the two-column information tables."""
+        return TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ])
+
+    def _define_grid_table_style(self):
+        """Define the style used by multi-column tables with a header row."""
+        return TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.darkblue),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ])
+
+    def create_document(self, output):
+        """
+        Create a document template for a single report.
+
+        Args:
+            output: Output file path or binary file-like object
+
+        Returns:
+            SimpleDocTemplate: Document ready to be built
+        """
+        return SimpleDocTemplate(output, pagesize=self.page_size, **self.margins)
+
+    def add_footer(self, canvas, doc):
+        """Page callback drawing the generation timestamp footer."""
+        canvas.saveState()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        footer_text = f"Generated on: {timestamp} | DrugDeck Report"
+        canvas.setFont('Helvetica', 8)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(0.5*inch, 0.5*inch, footer_text)
+        canvas.restoreState()
+
+    def build(self, doc, story):
+        """
+        Lay out a story into a document using the template's page callbacks.
+
+        Args:
+            doc (SimpleDocTemplate): Document created by create_document
+            story (list): Flowables to render
+        """
+        doc.build(story, onFirstPage=self.add_footer, onLaterPages=self.add_footer)
+
+_default_template = None
+_default_template_lock = threading.Lock()
+
+def get_default_template():
+    """
+    Get the process-wide PDF template, building it on first use.
+
+    Returns:
+        PDFTemplate: Shared template instance
+    """
+    global _default_template
+    if _default_template is None:
+        with _default_template_lock:
+            if _default_template is None:
+                _default_template = PDFTemplate()
+    return _default_template
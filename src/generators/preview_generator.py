@@ -0,0 +1,208 @@
+import html
+import logging
+from string import Template
+from utils.helpers import format_share
+
+# Templates are compiled once at import; rendering only substitutes values.
+_HTML_PAGE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Drug Deck: $brand_name</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; max-width: 60em; margin: 2em auto; color: #222; }
+h1, h2, h3 { color: #00008b; }
+table { border-collapse: collapse; margin-bottom: 1em; }
+th, td { border: 1px solid #999; padding: 4px 8px; text-align: left; vertical-align: top; }
+th { background: #d3d3d3; color: #00008b; }
+footer { color: #888; font-size: 0.8em; margin-top: 2em; }
+</style>
+</head>
+<body>
+<h1>Drug Deck: $brand_name</h1>
+<p>NDC Code: $ndc_code<br>Report Generated: $generated_date</p>
+$sections
+<footer>DrugDeck Report</footer>
+</body>
+</html>
+""")
+_HTML_SECTION = Template("<h2>$title</h2>\n$body\n")
+_HTML_ROW = Template("<tr><th>$label</th><td>$value</td></tr>")
+_HTML_SUBSECTION = Template("<h3>$title</h3>\n<p>$text</p>")
+
+_MARKDOWN_PAGE = Template("""# Drug Deck: $brand_name
+
+NDC Code: $ndc_code
+Report Generated: $generated_date
+
+$sections""")
+_MARKDOWN_SECTION = Template("## $title\n\n$body\n\n")
+_MARKDOWN_ROW = Template("| $label | $value |")
+_MARKDOWN_SUBSECTION = Template("### $title\n\n$text")
+
+class PreviewGenerator:
+    """Lightweight HTML/Markdown renderer for compiled drug reports."""
+
+    def __init__(self, report_data):
+        """
+        Initialize the preview generator.
+
+        Args:
+            report_data (dict): Compiled report data (output of ReportGenerator.compile_report)
+        """
+        self.report_data = report_data
+        self.logger = logging.getLogger('drugdeck.preview_generator')
+
+    def to_html(self):
+        """
+        Render the report as a standalone HTML page.
+
+        Returns:
+            str: HTML document
+        """
+        sections = [_HTML_SECTION.substitute(title=html.escape(title), body=body)
+                    for title, body in self._sections(self._html_table, self._html_subsections, self._html_list)]
+        return _HTML_PAGE.substitute(self._header(html.escape), sections="".join(sections))
+
+    def to_markdown(self):
+        """
+        Render the report as Markdown.
+
+        Returns:
+            str: Markdown document
+        """
+        sections = [_MARKDOWN_SECTION.substitute(title=title, body=body)
+                    for title, body in self._sections(self._markdown_table, self._markdown_subsections, self._markdown_list)]
+        return _MARKDOWN_PAGE.substitute(self._header(_markdown_escape), sections="".join(sections))
+
+    def render(self, fmt="html"):
+        """
+        Render the report in the requested format.
+
+        Args:
+            fmt (str): "html" or "markdown"
+
+        Returns:
+            str: Rendered document
+        """
+        if fmt == "html":
+            return self.to_html()
+        if fmt in ("markdown", "md"):
+            return self.to_markdown()
+        raise ValueError(f"Unsupported preview format: {fmt}")
+
+    def _header(self, escape):
+        drug_info = self.report_data.get("drug_information", {})
+        meta = self.report_data.get("meta", {})
+        return {
+            "brand_name": escape(str(drug_info.get("brand_name", "Unknown Drug"))),
+            "ndc_code": escape(str(meta.get("ndc_code", "Unknown"))),
+            "generated_date": escape(str(meta.get("generated_date", "Unknown"))),
+        }
+
+    def _sections(self, table, subsections, bullets):
+        """Yield (title, body) pairs for each report section using the format's builders."""
+        drug_info = self.report_data.get("drug_information", {})
+        ingredients = [f"{ingredient.get('name', 'Unknown')}: {ingredient.get('strength', 'Unknown')}"
+                       for ingredient in drug_info.get("active_ingredients", [])]
+        body = table([
+            ("Brand Name", drug_info.get("brand_name", "Unknown")),
+            ("Generic Name", drug_info.get("generic_name", "Unknown")),
+            ("Dosage Form", drug_info.get("dosage_form", "Unknown")),
+            ("Route", ", ".join(drug_info.get("route", ["Unknown"]))),
+            ("Marketing Start Date", drug_info.get("marketing_start_date", "Unknown")),
+            ("Marketing Category", drug_info.get("marketing_category", "Unknown")),
+            ("Application Number", drug_info.get("application_number", "Unknown")),
+        ])
+        if ingredients:
+            body += "\n\n" + bullets("Active Ingredients", ingredients)
+        yield "Drug Information", body
+
+        manufacturer_info = self.report_data.get("manufacturer_information", {})
+        rows = [
+            ("Labeler Name", manufacturer_info.get("labeler_name", "Unknown")),
+            ("Manufacturer Name", manufacturer_info.get("manufacturer_name", "Unknown")),
+            ("Original Packager", "Yes" if manufacturer_info.get("is_original_packager", False) else "No"),
+        ]
+        if manufacturer_info.get("company_contact"):
+            rows.append(("Adverse Reactions Contact", manufacturer_info["company_contact"]))
+        yield "Manufacturer Information", table(rows)
+
+        yield "Clinical Information", subsections(self.report_data.get("clinical_information", {}))
+
+        market_info = self.report_data.get("market_information", {})
+        body = table([
+            ("Product Type", market_info.get("product_type", "Unknown")),
+            ("Marketing Status", market_info.get("marketing_status", "Unknown")),
+            ("Listing Expiration Date", market_info.get("listing_expiration_date", "Unknown")),
+        ])
+        packages = [f"{package.get('package_ndc', 'Unknown')}: {package.get('description', 'Unknown')}"
+                    for package in market_info.get("packaging", [])]
+        if packages:
+            body += "\n\n" + bullets("Packaging Information", packages)
+        yield "Market Information", body
+
+        analytics = self.report_data.get("market_analytics")
+        if analytics:
+            expiring = analytics.get("expiring_listings", {})
+            yield "Market Analytics", table([
+                ("Competing Products", analytics.get("competing_products", "Unknown")),
+                ("Labelers (Same Ingredients)", analytics.get("labelers_with_same_ingredients", "Unknown")),
+                ("Labelers (Same Generic)", analytics.get("labelers_for_generic", "Unknown")),
+                ("Application Types", format_share(analytics.get("application_type_share", {}))),
+                ("Catalog Application Types", format_share(analytics.get("catalog_application_type_share", {}))),
+                ("Packages (Same Ingredients)", analytics.get("packages_with_same_ingredients", "Unknown")),
+                (f"Expiring in {expiring.get('days', '?')} Days",
+                 f"{expiring.get('same_ingredients', 0)} same ingredients / {expiring.get('catalog', 0)} catalog"),
+            ])
+
+        equivalents = self.report_data.get("equivalent_products")
+        if equivalents and equivalents.get("products"):
+            products = [f"{product.get('product_ndc', 'Unknown')}: {product.get('brand_name', 'Unknown')} "
+                        f"({product.get('labeler_name', 'Unknown')}, {product.get('dosage_form', 'Unknown')})"
+                        for product in equivalents["products"]]
+            yield "Equivalent Products", bullets(f"{equivalents.get('total', len(products))} products with the same "
+                                                 "active ingredients and strengths", products)
+
+        trials = self.report_data.get("clinical_trials")
+        if trials and trials.get("studies"):
+            studies = [f"{study.get('nct_id') or 'Unknown'}: {study.get('title', 'Unknown')} "
+                       f"({study.get('status', 'Unknown')}, {', '.join(study.get('phases', [])) or 'N/A'})"
+                       for study in trials["studies"]]
+            yield "Clinical Trials", bullets(f"{trials.get('total', len(studies))} studies for "
+                                             f"{', '.join(trials.get('search_terms', []))}", studies)
+
+        insights = {key: value for key, value in self.report_data.get("ai_insights", {}).items() if value}
+        yield "AI-Generated Insights", subsections(insights)
+
+    def _html_table(self, rows):
+        body = "\n".join(_HTML_ROW.substitute(label=html.escape(label), value=html.escape(str(value)))
+                         for label, value in rows)
+        return f"<table>\n{body}\n</table>"
+
+    def _html_subsections(self, items):
+        return "\n".join(_HTML_SUBSECTION.substitute(title=html.escape(key.replace("_", " ").title()),
+                                                     text=html.escape(str(value)))
+                         for key, value in items.items())
+
+    def _html_list(self, title, items):
+        body = "".join(f"<li>{html.escape(item)}</li>" for item in items)
+        return f"<h3>{html.escape(title)}</h3>\n<ul>{body}</ul>"
+
+    def _markdown_table(self, rows):
+        body = "\n".join(_MARKDOWN_ROW.substitute(label=label, value=_markdown_escape(str(value)).replace("|", "\\|"))
+                         for label, value in rows)
+        return f"| Field | Value |\n| --- | --- |\n{body}"
+
+    def _markdown_subsections(self, items):
+        return "\n\n".join(_MARKDOWN_SUBSECTION.substitute(title=key.replace("_", " ").title(),
+                                                           text=_markdown_escape(str(value)))
+                           for key, value in items.items())
+
+    def _markdown_list(self, title, items):
+        body = "\n".join(f"- {_markdown_escape(item)}" for item in items)
+        return f"**{title}:**\n\n{body}"
+
+def _markdown_escape(text):
+    """Escape characters that would otherwise start Markdown/HTML markup."""
+    return text.replace("\\", "\\\\").replace("<", "&lt;").replace("*", "\\*").replace("_", "\\_")
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+# Bump when the PDF layout changes (pdf_generator, pdf_template), so cached renders are not reused
+RENDERER_VERSION = 1
+
+# Meta fields that change on every compile without changing the rendered content
+# (generated_date is printed on the first page, so it stays part of the key)
+VOLATILE_META_FIELDS = ("report_id",)
+
+class RenderCache:
+    """Size-bounded on-disk cache of rendered PDFs keyed by a hash of the report content."""
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        """
+        Initialize the render cache.
+
+        Args:
+            cache_dir (str): Directory holding the cached PDFs
+            max_bytes (int): Total size above which least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger('drugdeck.render_cache')
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+        self.logger.info("Render cache initialized: %s (%s bytes)", cache_dir, self._size)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a render cache from the application configuration.
+
+        Args:
+            config (dict): Application configuration
+
+        Returns:
+            RenderCache: Configured cache, or None when caching is disabled
+        """
+        cache_config = config.get('render_cache', {})
+        if not cache_config.get('enabled', False):
+            return None
+        return cls(cache_config.get('dir', 'cache/renders'), cache_config.get('max_mb', 256) * 1024 * 1024)
+
+    @staticmethod
+    def content_hash(report_data):
+        """
+        Hash the content sections of a compiled report, together with the renderer version.
+
+        Args:
+            report_data (dict): Output of ReportGenerator.compile_report
+
+        Returns:
+            str: Hex digest that only changes when the rendered content would
+        """
+        content = dict(report_data)
+        content["meta"] = {key: value for key, value in report_data.get("meta", {}).items()
+                           if key not in VOLATILE_META_FIELDS}
+        content["renderer_version"] = RENDERER_VERSION
+        encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Get the cached PDF for a content hash.
+
+        Args:
+            key (str): Content hash
+
+        Returns:
+            bytes: Cached PDF or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        """
+        Store a rendered PDF and evict old entries if the cache is over budget.
+
+        Args:
+            key (str): Content hash
+            data (bytes): Rendered PDF
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+
+        with self._lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            self._size -= size
+            self.logger.debug("Evicted cached render: %s", entry.name)
+
+    def _entries(self):
+        """List the cached PDF files."""
+        return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.pdf')]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
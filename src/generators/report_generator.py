@@ -1,10 +1,76 @@
+import hashlib
 import json
 from datetime import datetime
+from api.label_normalizer import CLINICAL_SECTIONS, NORMALIZER_VERSION, normalize_label
+
+def record_fingerprint(record):
+    """
+    Fingerprint a JSON record (e.g. an NDC product) independent of key order.
+    
+    Args:
+        record (dict): Record to fingerprint
+        
+    Returns:
+        str: SHA-256 hex digest
+    """
+    encoded = json.dumps(record, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def trials_fingerprint(clinical_trials):
+    """
+    Fingerprint a clinical trials section by its search terms and listed studies.
+    
+    Args:
+        clinical_trials (dict): Section from TrialsStore.get_trials
+        
+    Returns:
+        dict: Search terms, total and a SHA-256 digest of the listed NCT IDs
+    """
+    nct_ids = sorted(study.get("nct_id") or "" for study in clinical_trials.get("studies", []))
+    return {
+        "search_terms": clinical_trials.get("search_terms", []),
+        "total": clinical_trials.get("total"),
+        "studies": hashlib.sha256("\n".join(nct_ids).encode('utf-8')).hexdigest(),
+    }
+
+def input_versions(drug_info, label_info=None, insights_key=None, clinical_trials=None):
+    """
+    Describe the versions of the inputs a report is built from.
+    
+    Two reports with equal input versions have the same content, which lets
+    a refresh skip reports whose inputs have not changed.
+    
+    Args:
+        drug_info (dict): NDC product record
+        label_info (dict, optional): FDA label
+        insights_key (str, optional): Cache key of the AI insights
+        clinical_trials (dict, optional): Clinical trials section
+        
+    Returns:
+        dict: NDC record fingerprint, label set_id/version/effective_time/normalizer, insights key
+            and, for reports with a clinical trials section, its fingerprint
+    """
+    label_info = label_info or {}
+    versions = {
+        "ndc_record": record_fingerprint(drug_info),
+        "label": {
+            "set_id": label_info.get("set_id"),
+            "version": label_info.get("version"),
+            "effective_time": label_info.get("effective_time"),
+            "normalizer": NORMALIZER_VERSION,
+        },
+        "insights": insights_key,
+    }
+    if clinical_trials:
+        versions["clinical_trials"] = trials_fingerprint(clinical_trials)
+    return versions
 
 class ReportGenerator:
     """Generator for creating comprehensive drug reports."""
     
-    def __init__(self, drug_info, ai_insights, label_info=None):
+    def __init__(self, drug_info, ai_insights, label_info=None, market_analytics=None, expiring_days=90,
+                 equivalence_index=None, max_equivalents=50, insights_key=None, clinical_trials=None,
+                 prepared_label=None):
         """
         Initialize the report generator.
         
@@ -12,10 +78,27 @@ class ReportGenerator:
             drug_info (dict): Basic drug information
             ai_insights (dict): AI-generated insights about the drug
             label_info (dict, optional): FDA label information
+            market_analytics (MarketAnalytics, optional): Precomputed catalog analytics
+            expiring_days (int): Window for the expiring listings counts in the analytics section
+            equivalence_index (EquivalenceIndex, optional): Index of products by ingredient signature
+            max_equivalents (int): Maximum number of equivalent products listed in the report
+            insights_key (str, optional): Cache key of the AI insights, recorded in the input versions
+            clinical_trials (dict, optional): Registry studies for the drug's generic name and ingredients
+            prepared_label (dict, optional): Normalized label_info (see label_normalizer); normalized
+                here when not given
         """
         self.drug_info = drug_info
         self.ai_insights = ai_insights
         self.label_info = label_info or {}
+        if prepared_label is None and self.label_info:
+            prepared_label = normalize_label(self.label_info)
+        self.prepared_label = prepared_label or {}
+        self.market_analytics = market_analytics
+        self.expiring_days = expiring_days
+        self.equivalence_index = equivalence_index
+        self.max_equivalents = max_equivalents
+        self.insights_key = insights_key
+        self.clinical_trials = clinical_trials
         
     def compile_report(self, ndc_code):
         """
@@ -32,7 +115,9 @@ class ReportGenerator:
                 "report_id": f"drug_{ndc_code}_{datetime.now().strftime('%Y%m%d%H%M%S')}",
                 "ndc_code": ndc_code,
                 "generated_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "report_type": "Drug Deck"
+                "report_type": "Drug Deck",
+                "input_versions": input_versions(self.drug_info, self.label_info, self.insights_key,
+                                                 self.clinical_trials)
             },
             "drug_information": self._compile_drug_information(),
             "manufacturer_information": self._compile_manufacturer_information(),
@@ -41,6 +126,20 @@ class ReportGenerator:
             "ai_insights": self.ai_insights
         }
         
+        # Add catalog-level market analytics if available
+        if self.market_analytics is not None:
+            analytics = self.market_analytics.market_section(ndc_code, self.expiring_days)
+            if analytics:
+                report["market_analytics"] = analytics
+        
+        # Add generic equivalents and repackagers if an index is available
+        if self.equivalence_index is not None:
+            report["equivalent_products"] = self.equivalence_index.equivalents(self.drug_info, self.max_equivalents)
+        
+        # Add registry clinical trials if available
+        if self.clinical_trials:
+            report["clinical_trials"] = self.clinical_trials
+        
         # Add label information if available
         if self.label_info:
             report["label_information"] = self.label_info
@@ -79,41 +178,21 @@ class ReportGenerator:
             "is_original_packager": openfda.get("is_original_packager", [False])[0] if openfda.get("is_original_packager") else False,
         }
         
+        # Company named as the adverse reactions contact in the label, if any
+        if self.prepared_label.get("company_contact"):
+            manufacturer_info["company_contact"] = self.prepared_label["company_contact"]
+        
         return manufacturer_info
     
     def _compile_clinical_information(self):
-        """Compile clinical information section."""
-        clinical_info = {
-            "indications": self._get_label_section("indications_and_usage"),
-            "contraindications": self._get_label_section("contraindications"),
-            "warnings": self._get_label_section("warnings"),
-            "adverse_reactions": self._get_label_section("adverse_reactions"),
-            "drug_interactions": self._get_label_section("drug_interactions"),
-        }
-        
-        return clinical_info
-    
-    def _get_label_section(self, section_name):
-        """
-        Get a specific section from the FDA label.
-        
-        Args:
-            section_name (str): Section name in the label
-            
-        Returns:
-            str: Section text or default message
-        """
+        """Compile clinical information section from the prepared label."""
         if not self.label_info:
-            return "Information not available in the basic data. See AI Insights section."
-        
-        section_data = self.label_info.get(section_name)
-        if not section_data:
-            return "Information not available in the FDA label. See AI Insights section."
-        
-        if isinstance(section_data, list) and len(section_data) > 0:
-            return section_data[0]
+            return {name: "Information not available in the basic data. See AI Insights section."
+                    for name in CLINICAL_SECTIONS}
         
-        return str(section_data)
+        clinical = self.prepared_label.get("clinical", {})
+        return {name: clinical.get(name) or "Information not available in the FDA label. See AI Insights section."
+                for name in CLINICAL_SECTIONS}
     
     def _compile_market_information(self):
         """Compile market information section."""
@@ -1,45 +1,18 @@
-import json
+import argparse
 import os
 import yaml
 import logging
 import time
 from datetime import datetime
-from api.fda_client import FDAClient
-from api.gemini_client import GeminiClient
-from generators.report_generator import ReportGenerator
-from generators.pdf_generator import PDFGenerator
+from data.request_history import RequestHistory
 from models.drug_model import Drug
+from pipeline.report_pipeline import ReportPipeline
 from utils.helpers import format_ndc
+from utils.logging_setup import setup_logging
+from utils.profiling import add_profile_argument, profile_run
+from utils.tracing import export_metrics, get_tracer
 from dotenv import load_dotenv
 
-# Configure logging
-def setup_logging(log_level=logging.INFO):
-    """
-    Set up logging configuration.
-    
-    Args:
-        log_level: Logging level (default: INFO)
-    """
-    # Ensure logs directory exists
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    # Generate timestamp for log filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = f"logs/drugdeck_{timestamp}.log"
-    
-    # Configure logging
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    
-    return logging.getLogger('drugdeck')
-
 def load_config():
     """Load application configuration."""
     logger = logging.getLogger('drugdeck')
@@ -48,7 +21,7 @@ def load_config():
             logger.info("Configuration loaded successfully")
             return yaml.safe_load(file)
     except Exception as e:
-        logger.error(f"Error loading configuration: {e}")
+        logger.error("Error loading configuration: %s", e)
         # Provide default configuration
         logger.info("Using default configuration")
         return {
@@ -61,24 +34,24 @@ def ensure_output_dir(dir_path):
     """Ensure output directory exists."""
     logger = logging.getLogger('drugdeck')
     if not os.path.exists(dir_path):
-        logger.info(f"Creating output directory: {dir_path}")
+        logger.info("Creating output directory: %s", dir_path)
         os.makedirs(dir_path)
     else:
-        logger.info(f"Output directory already exists: {dir_path}")
+        logger.info("Output directory already exists: %s", dir_path)
 
 def main():
-    # Setup logging
-    logger = setup_logging()
-    logger.info("======= DrugDeck Application Started =======")
+    parser = argparse.ArgumentParser(description="Generate a DrugDeck report for an NDC code.")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    
     start_time = time.time()
+    run_id = f"drugdeck_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
-    # Load environment variables
+    # Load environment variables and configuration, then set up logging as configured
     load_dotenv()
-    logger.info("Environment variables loaded")
-    
-    # Load configuration
     config = load_config()
-    google_api_key = config.get('google_api_key')
+    logger = setup_logging(settings=config.get('logging'))
+    logger.info("======= DrugDeck Application Started =======")
     output_dir = config.get('output_dir', 'reports')
     
     # Ensure output directory exists
@@ -89,93 +62,97 @@ def main():
     original_ndc = ndc_code
     ndc_code = format_ndc(ndc_code)
     
-    logger.info(f"Processing NDC: {ndc_code} (original input: {original_ndc})")
+    logger.info("Processing NDC: %s (original input: %s)", ndc_code, original_ndc)
     print(f"Searching for drug with NDC: {ndc_code}")
     
-    # Initialize FDA client and fetch drug info
-    logger.info("Initializing FDA client")
-    fda_client = FDAClient('data/drug-ndc.json')
+    # Initialize the report pipeline (FDA client, label store, caches)
+    logger.info("Initializing report pipeline")
+    pipeline = ReportPipeline(config)
+    
+    # Count the request for the prewarm job's popularity ranking
+    request_history = RequestHistory.from_config(config)
+    if request_history is not None:
+        request_history.record(ndc_code)
+    
+    try:
+        with profile_run(args.profile and os.path.join(args.profile, run_id)):
+            run_report(pipeline, ndc_code)
+    finally:
+        # Stage timings and cache counters are exported even when the run fails
+        for stage, summary in get_tracer().stage_summary().items():
+            logger.info("Stage %s: %s x, %.2f seconds total", stage, summary['count'], summary['total'])
+        export_metrics(config, run_id)
+    
+    # Log execution time
+    total_time = time.time() - start_time
+    logger.info("Total execution time: %.2f seconds", total_time)
+    logger.info("======= DrugDeck Application Completed =======")
+
+def run_report(pipeline, ndc_code):
+    """
+    Build and write the report for one NDC, printing progress for the user.
     
-    logger.info(f"Fetching drug information for NDC: {ndc_code}")
-    timer_start = time.time()
-    drug_info = fda_client.get_drug_info(ndc_code)
-    logger.info(f"Drug info fetch completed in {time.time() - timer_start:.2f} seconds")
+    Args:
+        pipeline (ReportPipeline): Configured report pipeline
+        ndc_code (str): Formatted product NDC code
+    """
+    logger = logging.getLogger('drugdeck')
+    logger.info("Fetching drug information for NDC: %s", ndc_code)
+    drug_info = pipeline.lookup(ndc_code)
     
     if not drug_info:
-        logger.error(f"No drug information found for NDC: {ndc_code}")
+        logger.error("No drug information found for NDC: %s", ndc_code)
         print("No drug information found for the provided NDC code.")
         return
     
     # Create drug model
     drug = Drug(ndc_code, drug_info)
-    logger.info(f"Drug model created: {drug.brand_name} ({drug.generic_name})")
+    logger.info("Drug model created: %s (%s)", drug.brand_name, drug.generic_name)
     print(f"Found drug: {drug.brand_name} ({drug.generic_name})")
     
     # Fetch additional data
     print("Fetching FDA label information...")
     logger.info("Fetching FDA label information")
-    timer_start = time.time()
-    label_info = fda_client.get_drug_label(ndc_code)
-    logger.info(f"FDA label fetch completed in {time.time() - timer_start:.2f} seconds")
+    label_info = pipeline.fetch_label(ndc_code, drug_info)
     
     if label_info:
         logger.info("FDA label information retrieved successfully")
     else:
         logger.warning("No FDA label information found")
     
-    # Initialize Gemini client and generate AI insights
-    logger.info("Setting up AI insights")
-    
-    # In a production environment, we would use this code:
-    # print("Generating AI insights...")
-    # logger.info("Initializing Gemini client and generating AI insights")
-    # timer_start = time.time()
-    # gemini_client = GeminiClient(google_api_key)
-    # ai_insights = gemini_client.get_ai_insights(drug_info)
-    # logger.info(f"AI insights generation completed in {time.time() - timer_start:.2f} seconds")
-    
-    # For now, using placeholder data
-    ai_insights = {
-        "drug_summary": "This is a summary of the drug.",
-        "mechanism_of_action": "This is the mechanism of action.",
-        "side_effects": "These are the side effects.",
-        "market_trends": "These are the market trends.",
-        "patient_journey": "This is the patient journey."
-    }
-    logger.info("Placeholder AI insights created")
+    # Clinical trials are searched by generic name and ingredient, shared across NDCs
+    clinical_trials = None
+    if pipeline.trials_store is not None:
+        print("Searching clinical trials...")
+        clinical_trials = pipeline.fetch_trials(ndc_code, drug_info)
+    
+    # AI insights come from Gemini or placeholders depending on ai_insights.provider
+    logger.info("Setting up AI insights (provider: %s)", pipeline.insights_provider)
+    ai_insights, insights_key = pipeline.get_insights(drug_info)
     
     # Compile report
     print("Compiling report...")
     logger.info("Compiling report")
-    timer_start = time.time()
-    report_generator = ReportGenerator(drug_info, ai_insights, label_info)
-    report = report_generator.compile_report(ndc_code)
-    logger.info(f"Report compilation completed in {time.time() - timer_start:.2f} seconds")
-    
-    # Generate PDF
-    output_file = os.path.join(output_dir, f"{ndc_code}_drug_report.pdf")
-    print(f"Generating PDF report: {output_file}")
-    logger.info(f"Generating PDF report: {output_file}")
-    
-    timer_start = time.time()
-    pdf_generator = PDFGenerator(report, output_file)
-    pdf_generator.generate_pdf()
-    logger.info(f"PDF generation completed in {time.time() - timer_start:.2f} seconds")
-    
-    print(f"Drug report generated successfully: {output_file}")
-    logger.info(f"Drug report generated successfully: {output_file}")
-    
-    # Optionally save JSON data
-    json_output = os.path.join(output_dir, f"{ndc_code}_drug_report.json")
-    with open(json_output, 'w') as f:
-        json.dump(report, f, indent=2)
-    logger.info(f"JSON data saved: {json_output}")
-    print(f"JSON data saved: {json_output}")
+    report = pipeline.compile(ndc_code, drug_info, label_info, ai_insights, insights_key, clinical_trials)
     
-    # Log execution time
-    total_time = time.time() - start_time
-    logger.info(f"Total execution time: {total_time:.2f} seconds")
-    logger.info("======= DrugDeck Application Completed =======")
+    if pipeline.report_settings.get('pdf_on_demand', False):
+        logger.info("PDF generation deferred (pdf_on_demand)")
+    else:
+        print("Generating PDF report...")
+    outputs = pipeline.write_outputs(ndc_code, report)
+    
+    if "store_entry" in outputs:
+        entry = outputs["store_entry"]
+        print(f"Report stored in {pipeline.artifact_store.root_dir} (report {entry['report'][:12]})")
+    else:
+        print(f"JSON data saved: {outputs['report']}")
+        if "preview" in outputs:
+            print(f"Preview saved: {outputs['preview']}")
+        if "pdf" in outputs:
+            print(f"Drug report generated successfully: {outputs['pdf']}")
+            logger.info("Drug report generated successfully: %s", outputs['pdf'])
+        else:
+            print(f"PDF available on demand: python src/render_pdf.py {outputs['report']}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
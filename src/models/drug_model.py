@@ -1,3 +1,25 @@
+def application_type(application_number):
+    """
+    Classify an application number as NDA, ANDA, BLA or Other.
+    
+    Args:
+        application_number (str): FDA application number (e.g. "ANDA076162"), "Unknown" if missing
+        
+    Returns:
+        str: Application type, "Unknown" when the number is missing
+    """
+    if not application_number or application_number == "Unknown":
+        return "Unknown"
+    
+    if application_number.startswith("N"):
+        return "NDA"
+    elif application_number.startswith("ANDA"):
+        return "ANDA"
+    elif application_number.startswith("BLA"):
+        return "BLA"
+    else:
+        return "Other"
+
 class Drug:
     """Model representing a drug with all its information."""
     
@@ -56,17 +78,7 @@ class Drug:
     
     def get_application_type(self):
         """Get the application type (NDA, ANDA, BLA)."""
-        if not self.application_number:
-            return "Unknown"
-        
-        if self.application_number.startswith("N"):
-            return "NDA"
-        elif self.application_number.startswith("ANDA"):
-            return "ANDA"
-        elif self.application_number.startswith("BLA"):
-            return "BLA"
-        else:
-            return "Other"
+        return application_type(self.application_number)
     
     def __str__(self):
         """String representation of the drug."""
@@ -0,0 +1,242 @@
+import datetime
+import json
+import logging
+from array import array
+from models.drug_model import Drug
+from utils.helpers import parse_date
+
+class StringColumn:
+    """Dictionary-encoded string column: each distinct value is stored once, rows hold integer codes."""
+
+    __slots__ = ('values', 'codes', '_index')
+
+    def __init__(self):
+        self.values = []
+        self.codes = array('I')
+        self._index = {}
+
+    def append(self, value):
+        """Append a value (any hashable, e.g. str or tuple) and return its code."""
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._index[value] = code
+        self.codes.append(code)
+        return code
+
+    def code_of(self, value):
+        """Get the code of a value, or None if it never occurs in the column."""
+        return self._index.get(value)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def __len__(self):
+        return len(self.codes)
+
+class DrugTable:
+    """Column-oriented, memory-compact representation of the NDC product catalog."""
+
+    def __init__(self):
+        """Create an empty table; use from_results() or load() to populate it."""
+        self.logger = logging.getLogger('drugdeck.drug_table')
+        self.product_ndc = []
+        self.brand_name = StringColumn()
+        self.generic_name = StringColumn()
+        self.labeler_name = StringColumn()
+        self.manufacturer_name = StringColumn()
+        self.dosage_form = StringColumn()
+        self.route = StringColumn()  # tuple of routes per row
+        self.marketing_category = StringColumn()
+        self.product_type = StringColumn()
+        self.application_number = StringColumn()
+        self.spl_set_id = StringColumn()
+        self.is_original_packager = array('b')
+        self.finished = array('b')
+        # Dates are stored as proleptic Gregorian ordinals, 0 when missing
+        self.marketing_start_date = array('i')
+        self.listing_expiration_date = array('i')
+        # Active ingredients and packages are stored CSR-style: row i owns
+        # entries offsets[i]:offsets[i + 1] of the flat columns
+        self.ingredient_offsets = array('I', [0])
+        self.ingredient_name = StringColumn()
+        self.ingredient_strength = StringColumn()
+        self.package_offsets = array('I', [0])
+        self.package_ndc = []
+        self._row_index = {}
+
+    @classmethod
+    def load(cls, data_path):
+        """
+        Build a table from a drug-ndc.json file.
+
+        Args:
+            data_path (str): Path to the openFDA NDC JSON file
+
+        Returns:
+            DrugTable: Populated table
+        """
+        with open(data_path, 'r') as file:
+            results = json.load(file).get('results', [])
+        return cls.from_results(results)
+
+    @classmethod
+    def from_results(cls, results):
+        """
+        Build a table from openFDA NDC records.
+
+        Args:
+            results (iterable): NDC product dictionaries
+
+        Returns:
+            DrugTable: Populated table
+        """
+        table = cls()
+        for drug in results:
+            table.append(drug)
+        table.logger.info("Drug table built with %d products", len(table))
+        return table
+
+    def append(self, drug):
+        """
+        Append one NDC product record.
+
+        Args:
+            drug (dict): NDC product dictionary
+        """
+        openfda = drug.get('openfda', {})
+        ndc_code = drug.get('product_ndc', '')
+        self._row_index.setdefault(ndc_code, len(self.product_ndc))
+        self.product_ndc.append(ndc_code)
+
+        self.brand_name.append(drug.get('brand_name', 'Unknown'))
+        self.generic_name.append(drug.get('generic_name', 'Unknown'))
+        self.labeler_name.append(drug.get('labeler_name', 'Unknown'))
+        self.manufacturer_name.append(openfda['manufacturer_name'][0] if openfda.get('manufacturer_name') else 'Unknown')
+        self.dosage_form.append(drug.get('dosage_form', 'Unknown'))
+        self.route.append(tuple(drug.get('route', ['Unknown'])))
+        self.marketing_category.append(drug.get('marketing_category', 'Unknown'))
+        self.product_type.append(drug.get('product_type', 'Unknown'))
+        self.application_number.append(drug.get('application_number', 'Unknown'))
+        self.spl_set_id.append(openfda['spl_set_id'][0] if openfda.get('spl_set_id') else '')
+        self.is_original_packager.append(1 if openfda.get('is_original_packager') and openfda['is_original_packager'][0] else 0)
+        self.finished.append(1 if drug.get('finished', False) else 0)
+        self.marketing_start_date.append(_date_ordinal(drug.get('marketing_start_date')))
+        self.listing_expiration_date.append(_date_ordinal(drug.get('listing_expiration_date')))
+
+        for ingredient in drug.get('active_ingredients', []):
+            self.ingredient_name.append(ingredient.get('name', 'Unknown'))
+            self.ingredient_strength.append(ingredient.get('strength', 'Unknown'))
+        self.ingredient_offsets.append(len(self.ingredient_name))
+
+        for package in drug.get('packaging', []):
+            self.package_ndc.append(package.get('package_ndc', ''))
+        self.package_offsets.append(len(self.package_ndc))
+
+    def __len__(self):
+        return len(self.product_ndc)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield DrugRow(self, row)
+
+    def index_of(self, ndc_code):
+        """
+        Get the row number of a product NDC.
+
+        Args:
+            ndc_code (str): Product NDC code
+
+        Returns:
+            int: Row number or None if not found
+        """
+        return self._row_index.get(ndc_code)
+
+    def find(self, ndc_code):
+        """
+        Get a row view for a product NDC.
+
+        Args:
+            ndc_code (str): Product NDC code
+
+        Returns:
+            DrugRow: Row view or None if not found
+        """
+        row = self._row_index.get(ndc_code)
+        return DrugRow(self, row) if row is not None else None
+
+    def row(self, row):
+        """Get a row view by row number."""
+        return DrugRow(self, row)
+
+def _date_ordinal(date_str):
+    """Convert a YYYYMMDD string into a date ordinal, 0 when missing or invalid."""
+    parsed = parse_date(date_str)
+    return parsed.toordinal() if parsed else 0
+
+def _date_string(ordinal):
+    """Convert a stored date ordinal back into YYYYMMDD, 'Unknown' when missing."""
+    return datetime.date.fromordinal(ordinal).strftime('%Y%m%d') if ordinal else 'Unknown'
+
+def _column(name):
+    return property(lambda self: getattr(self._table, name)[self._row])
+
+class DrugRow:
+    """
+    Lightweight read-only view of one DrugTable row.
+
+    Exposes the same attributes and helper methods as Drug (apart from the raw
+    drug_info dict and full packaging records) without copying any data.
+    """
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    ndc_code = _column('product_ndc')
+    brand_name = _column('brand_name')
+    generic_name = _column('generic_name')
+    labeler_name = _column('labeler_name')
+    manufacturer_name = _column('manufacturer_name')
+    dosage_form = _column('dosage_form')
+    marketing_category = _column('marketing_category')
+    product_type = _column('product_type')
+    application_number = _column('application_number')
+    spl_set_id = _column('spl_set_id')
+
+    @property
+    def route(self):
+        return list(self._table.route[self._row])
+
+    @property
+    def is_original_packager(self):
+        return bool(self._table.is_original_packager[self._row])
+
+    @property
+    def marketing_start_date(self):
+        return _date_string(self._table.marketing_start_date[self._row])
+
+    @property
+    def listing_expiration_date(self):
+        return _date_string(self._table.listing_expiration_date[self._row])
+
+    @property
+    def active_ingredients(self):
+        table = self._table
+        return [{"name": table.ingredient_name[i], "strength": table.ingredient_strength[i]}
+                for i in range(table.ingredient_offsets[self._row], table.ingredient_offsets[self._row + 1])]
+
+    @property
+    def package_ndcs(self):
+        table = self._table
+        return table.package_ndc[table.package_offsets[self._row]:table.package_offsets[self._row + 1]]
+
+    # The Drug helpers only read the attributes above, so they work unchanged on a row view
+    get_active_ingredients_str = Drug.get_active_ingredients_str
+    is_otc = Drug.is_otc
+    is_prescription = Drug.is_prescription
+    get_application_type = Drug.get_application_type
+    __str__ = Drug.__str__
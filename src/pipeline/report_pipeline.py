@@ -0,0 +1,432 @@
+import functools
+import glob
+import logging
+import os
+import threading
+from api.fda_client import FDAClient
+from api.gemini_client import GeminiClient, MODEL_NAME, insights_cache_key
+from api.label_store import LabelStore
+from api.trials_client import ClinicalTrialsClient
+from api.trials_store import TrialsStore
+from analytics.equivalence_index import EquivalenceIndex
+from analytics.market_analytics import MarketAnalytics
+from data.artifact_store import ArtifactStore
+from generators.report_generator import ReportGenerator, input_versions
+from generators.preview_generator import PreviewGenerator
+from generators.render_cache import RenderCache
+from pipeline.scheduler import DEFAULT_CLASSES, PriorityPool
+from utils.disk_cache import DiskCache
+from utils import serialization
+from utils.helpers import load_json, save_json
+from utils.tracing import get_tracer, span
+
+# Used when ai_insights.provider is "placeholder" (no Gemini calls)
+PLACEHOLDER_INSIGHTS = {
+    "drug_summary": "This is a summary of the drug.",
+    "mechanism_of_action": "This is the mechanism of action.",
+    "side_effects": "These are the side effects.",
+    "market_trends": "These are the market trends.",
+    "patient_journey": "This is the patient journey."
+}
+
+REPORT_SUFFIX = "_drug_report"
+
+def _disk_cache(cache_config):
+    """Create a DiskCache from a {dir, ttl_hours} configuration block, or None."""
+    if not cache_config or not cache_config.get('dir'):
+        return None
+    ttl_hours = cache_config.get('ttl_hours')
+    return DiskCache(cache_config['dir'], ttl_hours * 3600 if ttl_hours else None)
+
+class ReportPipeline:
+    """Builds drug reports from the configured data sources and writes their outputs."""
+
+    def __init__(self, config):
+        """
+        Initialize the pipeline and the clients and caches it uses.
+
+        Args:
+            config (dict): Application configuration
+        """
+        self.config = config
+        self.logger = logging.getLogger('drugdeck.pipeline')
+        self.data_file = config.get('data_file', 'data/drug-ndc.json')
+        self.output_dir = config.get('output_dir', 'reports')
+        self.report_settings = config.get('report', {})
+
+        self.fda_client = FDAClient(self.data_file, config.get('openfda', {}).get('base_url'))
+        self.label_store = LabelStore(self.fda_client, _disk_cache(config.get('label_cache')))
+
+        insights_config = config.get('ai_insights', {})
+        self.insights_provider = insights_config.get('provider', 'placeholder')
+        self.insights_model = MODEL_NAME if self.insights_provider == 'gemini' else self.insights_provider
+        self.insights_cache = _disk_cache(insights_config.get('cache'))
+        self.insights_endpoint = insights_config.get('api_endpoint')
+        self._gemini_client = None
+
+        self.trials_store = None
+        if self.report_settings.get('include_clinical_trials', False):
+            trials_config = config.get('clinical_trials', {})
+            trials_client = ClinicalTrialsClient(trials_config.get('base_url'), trials_config.get('page_size', 100),
+                                                 trials_config.get('max_studies_per_term', 100))
+            ttl_hours = trials_config.get('cache', {}).get('ttl_hours')
+            self.trials_store = TrialsStore(trials_client, _disk_cache(trials_config.get('cache')),
+                                            trials_config.get('max_workers', 4), trials_config.get('max_studies', 25),
+                                            ttl_hours * 3600 if ttl_hours else None)
+
+        self.render_cache = RenderCache.from_config(config)
+        self.artifact_store = ArtifactStore.from_config(config)
+        self._market_analytics = None
+        self._equivalence_index = None
+
+        # Worker pools shared by interactive and bulk requests, by priority class
+        scheduling_config = config.get('scheduling', {})
+        self.priority_classes = tuple(scheduling_config.get('classes', DEFAULT_CLASSES))
+        self.pools = {}
+        self._pools_lock = threading.Lock()
+        if scheduling_config.get('enabled', False):
+            for name, pool_config in scheduling_config.get('pools', {}).items():
+                self.pools[name] = PriorityPool.from_config(name, pool_config, self.priority_classes)
+
+    def lookup(self, ndc_code):
+        """
+        Look up the NDC record for a product.
+
+        Args:
+            ndc_code (str): Formatted product NDC code
+
+        Returns:
+            dict: NDC record or None if not found
+        """
+        with span("lookup", ndc=ndc_code):
+            return self.fda_client.get_drug_info(ndc_code)
+
+    def fetch_label(self, ndc_code, drug_info, refresh=False, offline=False):
+        """
+        Get the FDA label for a product through the shared label store.
+
+        Args:
+            ndc_code (str): Product NDC code
+            drug_info (dict): NDC record
+            refresh (bool): Revalidate the label against openFDA instead of trusting the label cache
+            offline (bool): Only use labels that are already cached (no requests, no cache writes)
+
+        Returns:
+            dict: Label information or None
+        """
+        if offline:
+            return self.label_store.get_label(ndc_code, drug_info, offline=True)
+        with span("label", ndc=ndc_code):
+            return self._scheduled("http", functools.partial(self.label_store.get_label, refresh=refresh),
+                                   ndc_code, drug_info)
+
+    def fetch_trials(self, ndc_code, drug_info, offline=False, complete=False):
+        """
+        Get the clinical trials for a product's generic name and active ingredients.
+
+        Args:
+            ndc_code (str): Product NDC code
+            drug_info (dict): NDC record
+            offline (bool): Only use cached search results (no requests)
+            complete (bool): Return None if any search term is unavailable
+
+        Returns:
+            dict: Clinical trials section, or None when disabled or unavailable
+        """
+        if self.trials_store is None:
+            return None
+        if offline:
+            return self.trials_store.get_trials(drug_info, offline=True, complete=complete)
+        with span("trials", ndc=ndc_code):
+            return self._scheduled("http", functools.partial(self.trials_store.get_trials, complete=complete),
+                                   drug_info)
+
+    def insights_key(self, drug_info):
+        """
+        Get the cache key of the AI insights for a product without generating them.
+
+        Args:
+            drug_info (dict): NDC record
+
+        Returns:
+            str: Insights cache key, or None when AI insights are disabled
+        """
+        if not self.report_settings.get('include_ai_insights', True):
+            return None
+        return insights_cache_key(drug_info, self.insights_model)
+
+    def get_insights(self, drug_info):
+        """
+        Get the AI insights for a product, reusing cached insights for the same key.
+
+        Args:
+            drug_info (dict): NDC record
+
+        Returns:
+            tuple: (insights dict, insights cache key)
+        """
+        key = self.insights_key(drug_info)
+        if key is None:
+            return {}, None
+        if self.insights_provider != 'gemini':
+            return dict(PLACEHOLDER_INSIGHTS), key
+
+        with span("insights", provider=self.insights_provider):
+            if self.insights_cache is not None:
+                insights = self.insights_cache.get(key)
+                get_tracer().cache_result("insights", insights is not None)
+                if insights is not None:
+                    self.logger.info("AI insights cache hit: %s", key)
+                    return insights, key
+
+            if self._gemini_client is None:
+                self._gemini_client = GeminiClient(self.config.get('google_api_key'), self.insights_endpoint)
+            # Each section is its own LLM task, so interactive work waits for one request at most
+            insights = self._gemini_client.get_ai_insights(drug_info, functools.partial(self._scheduled, "llm"))
+            if insights is not None and self.insights_cache is not None:
+                self.insights_cache.set(key, insights)
+            return insights, key
+
+    def current_versions(self, ndc_code, refresh=False, offline=False):
+        """
+        Get the current input versions for a product, as a fresh report would record them.
+
+        Args:
+            ndc_code (str): Product NDC code
+            refresh (bool): Revalidate the label against openFDA rather than trust the label cache
+            offline (bool): Judge from cached labels and trials only (no requests, no cache writes)
+
+        Returns:
+            tuple: (drug_info, label_info, clinical_trials, input versions dict), or four Nones if
+                the NDC is gone; label_info and clinical_trials are None when they cannot be fetched
+        """
+        drug_info = self.lookup(ndc_code)
+        if not drug_info:
+            return None, None, None, None
+        label_info = self.fetch_label(ndc_code, drug_info, refresh, offline)
+        # Trials are fetched through their cache; its TTL bounds how stale the fingerprint gets.
+        # A section missing some of its terms would pass for a change, so take all or nothing
+        clinical_trials = self.fetch_trials(ndc_code, drug_info, offline, complete=True)
+        versions = input_versions(drug_info, label_info, self.insights_key(drug_info), clinical_trials)
+        return drug_info, label_info, clinical_trials, versions
+
+    def unavailable_inputs(self, recorded, label_info, clinical_trials):
+        """
+        Name the inputs an existing report was built from that could not be fetched now.
+
+        Rebuilding without them would drop sections from a good report, so
+        refreshes leave such reports as they are.
+
+        Args:
+            recorded (dict): Input versions recorded in the existing report, or None
+            label_info (dict): Label returned by current_versions
+            clinical_trials (dict): Clinical trials section returned by current_versions
+
+        Returns:
+            list: Missing inputs ("label", "clinical_trials"), empty when a rebuild is safe
+        """
+        recorded = recorded or {}
+        missing = []
+        if (recorded.get("label") or {}).get("set_id") and not label_info:
+            missing.append("label")
+        if recorded.get("clinical_trials") and self.trials_store is not None and not clinical_trials:
+            missing.append("clinical_trials")
+        return missing
+
+    def compile(self, ndc_code, drug_info, label_info, ai_insights, insights_key=None, clinical_trials=None):
+        """
+        Compile a report from its inputs.
+
+        Args:
+            ndc_code (str): Product NDC code
+            drug_info (dict): NDC record
+            label_info (dict): Label information
+            ai_insights (dict): AI insights
+            insights_key (str, optional): Cache key of the AI insights
+            clinical_trials (dict, optional): Clinical trials section
+
+        Returns:
+            dict: Compiled report
+        """
+        market_analytics, equivalence_index = self.market_analytics, self.equivalence_index
+        # Normalized once per label version by the label store
+        prepared_label = self.label_store.prepared(label_info) if label_info else None
+        with span("compile", ndc=ndc_code):
+            report_generator = ReportGenerator(drug_info, ai_insights, label_info, market_analytics,
+                                               self.report_settings.get('expiring_within_days', 90),
+                                               equivalence_index, insights_key=insights_key,
+                                               clinical_trials=clinical_trials, prepared_label=prepared_label)
+            return report_generator.compile_report(ndc_code)
+
+    @property
+    def market_analytics(self):
+        """Catalog market analytics, built on first use when enabled."""
+        if self._market_analytics is None and self.report_settings.get('include_market_analytics', False):
+            self.logger.info("Building columnar catalog for market analytics")
+            with span("load.market_analytics") as load_span:
+                self._market_analytics = MarketAnalytics(self.fda_client.get_drug_table())
+            self.logger.info("Market analytics precomputed in %.2f seconds", load_span['duration'])
+        return self._market_analytics
+
+    @property
+    def equivalence_index(self):
+        """Equivalence index built alongside the NDC data, loaded on first use when enabled."""
+        if self._equivalence_index is None and self.report_settings.get('include_equivalents', False):
+            with span("load.equivalence_index") as load_span:
+                self._equivalence_index = EquivalenceIndex.for_data_file(
+                    self.data_file, load_table=self.fda_client.get_drug_table)
+            self.logger.info("Equivalence index ready in %.2f seconds", load_span['duration'])
+        return self._equivalence_index
+
+    def write_outputs(self, ndc_code, report):
+        """
+        Write a compiled report and its preview/PDF to the artifact store or the output directory.
+
+        Args:
+            ndc_code (str): Product NDC code
+            report (dict): Compiled report
+
+        Returns:
+            dict: Written outputs ("store_entry" in store mode, otherwise "report"/"preview"/"pdf" paths)
+        """
+        preview_format = self.report_settings.get('preview_format', 'html')
+        pdf_on_demand = self.report_settings.get('pdf_on_demand', False)
+
+        if self.artifact_store is not None:
+            # Shared label and insight blobs are only written once across reports
+            preview = None
+            if preview_format:
+                with span("render.preview"):
+                    preview = PreviewGenerator(report).render(preview_format)
+            pdf_bytes = None
+            if not pdf_on_demand:
+                pdf_bytes = self._scheduled("render", self.pdf_generator(report).render_bytes)
+            with span("write", target="artifact_store"):
+                entry = self.artifact_store.put_report(ndc_code, report, pdf=pdf_bytes, preview=preview,
+                                                       preview_format=preview_format)
+            return {"store_entry": entry}
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        outputs = {"report": self.report_path(ndc_code)}
+        with span("write", target="report"):
+            save_json(report, outputs["report"])
+        self.logger.info("JSON data saved: %s", outputs['report'])
+
+        # Write the quick preview; it needs no PDF layout
+        if preview_format:
+            extension = 'md' if preview_format in ('markdown', 'md') else 'html'
+            outputs["preview"] = os.path.join(self.output_dir, f"{ndc_code}{REPORT_SUFFIX}.{extension}")
+            with span("render.preview"):
+                preview = PreviewGenerator(report).render(preview_format)
+            with span("write", target="preview"):
+                with open(outputs["preview"], 'w', encoding='utf-8') as f:
+                    f.write(preview)
+
+        # Generate PDF, unless it is deferred until someone downloads it
+        if not pdf_on_demand:
+            outputs["pdf"] = os.path.join(self.output_dir, f"{ndc_code}{REPORT_SUFFIX}.pdf")
+            self._scheduled("render", self.pdf_generator(report, outputs["pdf"]).generate_pdf)
+        return outputs
+
+    def pdf_generator(self, report, output_file=None):
+        """
+        Create a PDF generator for a compiled report, sharing the pipeline's render cache and
+        the label store's prepared labels.
+
+        reportlab is imported here, on the first render, so runs that never
+        render a PDF (lookups, pdf_on_demand) do not load it.
+
+        Args:
+            report (dict): Compiled report
+            output_file (str, optional): Path of the PDF to write
+
+        Returns:
+            PDFGenerator: Generator for the report
+        """
+        from generators.pdf_generator import PDFGenerator
+        label_info = report.get("label_information")
+        prepared_label = self.label_store.prepared(label_info) if label_info else None
+        return PDFGenerator(report, output_file, render_cache=self.render_cache, prepared_label=prepared_label)
+
+    def report_path(self, ndc_code):
+        """Path of the serialized report for an NDC in the output directory."""
+        serialization_config = self.report_settings.get('serialization', {})
+        extension = serialization.file_extension(serialization_config.get('format', 'json'),
+                                                 serialization_config.get('compression'))
+        return os.path.join(self.output_dir, f"{ndc_code}{REPORT_SUFFIX}{extension}")
+
+    def generate(self, ndc_code, drug_info=None, label_info=None, clinical_trials=None):
+        """
+        Build and write the report for a product.
+
+        Args:
+            ndc_code (str): Product NDC code
+            drug_info (dict, optional): NDC record, looked up when omitted
+            label_info (dict, optional): Label information, fetched when drug_info is omitted
+            clinical_trials (dict, optional): Clinical trials section, fetched when omitted
+
+        Returns:
+            dict: Written outputs (see write_outputs), or None if the NDC is not in the data
+        """
+        with span("report", ndc=ndc_code):
+            if drug_info is None:
+                drug_info = self.lookup(ndc_code)
+                if not drug_info:
+                    return None
+                label_info = self.fetch_label(ndc_code, drug_info)
+            if clinical_trials is None:
+                clinical_trials = self.fetch_trials(ndc_code, drug_info)
+            ai_insights, insights_key = self.get_insights(drug_info)
+            report = self.compile(ndc_code, drug_info, label_info, ai_insights, insights_key, clinical_trials)
+            return self.write_outputs(ndc_code, report)
+
+    def submit(self, ndc_code, priority=None, block=False):
+        """
+        Queue a report on the "reports" pool in a priority class.
+
+        Interactive callers use the default block=False, so a full queue is
+        reported at once (QueueFull) instead of making the user wait; bulk
+        producers pass block=True to be throttled by their queue limit.
+
+        Args:
+            ndc_code (str): Product NDC code
+            priority (str, optional): Priority class; defaults to the calling thread's
+            block (bool): Wait for room in the class's queue instead of raising QueueFull
+
+        Returns:
+            Future: Resolves to the written outputs (see generate)
+        """
+        with self._pools_lock:
+            pool = self.pools.get("reports")
+            if pool is None:
+                pool = self.pools["reports"] = PriorityPool("reports", 4, self.priority_classes)
+        return pool.submit(self.generate, ndc_code, priority=priority, block=block)
+
+    def _scheduled(self, pool_name, fn, *args):
+        """Run a stage on its worker pool at the caller's priority, or inline when the pool is not configured."""
+        pool = self.pools.get(pool_name)
+        if pool is None:
+            return fn(*args)
+        return pool.run(fn, *args)
+
+    def existing_reports(self):
+        """
+        List the reports already written, with the input versions they were built from.
+
+        Returns:
+            dict: NDC code -> recorded input versions (None for reports that predate version tracking)
+        """
+        if self.artifact_store is not None:
+            return {ndc_code: self.artifact_store.get_entry(ndc_code).get("input_versions")
+                    for ndc_code in self.artifact_store.ndc_codes()}
+
+        reports = {}
+        for path in sorted(glob.glob(os.path.join(self.output_dir, f"*{REPORT_SUFFIX}.*"))):
+            name = os.path.basename(path)
+            ndc_code, extension = name.split(REPORT_SUFFIX, 1)
+            if not extension.startswith(('.json', '.msgpack')):
+                continue
+            report = load_json(path)
+            if report is not None:
+                reports[ndc_code] = report.get("meta", {}).get("input_versions")
+        return reports
@@ -0,0 +1,220 @@
+"""
+Priority classes for the pipeline's worker pools.
+
+Interactive single-report requests and bulk jobs (regenerate, prewarm) share
+the same HTTP, LLM and render capacity. A PriorityPool runs work in a fixed
+number of threads and, whenever a worker frees up, starts the oldest task of
+the highest-priority class allowed to run, so bulk backlogs never sit in
+front of interactive requests. On top of that:
+
+    reserved    workers a class keeps for itself. A higher class's
+                reservation is held even while it is idle, so an
+                interactive request never waits for a busy bulk task; a
+                lower class's reservation is only held while it has work
+                queued, so bulk jobs are not starved either.
+    max_queue   queued tasks allowed per class; further submissions wait
+                for room (backpressure on bulk producers) or, with
+                block=False, raise QueueFull (load shedding).
+
+The priority of the calling thread is set with request_priority() and
+follows the work into the pools.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from utils.tracing import get_tracer
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+DEFAULT_CLASSES = (INTERACTIVE, BATCH)
+
+_context = threading.local()
+
+class QueueFull(Exception):
+    """Raised when a priority class's queue is at its limit and the caller does not wait."""
+
+def current_priority():
+    """Get the priority class of the calling thread (interactive unless set)."""
+    return getattr(_context, 'priority', INTERACTIVE)
+
+@contextmanager
+def request_priority(priority):
+    """
+    Run a block with a priority class; pool work it submits is scheduled in that class.
+
+    Args:
+        priority (str): Priority class, e.g. "interactive" or "batch"
+    """
+    previous = current_priority()
+    _context.priority = priority
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+class PriorityPool:
+    """Fixed-size thread pool scheduling tasks by priority class with reserved workers and queue limits."""
+
+    def __init__(self, name, workers, classes=DEFAULT_CLASSES, reserved=None, max_queue=None):
+        """
+        Initialize the pool and start its workers.
+
+        Args:
+            name (str): Pool name, used for thread names and metrics (e.g. "http")
+            workers (int): Number of worker threads
+            classes (sequence): Priority classes, highest first
+            reserved (dict, optional): Class -> workers reserved for it
+            max_queue (dict, optional): Class -> queued tasks allowed (missing: unlimited)
+        """
+        self.name = name
+        self.workers = workers
+        self.classes = tuple(classes)
+        self.reserved = {cls: (reserved or {}).get(cls, 0) for cls in self.classes}
+        self.max_queue = {cls: (max_queue or {}).get(cls) for cls in self.classes}
+        if sum(self.reserved.values()) > workers:
+            raise ValueError(f"Pool {name}: reserved workers exceed the {workers} workers")
+        self.logger = logging.getLogger('drugdeck.scheduler')
+        self._queues = {cls: deque() for cls in self.classes}
+        self._running = {cls: 0 for cls in self.classes}
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._local = threading.local()
+        self._threads = [threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    @classmethod
+    def from_config(cls, name, pool_config, classes=DEFAULT_CLASSES):
+        """
+        Create a pool from a {workers, reserved, max_queue} configuration block.
+
+        Args:
+            name (str): Pool name
+            pool_config (dict): Pool configuration
+            classes (sequence): Priority classes, highest first
+
+        Returns:
+            PriorityPool: Running pool
+        """
+        return cls(name, pool_config.get('workers', 4), classes, pool_config.get('reserved'),
+                   pool_config.get('max_queue'))
+
+    def submit(self, fn, *args, priority=None, block=True, **kwargs):
+        """
+        Queue a call in a priority class.
+
+        Args:
+            fn (callable): Function to run
+            *args: Positional arguments for fn
+            priority (str, optional): Priority class; defaults to the calling thread's
+            block (bool): Wait for room when the class's queue is full instead of raising QueueFull
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future: Result of the call
+        """
+        priority = priority or current_priority()
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class for pool {self.name}: {priority}")
+        future = Future()
+        # Spans opened by the task nest under the submitter's current span
+        task = (future, fn, args, kwargs, get_tracer().current_span(), time.perf_counter())
+        limit = self.max_queue[priority]
+        with self._condition:
+            while limit is not None and len(self._queues[priority]) >= limit:
+                if not block:
+                    get_tracer().increment("scheduler_rejected", pool=self.name, priority=priority)
+                    raise QueueFull(f"{self.name} queue for {priority} is full ({limit} tasks)")
+                self._condition.wait()
+            if self._shutdown:
+                raise RuntimeError(f"Pool {self.name} is shut down")
+            self._queues[priority].append(task)
+            self._condition.notify_all()
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Run a call in the pool at the calling thread's priority and wait for its result.
+
+        Calls made from one of this pool's own workers run inline, so nested
+        use cannot deadlock the pool.
+
+        Args:
+            fn (callable): Function to run
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            The function's result (its exception is re-raised)
+        """
+        if getattr(self._local, 'worker', False):
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def queue_depths(self):
+        """Get the number of queued tasks per class."""
+        with self._condition:
+            return {cls: len(queue) for cls, queue in self._queues.items()}
+
+    def shutdown(self, wait=True):
+        """
+        Stop the workers once the queued tasks are done.
+
+        Args:
+            wait (bool): Wait for the workers to exit
+        """
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _next_class(self):
+        """Pick the class whose oldest task starts next, or None if none may start now."""
+        busy = sum(self._running.values())
+        for rank, cls in enumerate(self.classes):
+            if not self._queues[cls]:
+                continue
+            held = 0
+            for other_rank, other in enumerate(self.classes):
+                if other == cls or (other_rank > rank and not self._queues[other]):
+                    continue
+                held += max(0, self.reserved[other] - self._running[other])
+            if busy < self.workers - held:
+                return cls
+        return None
+
+    def _work(self):
+        self._local.worker = True
+        tracer = get_tracer()
+        while True:
+            with self._condition:
+                while True:
+                    cls = self._next_class()
+                    if cls is not None or (self._shutdown and not any(self._queues.values())):
+                        break
+                    self._condition.wait()
+                if cls is None:
+                    return
+                future, fn, args, kwargs, parent, queued_at = self._queues[cls].popleft()
+                self._running[cls] += 1
+                # A queue slot freed up for blocked submitters
+                self._condition.notify_all()
+
+            tracer.observe(f"queue.{self.name}.{cls}", time.perf_counter() - queued_at)
+            try:
+                if future.set_running_or_notify_cancel():
+                    with request_priority(cls), tracer.attach(parent):
+                        try:
+                            future.set_result(fn(*args, **kwargs))
+                        except BaseException as e:
+                            future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running[cls] -= 1
+                    self._condition.notify_all()
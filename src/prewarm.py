@@ -0,0 +1,162 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from main import load_config
+from data.request_history import RequestHistory, counts_from_logs, top_ndcs
+from pipeline.report_pipeline import ReportPipeline
+from pipeline.scheduler import BATCH, request_priority
+from utils.logging_setup import setup_logging
+from utils.profiling import add_profile_argument, profile_run
+from utils.tracing import export_metrics, span
+from dotenv import load_dotenv
+
+def main():
+    """Precompute labels, insights, reports and PDFs for the most requested NDCs."""
+    parser = argparse.ArgumentParser(description="Prewarm DrugDeck caches and reports for popular NDCs.")
+    parser.add_argument('--top', type=int, help="Number of NDCs to prewarm (default: prewarm.top_n)")
+    parser.add_argument('--days', type=float, help="Request history window in days (default: prewarm.history_days)")
+    parser.add_argument('--source', choices=['auto', 'history', 'logs'], default='auto',
+                        help="Count requests from the request history file or the application logs "
+                             "(auto: the history when it has entries, otherwise the logs)")
+    parser.add_argument('--workers', type=int, help="NDCs prewarmed concurrently (default: prewarm.workers)")
+    parser.add_argument('--until', metavar='HH:MM', help="Stop starting new NDCs at this time (end of off-peak)")
+    parser.add_argument('--force', action='store_true', help="Rebuild reports even when they are current")
+    parser.add_argument('--dry-run', action='store_true', help="Only list the NDCs that would be prewarmed")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    load_dotenv()
+    config = load_config()
+    setup_logging(settings=config.get('logging'), batch=True)
+    prewarm_config = config.get('prewarm', {})
+    top = args.top or prewarm_config.get('top_n', 300)
+    days = args.days or prewarm_config.get('history_days', 30)
+    workers = args.workers or prewarm_config.get('workers', 4)
+
+    popular = popular_ndcs(config, top, time.time() - days * 86400, args.source)
+    if not popular:
+        print("No request history found; nothing to prewarm")
+        return
+    if args.dry_run:
+        for ndc_code, count in popular:
+            print(f"{ndc_code}: {count} requests")
+        return
+
+    pipeline = ReportPipeline(config)
+    deadline = _deadline(args.until) if args.until else None
+    run_id = f"prewarm_{time.strftime('%Y%m%d_%H%M%S')}"
+    start_time = time.time()
+    with profile_run(args.profile and os.path.join(args.profile, run_id)):
+        counts = prewarm(pipeline, [ndc_code for ndc_code, _ in popular], workers, deadline, args.force,
+                         prewarm_config.get('render_pdf', True))
+    if counts['built'] and pipeline.artifact_store is not None:
+        # Rebuilt reports supersede stored blobs; drop the ones nothing references any more
+        pipeline.artifact_store.compact_manifest()
+
+    export_metrics(config, run_id)
+    print(f"{counts['built']} built, {counts['current']} current, {counts['missing']} missing, "
+          f"{counts['failed']} failed, {counts['deferred']} deferred ({time.time() - start_time:.2f} seconds)")
+
+def popular_ndcs(config, limit, since, source='auto'):
+    """
+    Pick the most requested NDCs from the request history or the logs.
+
+    Both record the same requests, so they are never added together; the
+    logs cover the time before the request history was enabled.
+
+    Args:
+        config (dict): Application configuration
+        limit (int): Number of NDCs
+        since (float): Only count requests after this Unix time
+        source (str): "history", "logs" or "auto"
+
+    Returns:
+        list: (ndc_code, count) pairs, most requested first
+    """
+    counts = Counter()
+    if source in ('history', 'auto'):
+        history = RequestHistory.from_config(config)
+        if history is not None:
+            counts = history.counts(since)
+    if source == 'logs' or (source == 'auto' and not counts):
+        log_file = config.get('logging', {}).get('file', 'logs/drugdeck.log')
+        # Rotated files (drugdeck.log.1, ...) and the older per-run logs (drugdeck_<timestamp>.log)
+        counts = counts_from_logs(f"{os.path.splitext(log_file)[0]}*.log*", since)
+    return top_ndcs(counts, limit)
+
+def prewarm(pipeline, ndc_codes, workers=4, deadline=None, force=False, render_pdf=True):
+    """
+    Warm the caches and reports for NDCs, most popular first.
+
+    Args:
+        pipeline (ReportPipeline): Configured report pipeline
+        ndc_codes (list): NDCs in priority order
+        workers (int): NDCs prewarmed concurrently
+        deadline (float, optional): Unix time after which no new NDC is started
+        force (bool): Rebuild reports even when their inputs are unchanged
+        render_pdf (bool): Render PDFs into the render cache when PDFs are otherwise deferred
+
+    Returns:
+        Counter: Outcomes ("built", "current", "missing", "failed", "deferred")
+    """
+    logger = logging.getLogger('drugdeck')
+    existing = pipeline.existing_reports()
+    counts = Counter()
+    lock = threading.Lock()
+
+    def warm(ndc_code):
+        if deadline is not None and time.time() >= deadline:
+            outcome = "deferred"
+        else:
+            try:
+                with request_priority(BATCH), span("prewarm", ndc=ndc_code):
+                    outcome = _warm(pipeline, ndc_code, existing.get(ndc_code), force, render_pdf)
+            except Exception as e:
+                logger.error("Prewarm failed for %s: %s", ndc_code, e)
+                outcome = "failed"
+        with lock:
+            counts[outcome] += 1
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prewarm') as executor:
+        list(executor.map(warm, ndc_codes))
+    return counts
+
+def _warm(pipeline, ndc_code, recorded, force, render_pdf):
+    """Warm one NDC; returns its outcome."""
+    # Resolving the current versions fetches (and caches) the label and the clinical trials
+    drug_info, label_info, clinical_trials, versions = pipeline.current_versions(ndc_code)
+    if drug_info is None:
+        return "missing"
+    missing = pipeline.unavailable_inputs(recorded, label_info, clinical_trials)
+    if missing:
+        logging.getLogger('drugdeck').warning("Could not fetch %s for %s; report left as is",
+                                              ", ".join(missing), ndc_code)
+        return "failed"
+    if not force and recorded == versions:
+        # The report is current, so its insights are already in the insights cache
+        return "current"
+
+    ai_insights, insights_key = pipeline.get_insights(drug_info)
+    report = pipeline.compile(ndc_code, drug_info, label_info, ai_insights, insights_key, clinical_trials)
+    pipeline.write_outputs(ndc_code, report)
+    if render_pdf and pipeline.report_settings.get('pdf_on_demand', False) and pipeline.render_cache is not None:
+        # Deferred PDFs are then served from the render cache on first download
+        pipeline.pdf_generator(report).render_bytes()
+    return "built"
+
+def _deadline(until):
+    """Unix time of the next occurrence of HH:MM."""
+    now = datetime.now()
+    hour, minute = (int(part) for part in until.split(':'))
+    deadline = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if deadline <= now:
+        deadline += timedelta(days=1)
+    return deadline.timestamp()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import logging
+import os
+import time
+from main import load_config
+from pipeline.report_pipeline import ReportPipeline
+from pipeline.scheduler import BATCH, request_priority
+from utils.logging_setup import setup_logging
+from utils.profiling import add_profile_argument, profile_run
+from utils.tracing import export_metrics, serve_metrics
+from dotenv import load_dotenv
+
+def main():
+    """Rebuild only the existing reports whose inputs changed since they were generated."""
+    parser = argparse.ArgumentParser(description="Regenerate DrugDeck reports whose inputs changed.")
+    parser.add_argument('ndc', nargs='*', help="Limit the refresh to these NDC codes")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only list the reports that would be rebuilt, judged from cached labels "
+                             "(no requests, nothing written)")
+    parser.add_argument('--force', action='store_true', help="Rebuild every report, changed or not")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    load_dotenv()
+    config = load_config()
+    setup_logging(settings=config.get('logging'), batch=True)
+    pipeline = ReportPipeline(config)
+    port = config.get('metrics', {}).get('port')
+    if port:
+        serve_metrics(port)
+
+    run_id = f"regenerate_{time.strftime('%Y%m%d_%H%M%S')}"
+    start_time = time.time()
+    # Bulk refreshes yield the shared pools to interactive requests
+    with profile_run(args.profile and os.path.join(args.profile, run_id)), request_priority(BATCH):
+        counts = _refresh(pipeline, args.ndc, args.force, args.dry_run)
+
+    if not args.dry_run:
+        if counts['rebuilt'] and pipeline.artifact_store is not None:
+            # Rebuilt reports supersede stored blobs; drop the ones nothing references any more
+            pipeline.artifact_store.compact_manifest()
+        export_metrics(config, run_id)
+    verb = "to rebuild" if args.dry_run else "rebuilt"
+    skipped = "unknown" if args.dry_run else "failed"
+    print(f"{counts['rebuilt']} {verb}, {counts['unchanged']} unchanged, {counts['missing']} missing, "
+          f"{counts['failed']} {skipped} ({time.time() - start_time:.2f} seconds)")
+
+def _refresh(pipeline, ndc_codes, force, dry_run):
+    """Rebuild the stale reports among ndc_codes (all existing reports when empty)."""
+    logger = logging.getLogger('drugdeck')
+    existing = pipeline.existing_reports()
+    ndc_codes = ndc_codes or sorted(existing)
+    counts = {"rebuilt": 0, "unchanged": 0, "missing": 0, "failed": 0}
+
+    for ndc_code in ndc_codes:
+        try:
+            # A nightly refresh must see label updates the label cache (TTL) would still hide
+            drug_info, label_info, clinical_trials, versions = pipeline.current_versions(
+                ndc_code, refresh=not dry_run, offline=dry_run)
+        except Exception as e:
+            logger.error("Could not check the inputs of %s: %s; report left as is", ndc_code, e)
+            counts["failed"] += 1
+            continue
+        if drug_info is None:
+            logger.warning("NDC %s is no longer in %s; report left as is", ndc_code, pipeline.data_file)
+            counts["missing"] += 1
+            continue
+
+        recorded = existing.get(ndc_code)
+        # Never rebuild a report without an input it was built from (service down, nothing cached)
+        unavailable = pipeline.unavailable_inputs(recorded, label_info, clinical_trials)
+        if unavailable:
+            if dry_run:
+                print(f"{ndc_code}: unknown (not cached: {', '.join(unavailable)})")
+            else:
+                logger.warning("Could not fetch %s for %s; report left as is", ", ".join(unavailable), ndc_code)
+                print(f"{ndc_code}: skipped (could not fetch: {', '.join(unavailable)})")
+            counts["failed"] += 1
+            continue
+
+        if not force and recorded == versions:
+            counts["unchanged"] += 1
+            continue
+
+        reason = "forced" if force else _change_reason(recorded, versions)
+        if dry_run:
+            print(f"{ndc_code}: would rebuild ({reason})")
+        else:
+            pipeline.generate(ndc_code, drug_info, label_info, clinical_trials)
+            print(f"{ndc_code}: rebuilt ({reason})")
+        counts["rebuilt"] += 1
+    return counts
+
+def _change_reason(recorded, current):
+    """Describe which inputs differ between the recorded and current versions."""
+    if not recorded:
+        return "no recorded input versions"
+    changed = [name for name in {**recorded, **current} if recorded.get(name) != current.get(name)]
+    return "changed: " + ", ".join(changed)
+
+if __name__ == "__main__":
+    main()
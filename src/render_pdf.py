@@ -0,0 +1,78 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from data.artifact_store import ArtifactStore
+from data.request_history import RequestHistory
+from generators.pdf_generator import PDFGenerator
+from generators.render_cache import RenderCache
+from main import load_config
+from utils.helpers import load_json
+from utils.profiling import add_profile_argument, profile_run
+
+def main():
+    """Render the PDF for a previously compiled report on demand."""
+    parser = argparse.ArgumentParser(description="Render a DrugDeck PDF from a saved report.")
+    parser.add_argument('report', nargs='?', help="Path to a <ndc>_drug_report.json file")
+    parser.add_argument('--ndc', help="Render the latest report for this NDC from the artifact store instead")
+    parser.add_argument('-o', '--output', help="Output PDF path ('-' for stdout); defaults to the report path with .pdf")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    run_id = f"render_pdf_{time.strftime('%Y%m%d_%H%M%S')}"
+    with profile_run(args.profile and os.path.join(args.profile, run_id)):
+        _render(parser, args)
+
+def _render(parser, args):
+    """Render the requested report to its output."""
+    logger = logging.getLogger('drugdeck')
+    config = load_config()
+    render_cache = RenderCache.from_config(config)
+    request_history = RequestHistory.from_config(config)
+    
+    if args.ndc:
+        if request_history is not None:
+            request_history.record(args.ndc)
+        artifact_store = ArtifactStore.from_config(config)
+        if artifact_store is None:
+            parser.error("--ndc requires artifact_store.enabled in the configuration")
+        entry = artifact_store.get_entry(args.ndc)
+        if not entry:
+            logger.error("No stored report for NDC: %s", args.ndc)
+            sys.exit(1)
+        pdf = artifact_store.load_pdf(args.ndc)
+        if pdf is None:
+            # Render once and keep the PDF next to the stored report
+            report = artifact_store.load_report(args.ndc)
+            pdf = PDFGenerator(report, render_cache=render_cache).render_bytes()
+            artifact_store.attach_pdf(args.ndc, pdf)
+        output = args.output or f"{args.ndc}_drug_report.pdf"
+        if output == '-':
+            sys.stdout.buffer.write(pdf)
+        else:
+            with open(output, 'wb') as f:
+                f.write(pdf)
+            print(f"PDF saved: {output}")
+        return
+    
+    if not args.report:
+        parser.error("either a report JSON path or --ndc is required")
+    report = load_json(args.report)
+    if not report:
+        logger.error("Could not load report: %s", args.report)
+        sys.exit(1)
+    ndc_code = report.get("meta", {}).get("ndc_code")
+    if request_history is not None and ndc_code:
+        request_history.record(ndc_code)
+    
+    output = args.output or f"{os.path.splitext(args.report)[0]}.pdf"
+    if output == '-':
+        PDFGenerator(report, render_cache=render_cache).generate_pdf(sys.stdout.buffer)
+    else:
+        PDFGenerator(report, output, render_cache=render_cache).generate_pdf()
+        print(f"PDF saved: {output}")
+
+if __name__ == "__main__":
+    main()
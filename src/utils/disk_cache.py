@@ -0,0 +1,78 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+class DiskCache:
+    """Persistent JSON key/value cache with one file per key and an optional time-to-live."""
+
+    def __init__(self, cache_dir, ttl=None):
+        """
+        Initialize the disk cache.
+
+        Args:
+            cache_dir (str): Directory holding the cache entries
+            ttl (float, optional): Seconds after which entries expire; None keeps them forever
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.logger = logging.getLogger('drugdeck.disk_cache')
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key, allow_expired=False):
+        """
+        Get a cached value.
+
+        Args:
+            key (str): Cache key
+            allow_expired (bool): Also return entries older than the TTL
+
+        Returns:
+            The cached value, or None if missing, expired or unreadable
+        """
+        path = self._path(key)
+        try:
+            if not allow_expired and self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning("Unreadable cache entry %s: %s", path, e)
+            return None
+
+    def mtime(self, key):
+        """
+        Get the time an entry was written.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            float: Unix time of the last write, or None if the entry is missing
+        """
+        try:
+            return os.path.getmtime(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        """
+        Store a JSON-serializable value.
+
+        Args:
+            key (str): Cache key
+            value: Value to store
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(value, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
@@ -1,7 +1,12 @@
 
 import re
-import json
 import datetime
+import html
+from utils import serialization
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?;:])\s+')
 
 def format_ndc(ndc_code):
     """
@@ -67,21 +72,40 @@ def format_date(date_str, output_format="%B %d, %Y"):
         return parsed_date.strftime(output_format)
     return date_str
 
+def format_share(share):
+    """
+    Format a {category: fraction} mapping as percentages.
+    
+    Args:
+        share (dict): Category -> fraction between 0 and 1
+        
+    Returns:
+        str: e.g. "ANDA 62.5%, NDA 37.5%", or "Unknown" if empty
+    """
+    if not share:
+        return "Unknown"
+    return ", ".join(f"{key} {value * 100:.1f}%" for key, value in sorted(share.items(), key=lambda item: -item[1]))
+
 def save_json(data, filename):
     """
     Save data to a JSON file.
     
+    The format and compression follow the file extension (e.g. ".json.gz",
+    ".msgpack.zst"); plain ".json" files are written indented.
+    
     Args:
         data: Data to save
         filename (str): Filename to save to
     """
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+    serialization.save(data, filename, pretty=True)
 
 def load_json(filename):
     """
     Load data from a JSON file.
     
+    Any format written by save_json (JSON or msgpack, optionally gzip/zstd
+    compressed) is detected automatically.
+    
     Args:
         filename (str): Filename to load from
         
@@ -89,11 +113,78 @@ def load_json(filename):
         dict: Loaded JSON data
     """
     try:
-        with open(filename, 'r') as f:
-            return json.load(f)
+        return serialization.load(filename)
     except Exception as e:
         print(f"Error loading JSON file {filename}: {e}")
         return None
 
+def strip_markup(text):
+    """
+    Remove HTML/XML tags (e.g. label tables), decode entities and collapse whitespace.
+    
+    Args:
+        text (str): Text that may contain markup
+        
+    Returns:
+        str: Plain text
+    """
+    return _WHITESPACE_RE.sub(' ', html.unescape(_TAG_RE.sub(' ', text))).strip()
+
+def escape_markup(text):
+    """
+    Escape text so it can be used safely inside a reportlab Paragraph.
+    
+    Args:
+        text (str): Plain text
+        
+    Returns:
+        str: Text with &, < and > escaped
+    """
+    return html.escape(text, quote=False)
+
+def chunk_text(text, max_chars=1500):
+    """
+    Split text into chunks of at most max_chars, preferring sentence boundaries.
+    
+    Runs in a single pass over the text, so the cost is linear in its length.
+    Sentences longer than max_chars are split at the last space that fits.
+    
+    Args:
+        text (str): Text to split
+        max_chars (int): Maximum length of each chunk
+        
+    Returns:
+        list: Chunks of text in their original order
+    """
+    chunks = []
+    current = []
+    current_len = 0
+    
+    for sentence in _SENTENCE_END_RE.split(text):
+        if len(sentence) > max_chars:
+            if current:
+                chunks.append(' '.join(current))
+                current, current_len = [], 0
+            start = 0
+            while len(sentence) - start > max_chars:
+                cut = sentence.rfind(' ', start, start + max_chars)
+                if cut <= start:
+                    cut = start + max_chars
+                chunks.append(sentence[start:cut])
+                start = cut + 1 if sentence[cut:cut + 1] == ' ' else cut
+            sentence = sentence[start:]
+        
+        if not sentence:
+            continue
+        if current and current_len + len(sentence) + 1 > max_chars:
+            chunks.append(' '.join(current))
+            current, current_len = [], 0
+        current.append(sentence)
+        current_len += len(sentence) + 1
+    
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
 def handle_error(error_message):
     print(f"Error: {error_message}")
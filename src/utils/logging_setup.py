@@ -0,0 +1,151 @@
+"""
+Non-blocking logging for the DrugDeck entry points.
+
+Calling threads only put records on a queue; a QueueListener thread
+formats them and writes the rotating log file and the console. Records
+keep their message template and arguments until the listener formats
+them, so log calls should pass arguments instead of f-strings:
+
+    logger.info("Drug found with NDC: %s", ndc_code)
+
+Batch runs (regenerate, prewarm) log at batch_level to the file and only
+warnings to the console, and their repeated INFO/DEBUG messages (the same
+template from the same logger) are sampled: the first is always kept, then
+one in every sample_every. Warnings and errors are never sampled.
+
+Configured by the `logging` block of config.yaml:
+
+    logging:
+      level: INFO
+      batch_level: INFO          # level of batch runs
+      file: logs/drugdeck.log    # rotated by size
+      max_mb: 20
+      backup_count: 5
+      format: text               # text or json (one JSON object per line)
+      sample_every: 100          # batch mode only; 1 keeps every record
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import Counter
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, including fields passed with extra=."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record):
+        # The stock handler merges msg and args here, on the logging thread
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+class SamplingFilter(logging.Filter):
+    """Keeps the first INFO/DEBUG record of each message template, then one in every `every`."""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = every
+        self._seen = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._seen[key]
+            self._seen[key] = seen + 1
+        return seen % self.every == 0
+
+def setup_logging(log_level=logging.INFO, settings=None, batch=False):
+    """
+    Route logging through a queue to a size-rotated log file and the console.
+
+    Calling it again replaces the previous configuration.
+
+    Args:
+        log_level: Logging level, unless settings give one (level, or batch_level in batch mode)
+        settings (dict, optional): The `logging` block of the configuration
+        batch (bool): Batch run: console shows warnings only, and sample_every applies to
+            repeated INFO/DEBUG messages
+
+    Returns:
+        logging.Logger: The 'drugdeck' logger
+    """
+    global _listener
+    settings = settings or {}
+    level = settings.get('batch_level' if batch else 'level', log_level)
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+
+    log_file = settings.get('file', 'logs/drugdeck.log')
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+    formatter = JsonFormatter() if settings.get('format') == 'json' else logging.Formatter(TEXT_FORMAT)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=int(settings.get('max_mb', 20) * 2 ** 20),
+        backupCount=settings.get('backup_count', 5), encoding='utf-8')
+    console_handler = logging.StreamHandler()
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    if batch:
+        # Batch entry points print their own progress; details go to the file
+        console_handler.setLevel(logging.WARNING)
+
+    stop_logging()
+    records = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(records)
+    sample_every = settings.get('sample_every', 100) if batch else 1
+    if sample_every and sample_every > 1:
+        queue_handler.addFilter(SamplingFilter(sample_every))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    return logging.getLogger('drugdeck')
+
+def stop_logging():
+    """Write out the queued records and stop the listener thread (also run at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(stop_logging)
@@ -0,0 +1,229 @@
+"""
+Per-stage profiling for the --profile option of the report entry points.
+
+The profiler listens to the tracing spans (lookup, label, compile,
+render.pdf, ...) so no stage needs profiling code of its own:
+
+    cpu.collapsed    stack samples prefixed with the active stages, in the
+                     collapsed format read by flamegraph.pl and speedscope
+    summary.txt      time, sample count and top-N allocation sites per stage
+
+Samples are taken from sys._current_frames() at a fixed interval, so they
+measure wall-clock time including time blocked on HTTP. Allocations are
+the blocks a stage allocated that were still alive at its next stage
+boundary, exclusive of nested stages. In multi-threaded runs they are
+attributed to the stage of the thread reaching the boundary.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from utils.tracing import get_tracer
+
+# The profiler's own bookkeeping is left out of the allocation summary
+_OWN_FILES = (tracemalloc.__file__, __file__)
+
+class StageProfiler:
+    """Samples stacks and attributes tracemalloc allocations to the tracing span running them."""
+
+    def __init__(self, output_dir, interval=0.005, top_n=15, tracer=None):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_dir (str): Directory receiving cpu.collapsed and summary.txt
+            interval (float): Seconds between stack samples
+            top_n (int): Allocation sites listed per stage
+            tracer (Tracer, optional): Tracer whose spans delimit the stages
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top_n = top_n
+        self.tracer = tracer or get_tracer()
+        self.logger = logging.getLogger('drugdeck.profiling')
+        self.samples = Counter()
+        self.stage_samples = Counter()
+        self.stage_calls = Counter()
+        self.stage_time = Counter()
+        self.allocations = defaultdict(Counter)
+        self.allocation_counts = defaultdict(Counter)
+        self._stages = {}
+        self._paused = set()
+        self._overhead = defaultdict(float)
+        self._overhead_at_start = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        """Start tracing allocations and sampling stacks."""
+        tracemalloc.start()
+        self.tracer.add_listener(self)
+        self._sampler = threading.Thread(target=self._sample_loop, name='stage-profiler', daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        """
+        Stop profiling and write the profile files.
+
+        Returns:
+            dict: Paths written, keyed by "collapsed" and "summary"
+        """
+        self._stop.set()
+        self._sampler.join()
+        self.tracer.remove_listener(self)
+        self._collect_allocations(None)
+        tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = {
+            "collapsed": os.path.join(self.output_dir, 'cpu.collapsed'),
+            "summary": os.path.join(self.output_dir, 'summary.txt'),
+        }
+        with open(paths["collapsed"], 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+        with open(paths["summary"], 'w') as f:
+            f.write(self.summary())
+        self.logger.info("Profile written to %s", self.output_dir)
+        return paths
+
+    def span_started(self, record):
+        """Tracer listener: enter a stage in the current thread."""
+        ident = threading.get_ident()
+        self._paused.add(ident)
+        stages = self._stages.setdefault(ident, [])
+        self._collect_allocations(stages[-1] if stages else None)
+        stages.append(record["name"])
+        self._overhead_at_start[record["id"]] = self._overhead[ident]
+        self._paused.discard(ident)
+
+    def span_finished(self, record):
+        """Tracer listener: leave a stage and attribute its allocations."""
+        ident = threading.get_ident()
+        self._paused.add(ident)
+        name = record["name"]
+        # Nested stages' snapshots ran inside this span; keep them out of its time
+        overhead = self._overhead[ident] - self._overhead_at_start.pop(record["id"], 0.0)
+        self.stage_calls[name] += 1
+        self.stage_time[name] += record["duration"] - overhead
+        self._collect_allocations(name)
+        stages = self._stages.get(ident)
+        if stages:
+            stages.pop()
+        self._paused.discard(ident)
+
+    def summary(self):
+        """
+        Render the per-stage time, sample count and top allocation sites.
+
+        Returns:
+            str: Plain-text summary
+        """
+        lines = [f"Sampling interval: {self.interval * 1000:.1f} ms (times exclude snapshot overhead)", ""]
+        for name in sorted(self.stage_calls, key=lambda n: -self.stage_time[n]):
+            lines.append(f"== {name}: {self.stage_calls[name]} spans, {self.stage_time[name]:.2f} s, "
+                         f"{self.stage_samples[name]} samples ==")
+            allocations = self.allocations[name]
+            for site, size in sorted(allocations.items(), key=lambda item: -item[1])[:self.top_n]:
+                lines.append(f"  {_format_size(size):>10}  {self.allocation_counts[name][site]:>8} blocks  {site}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def _collect_allocations(self, stage):
+        """Attribute the blocks allocated since the last stage boundary to a stage, then start over."""
+        start = time.perf_counter()
+        try:
+            self._attribute_allocations(stage)
+        finally:
+            self._overhead[threading.get_ident()] += time.perf_counter() - start
+
+    def _attribute_allocations(self, stage):
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot()
+            # Clearing keeps every snapshot proportional to one interval, not the whole heap
+            tracemalloc.clear_traces()
+            if stage is None:
+                return
+            for stat in snapshot.statistics('lineno'):
+                frame = stat.traceback[0]
+                if frame.filename in _OWN_FILES:
+                    continue
+                site = str(frame)
+                self.allocations[stage][site] += stat.size
+                self.allocation_counts[stage][site] += stat.count
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, stages in list(self._stages.items()):
+                # Skip the sampler itself and threads busy taking snapshots
+                if ident == own or not stages or ident in self._paused:
+                    continue
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stages = list(stages)
+                self.samples[";".join([f"[{name}]" for name in stages] + _stack_names(frame))] += 1
+                for name in set(stages):
+                    self.stage_samples[name] += 1
+
+def _stack_names(frame):
+    """Frame names from the outermost call to the innermost."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+def _format_size(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+@contextmanager
+def profile_run(output_dir, name="run"):
+    """
+    Profile a block when output_dir is set; do nothing otherwise.
+
+    The block runs inside a root span so work outside the pipeline stages is
+    sampled too.
+
+    Args:
+        output_dir (str): Profile directory, or None to disable profiling
+        name (str): Name of the root span
+
+    Yields:
+        StageProfiler: Running profiler, or None when disabled
+    """
+    if not output_dir:
+        yield None
+        return
+    profiler = StageProfiler(output_dir)
+    profiler.start()
+    try:
+        with profiler.tracer.span(name):
+            yield profiler
+    finally:
+        paths = profiler.stop()
+        print(f"Profile saved: {paths['collapsed']} and {paths['summary']}", file=sys.stderr)
+
+def add_profile_argument(parser):
+    """
+    Add the --profile [DIR] option to an entry point's argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser to extend
+    """
+    parser.add_argument('--profile', nargs='?', const='profiles', metavar='DIR',
+                        help="Profile each stage; writes DIR/<run>/cpu.collapsed and summary.txt "
+                             "(default DIR: profiles)")
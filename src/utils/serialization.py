@@ -0,0 +1,243 @@
+"""
+Pluggable report serialization.
+
+Backends:
+    json     orjson when installed, otherwise the standard library encoder
+    msgpack  compact binary form (requires the msgpack package)
+
+Compression:
+    gzip     standard library
+    zstd     requires the zstandard package
+
+Loading detects the compression and format from the data itself, so
+callers never need to know how a file was written.
+"""
+import gzip
+import io
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS = ("json", "msgpack")
+COMPRESSIONS = (None, "gzip", "zstd")
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+_EXTENSIONS = {"json": ".json", "msgpack": ".msgpack"}
+_COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+def dumps(obj, fmt="json", compression=None, pretty=False):
+    """
+    Serialize an object to bytes.
+
+    Args:
+        obj: JSON-compatible object
+        fmt (str): "json" or "msgpack"
+        compression (str, optional): None, "gzip" or "zstd"
+        pretty (bool): Indent JSON output (ignored for msgpack)
+
+    Returns:
+        bytes: Serialized data
+    """
+    if fmt == "json":
+        if orjson is not None:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+        else:
+            data = json.dumps(obj, indent=2 if pretty else None,
+                              separators=None if pretty else (',', ':')).encode('utf-8')
+    elif fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack serialization requires the 'msgpack' package")
+        data = msgpack.packb(obj, use_bin_type=True)
+    else:
+        raise ValueError(f"Unsupported serialization format: {fmt}")
+
+    if compression is None:
+        return data
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+def loads(data):
+    """
+    Deserialize bytes produced by dumps(), detecting compression and format.
+
+    Args:
+        data (bytes): Serialized data
+
+    Returns:
+        The deserialized object
+    """
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    elif data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed data requires the 'zstandard' package")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+    if data.lstrip()[:1] in (b'{', b'['):
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    if msgpack is None:
+        raise RuntimeError("msgpack data requires the 'msgpack' package")
+    return msgpack.unpackb(data, raw=False)
+
+def file_extension(fmt="json", compression=None):
+    """
+    Get the file extension for a format/compression pair, e.g. ".msgpack.zst".
+
+    Args:
+        fmt (str): Serialization format
+        compression (str, optional): Compression
+
+    Returns:
+        str: File extension
+    """
+    return _EXTENSIONS[fmt] + _COMPRESSION_EXTENSIONS.get(compression, "")
+
+def save(obj, filename, fmt=None, compression=None, pretty=False):
+    """
+    Serialize an object to a file.
+
+    Args:
+        obj: JSON-compatible object
+        filename (str): Output file
+        fmt (str, optional): Format; inferred from the file extension when omitted
+        compression (str, optional): Compression; inferred from the file extension when omitted
+        pretty (bool): Indent JSON output
+    """
+    if fmt is None:
+        fmt, inferred_compression = _infer(filename)
+        compression = compression or inferred_compression
+    with open(filename, 'wb') as f:
+        f.write(dumps(obj, fmt, compression, pretty))
+
+def load(filename):
+    """
+    Load an object from a file written in any supported format.
+
+    Args:
+        filename (str): Input file
+
+    Returns:
+        The deserialized object
+    """
+    with open(filename, 'rb') as f:
+        return loads(f.read())
+
+def dump_archive(objects, filename, fmt=None, compression=None):
+    """
+    Stream many objects (e.g. thousands of reports) into a single archive file.
+
+    JSON archives are written as one JSON document per line; msgpack archives
+    are concatenated msgpack objects. The whole archive is compressed as one
+    stream, so shared text across reports compresses well.
+
+    Args:
+        objects (iterable): JSON-compatible objects
+        filename (str): Output file; format/compression inferred from the extension when omitted
+        fmt (str, optional): "json" or "msgpack"
+        compression (str, optional): None, "gzip" or "zstd"
+
+    Returns:
+        int: Number of objects written
+    """
+    if fmt is None:
+        fmt, inferred_compression = _infer(filename)
+        compression = compression or inferred_compression
+    count = 0
+    with open(filename, 'wb') as raw, _compressed_writer(raw, compression) as f:
+        for obj in objects:
+            f.write(dumps(obj, fmt))
+            if fmt == "json":
+                f.write(b"\n")
+            count += 1
+    return count
+
+def iter_archive(filename):
+    """
+    Iterate over the objects in an archive written by dump_archive.
+
+    Args:
+        filename (str): Archive file
+
+    Yields:
+        The archived objects, in order
+    """
+    with open(filename, 'rb') as raw:
+        head = raw.read(4)
+        raw.seek(0)
+        if head[:2] == GZIP_MAGIC:
+            f = gzip.GzipFile(fileobj=raw)
+        elif head == ZSTD_MAGIC:
+            if zstandard is None:
+                raise RuntimeError("zstd-compressed data requires the 'zstandard' package")
+            f = zstandard.ZstdDecompressor().stream_reader(raw)
+        else:
+            f = raw
+
+        first = f.peek(1)[:1] if hasattr(f, 'peek') else None
+        if first is None:
+            # zstd readers cannot peek; buffer the stream so the format can be detected
+            f = io.BufferedReader(f)
+            first = f.peek(1)[:1]
+
+        if first in (b'{', b'['):
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+        else:
+            if msgpack is None:
+                raise RuntimeError("msgpack data requires the 'msgpack' package")
+            yield from msgpack.Unpacker(f, raw=False)
+
+def _compressed_writer(raw, compression):
+    """Wrap a binary file in a streaming compressor."""
+    if compression is None:
+        return _NonClosing(raw)
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+class _NonClosing:
+    """Context manager exposing write() on a file without closing it on exit."""
+
+    def __init__(self, f):
+        self.write = f.write
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def _infer(filename):
+    """Infer (format, compression) from a file name."""
+    compression = None
+    for name, extension in _COMPRESSION_EXTENSIONS.items():
+        if filename.endswith(extension):
+            compression = name
+            filename = filename[:-len(extension)]
+    fmt = "msgpack" if filename.endswith(_EXTENSIONS["msgpack"]) else "json"
+    return fmt, compression
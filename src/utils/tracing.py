@@ -0,0 +1,398 @@
+"""
+Lightweight tracing and metrics.
+
+Spans time nested pipeline stages (lookup > http.openfda, render.pdf, ...).
+Every finished span feeds a per-stage latency histogram; counters track
+cache hits and misses. Both are exported in the Prometheus text format,
+and the spans of a run can be written as a JSON trace.
+"""
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from fast cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Histogram:
+    """Cumulative latency histogram with fixed bucket bounds."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Record one observation."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation inside its bucket.
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float: Estimated value, or None without observations
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                return lower + (bound - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = bound
+        return self.buckets[-1]
+
+class Tracer:
+    """Collects spans, latency histograms and counters for one process."""
+
+    def __init__(self, max_spans=100000):
+        """
+        Initialize the tracer.
+
+        Args:
+            max_spans (int): Finished spans kept for the JSON trace; histograms keep counting past it
+        """
+        self.max_spans = max_spans
+        self.logger = logging.getLogger('drugdeck.tracing')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._listeners = ()
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded spans and metrics."""
+        with self._lock:
+            self.spans = []
+            self.dropped_spans = 0
+            self.histograms = {}
+            self.counters = {}
+
+    def add_listener(self, listener):
+        """
+        Register an object notified when spans start and finish (e.g. a profiler).
+
+        Args:
+            listener: Object with span_started(record) and span_finished(record) methods,
+                called in the thread running the span
+        """
+        with self._lock:
+            self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        """Unregister a listener added with add_listener."""
+        with self._lock:
+            self._listeners = tuple(l for l in self._listeners if l is not listener)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Time a block as a span nested under the current span of this thread.
+
+        Args:
+            name (str): Stage name, e.g. "lookup" or "http.openfda"
+            **attributes: Extra values stored on the span
+
+        Yields:
+            dict: The span record; callers may add attributes to it
+        """
+        stack = self._stack()
+        record = {
+            "id": next(self._ids),
+            "parent_id": stack[-1]["id"] if stack else None,
+            "name": name,
+            "start": time.time(),
+            "thread": threading.current_thread().name,
+            "attributes": attributes,
+        }
+        stack.append(record)
+        listeners = self._listeners
+        for listener in listeners:
+            listener.span_started(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["duration"] = time.perf_counter() - start
+            for listener in reversed(listeners):
+                listener.span_finished(record)
+            stack.pop()
+            self._finish(record)
+
+    def current_span(self):
+        """Get the innermost open span of this thread, or None."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def attach(self, parent):
+        """
+        Nest the spans of this thread under a span opened in another thread.
+
+        Used when work is handed to a worker thread, so its spans stay part
+        of the request that submitted it.
+
+        Args:
+            parent (dict): Span record from current_span() in the submitting thread, or None
+        """
+        if parent is None:
+            yield
+            return
+        stack = self._stack()
+        stack.append(parent)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def observe(self, name, seconds):
+        """
+        Record a duration in a stage histogram without a span (e.g. time spent queued).
+
+        Args:
+            name (str): Stage name
+            seconds (float): Duration
+        """
+        with self._lock:
+            self._histogram(name).observe(seconds)
+
+    def increment(self, name, value=1, **labels):
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Counter name, exported as drugdeck_<name>_total
+            value (int): Amount to add
+            **labels: Label values, e.g. cache="label", result="hit"
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def cache_result(self, cache, hit):
+        """Count a cache lookup as a hit or a miss."""
+        self.increment("cache_requests", cache=cache, result="hit" if hit else "miss")
+
+    def stage_summary(self):
+        """
+        Summarize latency per stage.
+
+        Returns:
+            dict: Stage -> {count, total, p50, p99} in seconds
+        """
+        with self._lock:
+            return {
+                name: {
+                    "count": histogram.count,
+                    "total": round(histogram.sum, 6),
+                    "p50": _round(histogram.quantile(0.5)),
+                    "p99": _round(histogram.quantile(0.99)),
+                }
+                for name, histogram in sorted(self.histograms.items())
+            }
+
+    def prometheus_text(self):
+        """
+        Render the histograms and counters in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        with self._lock:
+            if self.histograms:
+                lines.append("# HELP drugdeck_stage_duration_seconds Duration of pipeline stages.")
+                lines.append("# TYPE drugdeck_stage_duration_seconds histogram")
+                for name, histogram in sorted(self.histograms.items()):
+                    stage = _label_value(name)
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f'drugdeck_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                    lines.append(f'drugdeck_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'drugdeck_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                    lines.append(f'drugdeck_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            declared = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"drugdeck_{name}_total"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} counter")
+                    declared.add(metric)
+                label_text = ",".join(f'{key}="{_label_value(val)}"' for key, val in labels)
+                lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Write the metrics text to a file, e.g. for the node exporter textfile collector.
+
+        Args:
+            path (str): Output file
+        """
+        _atomic_write(path, self.prometheus_text())
+
+    def trace(self, run_id=None):
+        """
+        Get the spans and stage summary of this run.
+
+        Args:
+            run_id (str, optional): Identifier stored in the trace
+
+        Returns:
+            dict: JSON-serializable trace
+        """
+        with self._lock:
+            spans = list(self.spans)
+            dropped = self.dropped_spans
+        return {
+            "run_id": run_id,
+            "spans": spans,
+            "dropped_spans": dropped,
+            "stages": self.stage_summary(),
+        }
+
+    def write_trace(self, path, run_id=None):
+        """
+        Write the JSON trace of this run.
+
+        Args:
+            path (str): Output file
+            run_id (str, optional): Identifier stored in the trace
+        """
+        _atomic_write(path, json.dumps(self.trace(run_id), default=str))
+        self.logger.info("Trace written: %s", path)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def _finish(self, record):
+        with self._lock:
+            self._histogram(record["name"]).observe(record["duration"])
+            if len(self.spans) < self.max_spans:
+                self.spans.append(record)
+            else:
+                self.dropped_spans += 1
+        self.logger.debug("Span %s finished in %.3f seconds", record['name'], record['duration'])
+
+def _round(value):
+    return round(value, 6) if value is not None and not math.isnan(value) else None
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _atomic_write(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+_tracer = Tracer()
+
+def get_tracer():
+    """
+    Get the process-wide tracer.
+
+    Returns:
+        Tracer: Shared tracer instance
+    """
+    return _tracer
+
+def span(name, **attributes):
+    """Time a block as a span of the process-wide tracer (see Tracer.span)."""
+    return _tracer.span(name, **attributes)
+
+def export_metrics(config, run_id, tracer=None):
+    """
+    Write the run's JSON trace and the Prometheus metrics file as configured.
+
+    Config block "metrics": trace_dir (one <run_id>.json per run) and
+    prometheus_file; either may be omitted.
+
+    Args:
+        config (dict): Application configuration
+        run_id (str): Run identifier used for the trace file name
+        tracer (Tracer, optional): Tracer to export; defaults to the process-wide tracer
+
+    Returns:
+        dict: Paths written, keyed by "trace" and "prometheus"
+    """
+    tracer = tracer or _tracer
+    metrics_config = config.get('metrics', {})
+    written = {}
+    if not metrics_config.get('enabled', True):
+        return written
+    if metrics_config.get('trace_dir'):
+        written["trace"] = os.path.join(metrics_config['trace_dir'], f"{run_id}.json")
+        tracer.write_trace(written["trace"], run_id)
+    if metrics_config.get('prometheus_file'):
+        written["prometheus"] = metrics_config['prometheus_file']
+        tracer.write_prometheus(written["prometheus"])
+    return written
+
+def serve_metrics(port, host='127.0.0.1', tracer=None):
+    """
+    Serve the metrics text at /metrics from a background thread.
+
+    Args:
+        port (int): Port to listen on
+        host (str): Interface to bind
+        tracer (Tracer, optional): Tracer to export; defaults to the process-wide tracer
+
+    Returns:
+        ThreadingHTTPServer: Running server (call shutdown() to stop it)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    tracer = tracer or _tracer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = tracer.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logging.getLogger('drugdeck.tracing').info(f"Metrics served on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from data.artifact_store import ArtifactStore
+
+def report(version, label):
+    return {"meta": {"input_versions": {"v": version}}, "label_information": label, "ai_insights": {"summary": "s"}}
+
+class TestArtifactStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = ArtifactStore(self.tmp.name, sweep_grace_hours=0)
+
+    def test_torn_manifest_line_is_skipped(self):
+        self.store.put_report("1", report(1, {"a": 1}))
+        with open(self.store.manifest_path, 'a') as f:
+            f.write('{"ndc_code": "2", "rep')
+
+        store = ArtifactStore(self.tmp.name)
+        self.assertEqual(store.ndc_codes(), ["1"])
+        # The next entry starts on its own line instead of extending the torn one
+        store.put_report("3", report(1, {"a": 1}))
+        self.assertEqual(sorted(ArtifactStore(self.tmp.name).ndc_codes()), ["1", "3"])
+
+    def test_compact_manifest_deletes_unreferenced_blobs(self):
+        self.store.put_report("1", report(1, {"a": 1}), pdf=b"pdf 1", preview="preview 1")
+        self.store.put_report("2", report(1, {"a": 1}))
+        self.store.put_report("1", report(2, {"a": 2}), pdf=b"pdf 2", preview="preview 2")
+
+        self.assertEqual(self.store.compact_manifest(), 2)  # pdf 1 and preview 1
+        self.assertEqual(self.store.load_report("1"), report(2, {"a": 2}))
+        self.assertEqual(self.store.load_report("2"), report(1, {"a": 1}))
+        self.assertEqual(self.store.load_pdf("1"), b"pdf 2")
+
+    def test_compact_manifest_keeps_recent_blobs(self):
+        store = ArtifactStore(self.tmp.name, sweep_grace_hours=1)
+        store.put_report("1", report(1, {"a": 1}), pdf=b"pdf 1")
+        store.put_report("1", report(2, {"a": 1}), pdf=b"pdf 2")
+        self.assertEqual(store.compact_manifest(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from api.label_store import LabelStore
+
+class FakeFDAClient:
+    """openFDA label searches answered from a dict of (field, value) -> label."""
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.searches = []
+
+    def get_drug_label(self, ndc_code):
+        self.searches.append(("openfda.product_ndc", ndc_code))
+        return self.labels.get(("openfda.product_ndc", ndc_code))
+
+    def get_drug_label_by_set_id(self, set_id):
+        self.searches.append(("set_id", set_id))
+        return self.labels.get(("set_id", set_id))
+
+class TestLabelStore(unittest.TestCase):
+
+    def test_stale_set_id_falls_back_to_ndc_search(self):
+        label = {"set_id": "new", "version": "1"}
+        client = FakeFDAClient({("openfda.product_ndc", "1-2"): label})
+        store = LabelStore(client)
+
+        drug_info = {"openfda": {"spl_set_id": ["old"]}}
+        self.assertEqual(store.get_label("1-2", drug_info), label)
+        self.assertEqual(client.searches, [("set_id", "old"), ("openfda.product_ndc", "1-2")])
+        # The NDC now maps to the label's current set_id
+        self.assertEqual(store.resolve_set_id("1-2"), "new")
+
+if __name__ == "__main__":
+    unittest.main()
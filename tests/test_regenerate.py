@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from pipeline.report_pipeline import ReportPipeline
+from regenerate import _refresh
+
+NDC_CODE = "12345-678"
+SET_ID = "set-1"
+
+DRUG = {
+    "product_ndc": NDC_CODE,
+    "brand_name": "Testolol",
+    "generic_name": "testolol",
+    "labeler_name": "Test Labs",
+    "active_ingredients": [{"name": "TESTOLOL", "strength": "10 mg/1"}],
+    "openfda": {"spl_set_id": [SET_ID]},
+}
+
+LABEL = {
+    "set_id": SET_ID,
+    "version": "3",
+    "effective_time": "20240101",
+    "indications_and_usage": ["Testolol is indicated for tests."],
+}
+
+class TestRegenerate(unittest.TestCase):
+    """regenerate must leave a good report alone when an input it was built from is unavailable."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        data_file = os.path.join(self.tmp.name, 'drug-ndc.json')
+        with open(data_file, 'w') as f:
+            json.dump({"results": [DRUG]}, f)
+        self.config = {
+            "data_file": data_file,
+            "output_dir": os.path.join(self.tmp.name, 'reports'),
+            "report": {"preview_format": None, "pdf_on_demand": True},
+            "ai_insights": {"provider": "placeholder"},
+            "label_cache": {"dir": os.path.join(self.tmp.name, 'labels'), "ttl_hours": 24},
+        }
+        pipeline = self.pipeline(lambda value: dict(LABEL))
+        self.report_path = pipeline.generate(NDC_CODE)["report"]
+        with open(self.report_path, 'rb') as f:
+            self.report = f.read()
+
+    def pipeline(self, get_label):
+        """A fresh pipeline (empty in-memory label store) whose openFDA label searches call get_label(value)."""
+        pipeline = ReportPipeline(self.config)
+        pipeline.fda_client._search_label = lambda field, value: get_label(value)
+        return pipeline
+
+    def assert_report_kept(self):
+        with open(self.report_path, 'rb') as f:
+            self.assertEqual(f.read(), self.report)
+
+    def test_unchanged_label_is_not_rebuilt(self):
+        counts = _refresh(self.pipeline(lambda value: dict(LABEL)), [], False, False)
+        self.assertEqual(counts, {"rebuilt": 0, "unchanged": 1, "missing": 0, "failed": 0})
+        self.assert_report_kept()
+
+    def test_label_fetch_returning_none_keeps_report(self):
+        for force in (False, True):
+            counts = _refresh(self.pipeline(lambda value: None), [], force, False)
+            self.assertEqual(counts, {"rebuilt": 0, "unchanged": 0, "missing": 0, "failed": 1})
+            self.assert_report_kept()
+
+    def test_label_fetch_raising_keeps_report(self):
+        def unavailable(value):
+            raise ConnectionError("openFDA is down")
+
+        counts = _refresh(self.pipeline(unavailable), [], False, False)
+        self.assertEqual(counts, {"rebuilt": 0, "unchanged": 0, "missing": 0, "failed": 1})
+        self.assert_report_kept()
+
+    def test_dry_run_reads_expired_cache_entries(self):
+        # Backdate the label cache past its TTL; the dry run must still judge from it
+        cache_dir = self.config["label_cache"]["dir"]
+        old = time.time() - 2 * 86400
+        for name in os.listdir(cache_dir):
+            os.utime(os.path.join(cache_dir, name), (old, old))
+
+        def offline(value):
+            raise AssertionError("--dry-run must not fetch labels")
+
+        counts = _refresh(self.pipeline(offline), [], False, True)
+        self.assertEqual(counts, {"rebuilt": 0, "unchanged": 1, "missing": 0, "failed": 0})
+
+if __name__ == "__main__":
+    unittest.main()